@@ -1,20 +1,13 @@
+import json
 import os
-from dotenv import load_dotenv
-from sqlalchemy import create_engine
-
-# --- LLM and Embeddings ---
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-# --- Agent and Tools ---
-from langchain.agents import AgentExecutor, create_tool_calling_agent
-from langchain_community.agent_toolkits import create_sql_agent
-from langchain.tools.retriever import create_retriever_tool
-from langchain.tools import Tool  # <<< --- IMPORT THIS
-from langchain import hub
+from dotenv import load_dotenv
 
-# --- Database and Vector Store ---
-from langchain_community.utilities import SQLDatabase
-from langchain_chroma import Chroma  # <<< --- CORRECTED CHROMA IMPORT
+# Heavy dependencies (LangChain, SQLAlchemy, Chroma, OpenAI clients) are
+# imported inside the functions that need them, so importing this module
+# is cheap and the agent is only built on first use (or by warm_up()).
 
 # --- 1. CONFIGURATION ---
 load_dotenv()
@@ -23,8 +16,34 @@ CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 ROOT_DIR = os.path.abspath(os.path.join(CURRENT_DIR, '..'))
 DB_PATH = os.path.join(ROOT_DIR, 'data', 'db', 'customer_support.db')
 CHROMA_PERSIST_DIR = os.path.join(ROOT_DIR, 'vector_store', 'chroma_db')
+LOCAL_INDEX_DIR = os.path.join(ROOT_DIR, 'vector_store', 'local_index')
+# "chroma" (default) or "local" for the in-process NumPy/HNSW index
+RETRIEVER_BACKEND = os.getenv("RETRIEVER_BACKEND", "chroma")
+# Fuse vector hits with the FTS5 keyword index (scripts/build_fts.py) when it exists
+HYBRID_RETRIEVER = os.getenv("HYBRID_RETRIEVER", "1") == "1"
+# LangChain's step-by-step console output for both agents
+AGENT_VERBOSE = os.getenv("AGENT_VERBOSE", "1") == "1"
+ANSWER_CACHE_PATH = os.path.join(ROOT_DIR, 'cache', 'answer_cache.db')
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE", "1") == "1"
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))
 
-llm = ChatOpenAI(model="gpt-4o", temperature=0)
+_llm = None
+_llm_lock = threading.Lock()
+
+def get_llm():
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                from langchain_openai import ChatOpenAI
+                # streaming=True so stream_answer() gets tokens as they are generated
+                _llm = ChatOpenAI(model="gpt-4o", temperature=0, streaming=True)
+    return _llm
+
+def get_db_version():
+    """Fingerprint (mtime + size) of the ticket database."""
+    stat = os.stat(DB_PATH)
+    return (stat.st_mtime_ns, stat.st_size)
 
 # --- 2. SETUP THE TOOLS ---
 
@@ -33,37 +52,89 @@ def get_sql_tool():
     """
     Initializes the SQL Database and wraps the SQL agent executor in a Tool.
     """
+    from sqlalchemy import create_engine
+    from langchain_community.agent_toolkits import create_sql_agent
+    from langchain.tools import Tool
+    from app.query_guard import next_page_tool
+    from app.sql_database import CachedSQLDatabase
+
     print("Initializing SQL Tool...")
     engine = create_engine(f"sqlite:///{DB_PATH}")
-    db = SQLDatabase(engine=engine)
+    # Repeated SELECTs and schema lookups are answered from memory until
+    # the database file changes; agent SQL runs read-only with row limits
+    # (app/query_guard.py)
+    db = CachedSQLDatabase(engine=engine, source="customer_support", version_fn=get_db_version)
 
     # 1. Create the specialized SQL Agent Executor
     sql_agent_executor = create_sql_agent(
-        llm=llm,
+        llm=get_llm(),
         db=db,
+        # Large results are summarised; this pages through the full rows
+        extra_tools=[next_page_tool(db)],
         agent_type="tool-calling",
-        verbose=True
+        verbose=AGENT_VERBOSE
     )
 
+    # Point the SQL agent at precomputed summary tables (scripts/build_rollups.py)
+    def run_sql_agent(question: str):
+        rollups = db.rollups()
+        if rollups:
+            lines = [
+                f"- {r['name']} (grouped by {', '.join(json.loads(r['group_by']))}): {r['description']}"
+                for r in rollups
+            ]
+            question += (
+                "\n\nPrecomputed summary tables (indexed on their group columns); "
+                "use them for counts when they cover the question:\n" + "\n".join(lines)
+            )
+        return sql_agent_executor.invoke(question)
+
     # 2. Wrap it in a Tool object
     # This gives it the .name and .description attributes the main agent needs
     sql_tool = Tool(
         name="sql_database_query",
-        func=sql_agent_executor.invoke,
+        func=run_sql_agent,
         description="Use this tool for specific questions about the customer support database, including tickets, statuses, and categories. Input should be a full question."
     )
     return sql_tool
 
 # === TOOL 2: RAG (Vector Store) Tool ===
-def get_rag_tool():
-    """Initializes the ChromaDB vector store and creates a retriever tool."""
-    print("Initializing RAG Tool...")
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-    vector_store = Chroma(
-        persist_directory=CHROMA_PERSIST_DIR,
-        embedding_function=embeddings
-    )
-    retriever = vector_store.as_retriever(search_kwargs={"k": 3})
+def get_rag_tool(backend: str = RETRIEVER_BACKEND, where: dict = None):
+    """
+    Creates the retriever tool over the support ticket vectors.
+    backend="chroma" queries the persistent ChromaDB store; backend="local"
+    loads the same vectors into an in-process NumPy/HNSW index.
+    `where` optionally pre-filters on metadata, e.g. {"status": "Pending"}.
+    With HYBRID_RETRIEVER and an FTS5 index in the ticket database, vector
+    hits are fused with BM25 keyword hits (app/hybrid_retriever.py).
+    """
+    from langchain.tools.retriever import create_retriever_tool
+    from app.embeddings import get_embeddings
+    from app.hybrid_retriever import WHERE_COLUMNS, HybridRetriever, has_fts_index
+
+    hybrid = HYBRID_RETRIEVER and has_fts_index(DB_PATH)
+    unknown = [key for key in (where or {}) if key not in WHERE_COLUMNS]
+    if hybrid and unknown:
+        raise ValueError(f"Hybrid search can only filter on {tuple(WHERE_COLUMNS)}, got {unknown}")
+    print(f"Initializing RAG Tool ({backend}{', hybrid' if hybrid else ''})...")
+    # The fused result keeps 3 tickets; each side proposes more candidates
+    k = 10 if hybrid else 3
+    # Same (cached) embedder the vector store was built with
+    embeddings = get_embeddings()
+    if backend == "local":
+        from app.local_index import LocalIndexRetriever, load_local_index
+        index = load_local_index(CHROMA_PERSIST_DIR, LOCAL_INDEX_DIR)
+        retriever = LocalIndexRetriever(index=index, embeddings=embeddings, k=k, where=where)
+    else:
+        from langchain_chroma import Chroma
+        vector_store = Chroma(
+            persist_directory=CHROMA_PERSIST_DIR,
+            embedding_function=embeddings
+        )
+        search_kwargs = {"k": k, "filter": where} if where else {"k": k}
+        retriever = vector_store.as_retriever(search_kwargs=search_kwargs)
+    if hybrid:
+        retriever = HybridRetriever(vector_retriever=retriever, db_path=DB_PATH, k=3, candidates=k, where=where)
 
     retriever_tool = create_retriever_tool(
         retriever,
@@ -73,37 +144,188 @@ def get_rag_tool():
     return retriever_tool
 
 # --- 3. CREATE THE AGENT ---
-def create_main_agent():
+def get_agent_prompt():
+    """
+    Local copy of the "hwchase17/openai-functions-agent" hub prompt, so
+    building the agent needs no network round trip to the LangChain hub.
+    """
+    from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+    return ChatPromptTemplate.from_messages([
+        ("system", "You are a helpful assistant"),
+        MessagesPlaceholder("chat_history", optional=True),
+        ("human", "{input}"),
+        MessagesPlaceholder("agent_scratchpad"),
+    ])
+
+def create_main_agent(retriever_backend: str = RETRIEVER_BACKEND):
     """Combines all tools into a single, powerful agent."""
+    from langchain.agents import AgentExecutor, create_tool_calling_agent
+
     print("Creating the main agent...")
-    sql_tool = get_sql_tool()
-    rag_tool = get_rag_tool()
-    tools = [sql_tool, rag_tool]
+    # The two tools don't depend on each other (DB reflection vs. vector
+    # store load), so build them side by side
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        sql_future = pool.submit(get_sql_tool)
+        rag_future = pool.submit(get_rag_tool, retriever_backend)
+        tools = [sql_future.result(), rag_future.result()]
 
-    prompt = hub.pull("hwchase17/openai-functions-agent")
+    prompt = get_agent_prompt()
 
-    agent = create_tool_calling_agent(llm, tools, prompt)
-    agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
+    agent = create_tool_calling_agent(get_llm(), tools, prompt)
+    agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=AGENT_VERBOSE)
     return agent_executor
 
-# --- 4. MAIN FUNCTION TO PROCESS QUERIES ---
-main_agent = create_main_agent()
+_main_agent = None
+_main_agent_lock = threading.Lock()
+
+def get_main_agent():
+    """Builds the main agent on first call; later calls return the same one."""
+    global _main_agent
+    if _main_agent is None:
+        with _main_agent_lock:
+            if _main_agent is None:
+                _main_agent = create_main_agent()
+    return _main_agent
+
+_warm_up_thread = None
+
+def warm_up(background: bool = True):
+    """
+    Pre-builds the agent and answer cache so the first question doesn't pay
+    for it. With background=True this returns the (single, shared) warm-up
+    thread immediately; calling it again reuses that thread.
+    """
+    global _warm_up_thread
+
+    def build():
+        try:
+            get_main_agent()
+            get_answer_cache()
+        except Exception as e:
+            print(f"Agent warm-up failed: {e}")
+
+    if not background:
+        build()
+        return None
+    with _main_agent_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=build, name="agent-warm-up", daemon=True)
+            _warm_up_thread.start()
+    return _warm_up_thread
+
+# --- 4. ANSWER CACHE ---
+# Answers are tied to the ticket database and the vector store they came from
+CACHE_SOURCES = ("customer_support",)
+
+def get_data_version(source: str):
+    """Fingerprint (mtime + size) of the SQLite DB and the Chroma store."""
+    version = []
+    for path in (DB_PATH, os.path.join(CHROMA_PERSIST_DIR, 'chroma.sqlite3')):
+        try:
+            stat = os.stat(path)
+            version.append([stat.st_mtime_ns, stat.st_size])
+        except OSError:
+            version.append(None)
+    return version
+
+_answer_cache = None
+_answer_cache_lock = threading.Lock()
+
+def get_answer_cache():
+    global _answer_cache
+    if _answer_cache is None:
+        with _answer_cache_lock:
+            if _answer_cache is None:
+                from app.answer_cache import AnswerCache
+                from app.embeddings import get_embeddings
+                _answer_cache = AnswerCache(
+                    ANSWER_CACHE_PATH,
+                    version_fn=get_data_version,
+                    embed_fn=lambda text: get_embeddings().embed_query(text),
+                    threshold=ANSWER_CACHE_SIMILARITY,
+                )
+    return _answer_cache
 
-def get_answer(query: str):
+# --- 5. MAIN FUNCTION TO PROCESS QUERIES ---
+
+def get_answer(query: str, use_cache: bool = ANSWER_CACHE_ENABLED):
     """
     Takes a user query, processes it with the main agent, and returns the final answer.
+    Repeated (or near-identical) questions are served from the answer cache.
     """
     if not query:
         return "Please provide a question."
     print(f"\nProcessing query: '{query}'")
+
+    if use_cache:
+        cached = get_answer_cache().get(query, CACHE_SOURCES)
+        if cached is not None:
+            print("Answer served from cache.")
+            return cached
+
     try:
-        response = main_agent.invoke({"input": query})
-        return response.get("output", "Sorry, I couldn't find an answer.")
+        response = get_main_agent().invoke({"input": query})
     except Exception as e:
         print(f"An error occurred: {e}")
         return "An error occurred while processing your request. Please try again."
 
-# --- 5. EXAMPLE USAGE ---
+    if "output" not in response:
+        return "Sorry, I couldn't find an answer."
+    answer = response["output"]
+    if use_cache:
+        get_answer_cache().put(query, CACHE_SOURCES, answer)
+    return answer
+
+def stream_answer(query: str, use_cache: bool = ANSWER_CACHE_ENABLED):
+    """
+    Streaming version of get_answer(). Yields events as the agent works:
+      {"type": "tool_start", "name": ..., "input": ...}
+      {"type": "tool_end", "name": ..., "output": ...}
+      {"type": "token", "text": ...}   (pieces of the final answer)
+    Joining the "token" texts gives the answer (normally the same text
+    get_answer() returns).
+    """
+    from app.streaming import stream_events
+
+    if not query:
+        yield {"type": "token", "text": "Please provide a question."}
+        return
+    print(f"\nStreaming query: '{query}'")
+
+    if use_cache:
+        cached = get_answer_cache().get(query, CACHE_SOURCES)
+        if cached is not None:
+            print("Answer served from cache.")
+            yield {"type": "token", "text": cached}
+            return
+
+    agent = get_main_agent()
+    streamed = False
+    response = None
+    try:
+        for event in stream_events(lambda handler: agent.invoke({"input": query}, config={"callbacks": [handler]})):
+            if event["type"] == "result":
+                response = event["value"]
+                continue
+            streamed = streamed or event["type"] == "token"
+            yield event
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        yield {"type": "token", "text": "An error occurred while processing your request. Please try again."}
+        return
+
+    if not response or "output" not in response:
+        yield {"type": "token", "text": "Sorry, I couldn't find an answer."}
+        return
+    answer = response["output"]
+    if not streamed:
+        # Model didn't stream (e.g. a non-streaming LLM); send the answer whole
+        yield {"type": "token", "text": answer}
+    if use_cache:
+        get_answer_cache().put(query, CACHE_SOURCES, answer)
+
+# --- 6. EXAMPLE USAGE ---
 if __name__ == '__main__':
     print("Agent is ready. Running test queries...")
 
@@ -0,0 +1,227 @@
+# app/answer_cache.py
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+# Ticket statuses/categories and direction words; numbers (and error
+# codes like 0x00ab12) are always compared too
+_CONTRAST_WORDS = {
+    "open", "pending", "resolved", "closed", "wi", "fi", "wifi", "login", "billing", "hardware", "software",
+    "top", "most", "least", "highest", "lowest", "first", "last", "before", "after", "above", "below",
+    "not", "no", "without", "except",
+}
+
+
+def normalize_query(query: str) -> str:
+    """Lowercases, drops punctuation and collapses whitespace."""
+    query = re.sub(r"[^\w\s%₹.]", " ", query.lower())
+    query = re.sub(r"(?<!\d)\.|\.(?!\d)", " ", query)
+    return " ".join(query.split())
+
+
+def question_slots(question: str) -> tuple:
+    """
+    Numbers and contrast words of a normalized question. They change the
+    answer while barely moving the embedding ("top 5" vs "top 10",
+    "open" vs "resolved" tickets), so a semantic hit must share all of them.
+    """
+    return tuple(sorted({w for w in question.split() if any(c.isdigit() for c in w) or w in _CONTRAST_WORDS}))
+
+
+class AnswerCache:
+    """
+    Two-tier cache of final answers, persisted in a small SQLite file.
+
+    - exact tier: normalized question + set of sources
+    - semantic tier: nearest cached question (cosine similarity of the
+      question embeddings) for the same sources, above `threshold`, that
+      also has the same numbers and contrast words (question_slots)
+
+    Entries expire after `ttl` seconds, the least recently used ones are
+    evicted beyond `max_entries`, and an entry is dropped as soon as any of
+    its source databases changes version (`version_fn(source)`).
+    """
+
+    def __init__(self, path: str, version_fn, embed_fn=None, ttl: float = 24 * 3600,
+                 max_entries: int = 1000, threshold: float = 0.95):
+        self.version_fn = version_fn
+        self.embed_fn = embed_fn
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        # Embeddings computed by get() and reused by the put() after a miss
+        self._recent_embeddings = OrderedDict()
+        self._stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS answers (
+                key TEXT PRIMARY KEY,
+                question TEXT NOT NULL,
+                sources TEXT NOT NULL,
+                versions TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                embedding BLOB,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_answers_sources ON answers (sources)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_answers_last_used ON answers (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def _key(question: str, sources_key: str) -> str:
+        return hashlib.sha256(f"{sources_key}\n{question}".encode("utf-8")).hexdigest()
+
+    def _versions(self, sources) -> str:
+        return json.dumps({source: self.version_fn(source) for source in sources}, sort_keys=True)
+
+    def _embed(self, question: str):
+        vector = np.asarray(self.embed_fn(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _is_valid(self, row_versions: str, created_at: float, versions: str, now: float) -> bool:
+        return row_versions == versions and now - created_at <= self.ttl
+
+    def get(self, query: str, sources):
+        """Returns a cached answer for `query` over `sources`, or None."""
+        question = normalize_query(query)
+        sources_key = ",".join(sorted(sources))
+        key = self._key(question, sources_key)
+        versions = self._versions(sources)
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT answer, versions, created_at FROM answers WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                answer, row_versions, created_at = row
+                if self._is_valid(row_versions, created_at, versions, now):
+                    self._touch(key, now)
+                    self._stats["exact_hits"] += 1
+                    return answer
+                self._delete([key], invalidated=True)
+
+        answer = self._semantic_get(question, key, sources_key, versions, now)
+        with self._lock:
+            self._stats["semantic_hits" if answer is not None else "misses"] += 1
+        return answer
+
+    def _semantic_get(self, question, key, sources_key, versions, now):
+        if self.embed_fn is None or self.threshold >= 1:
+            return None
+        try:
+            vector = self._embed(question)
+        except Exception as e:
+            print(f"Answer cache: embedding failed, skipping semantic lookup ({e})")
+            return None
+
+        with self._lock:
+            self._recent_embeddings[key] = vector
+            while len(self._recent_embeddings) > 256:
+                self._recent_embeddings.popitem(last=False)
+
+            rows = self._conn.execute(
+                "SELECT key, answer, versions, created_at, embedding, question FROM answers "
+                "WHERE sources = ? AND embedding IS NOT NULL",
+                (sources_key,),
+            ).fetchall()
+            stale = {r[0] for r in rows if not self._is_valid(r[2], r[3], versions, now)}
+            if stale:
+                self._delete(stale, invalidated=True)
+                rows = [r for r in rows if r[0] not in stale]
+            slots = question_slots(question)
+            rows = [r for r in rows if question_slots(r[5]) == slots]
+            if not rows:
+                return None
+
+            matrix = np.stack([np.frombuffer(r[4], dtype=np.float32) for r in rows])
+            scores = matrix @ vector
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+            self._touch(rows[best][0], now)
+            return rows[best][1]
+
+    def put(self, query: str, sources, answer: str):
+        question = normalize_query(query)
+        sources_key = ",".join(sorted(sources))
+        key = self._key(question, sources_key)
+        versions = self._versions(sources)
+        now = time.time()
+
+        with self._lock:
+            vector = self._recent_embeddings.pop(key, None)
+        if vector is None and self.embed_fn is not None and self.threshold < 1:
+            try:
+                vector = self._embed(question)
+            except Exception:
+                vector = None
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, question, sources_key, versions, answer,
+                 vector.tobytes() if vector is not None else None, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _touch(self, key: str, now: float):
+        self._conn.execute("UPDATE answers SET last_used = ? WHERE key = ?", (now, key))
+        self._conn.commit()
+
+    def _delete(self, keys, invalidated: bool = False):
+        self._conn.executemany("DELETE FROM answers WHERE key = ?", [(k,) for k in keys])
+        self._conn.commit()
+        if invalidated:
+            self._stats["invalidations"] += len(keys)
+
+    def _evict(self, now: float):
+        expired = self._conn.execute("DELETE FROM answers WHERE created_at < ?", (now - self.ttl,)).rowcount
+        overflow = self._conn.execute(
+            "DELETE FROM answers WHERE key IN ("
+            " SELECT key FROM answers ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+        self._stats["evictions"] += expired + overflow
+
+    def invalidate(self, source: str = None):
+        """Drops every entry (or every entry that touches `source`)."""
+        with self._lock:
+            if source is None:
+                count = self._conn.execute("DELETE FROM answers").rowcount
+            else:
+                keys = [
+                    k for k, s in self._conn.execute("SELECT key, sources FROM answers")
+                    if source in s.split(",")
+                ]
+                self._conn.executemany("DELETE FROM answers WHERE key = ?", [(k,) for k in keys])
+                count = len(keys)
+            self._conn.commit()
+            self._stats["invalidations"] += count
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+            lookups = self._stats["exact_hits"] + self._stats["semantic_hits"] + self._stats["misses"]
+            hits = lookups - self._stats["misses"]
+            return dict(self._stats, entries=size, hit_rate=hits / lookups if lookups else 0.0)
+
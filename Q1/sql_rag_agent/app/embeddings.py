@@ -0,0 +1,236 @@
+# app/embeddings.py
+
+import hashlib
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(CURRENT_DIR, '..'))
+EMBEDDING_CACHE_PATH = os.path.join(ROOT_DIR, 'cache', 'embeddings.db')
+
+# "openai" (default) or "local" for the deterministic offline embedder
+EMBEDDINGS_BACKEND = os.getenv("EMBEDDINGS_BACKEND", "openai")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_TOKENS", "8000"))
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+# Question embeddings are kept in memory only, for this many questions
+EMBEDDING_QUERY_CACHE_SIZE = int(os.getenv("EMBEDDING_QUERY_CACHE_SIZE", "1024"))
+
+
+# === Local deterministic embedder ===
+class HashingEmbeddings(Embeddings):
+    """
+    Offline stand-in for OpenAIEmbeddings: hashes word unigrams/bigrams into
+    a fixed-size signed vector. Same text -> same vector, similar wording ->
+    similar vectors, no network. Used in tests and benchmarks.
+    """
+
+    def __init__(self, size: int = 256):
+        self.size = size
+        self.model_name = f"local-hashing-{size}"
+
+    def _embed(self, text: str):
+        words = re.findall(r"\w+", text.lower())
+        vector = np.zeros(self.size, dtype=np.float32)
+        for token in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            digest = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[digest % self.size] += 1.0 if (digest >> 63) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+# === Token counting for batching ===
+_encoding = None
+
+def count_tokens(text: str) -> int:
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def batch_by_tokens(texts, max_tokens: int):
+    """Groups texts into batches whose total token count stays under `max_tokens`."""
+    batch, batch_tokens = [], 0
+    for text in texts:
+        tokens = count_tokens(text)
+        if batch and batch_tokens + tokens > max_tokens:
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append(text)
+        batch_tokens += tokens
+    if batch:
+        yield batch
+
+
+# === Cached, batched, concurrent wrapper ===
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps any LangChain Embeddings with:
+      - an on-disk SQLite cache keyed by model name + sha256(text), so a text
+        is embedded at most once across runs and restarts
+      - token-budget batching of the cache misses
+      - concurrent batch requests (bounded) with exponential backoff retries
+    Vectors are written to the cache as soon as each batch returns.
+    Questions (embed_query) are read from the on-disk cache but never
+    written to it, so user traffic can't grow the file; repeats are served
+    from a bounded in-memory LRU instead.
+    """
+
+    def __init__(self, inner: Embeddings, model_name: str, cache_path: str = EMBEDDING_CACHE_PATH,
+                 max_batch_tokens: int = EMBEDDING_BATCH_TOKENS, max_concurrency: int = EMBEDDING_CONCURRENCY,
+                 max_retries: int = 5, backoff_seconds: float = 1.0,
+                 query_cache_size: int = EMBEDDING_QUERY_CACHE_SIZE):
+        self.inner = inner
+        self.model_name = model_name
+        self.max_batch_tokens = max_batch_tokens
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.stats = {"cache_hits": 0, "embedded": 0, "batches": 0, "retries": 0}
+        self._lock = threading.Lock()
+        self.query_cache_size = query_cache_size
+        self._queries = OrderedDict()
+
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL,"
+            " PRIMARY KEY (model, text_hash))"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _lookup(self, hashes):
+        found = {}
+        hashes = list(hashes)
+        with self._lock:
+            for start in range(0, len(hashes), 500):
+                part = hashes[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? "
+                    f"AND text_hash IN ({', '.join('?' for _ in part)})",
+                    [self.model_name, *part],
+                ).fetchall()
+                found.update({h: np.frombuffer(v, dtype=np.float32).tolist() for h, v in rows})
+        return found
+
+    def _store(self, pairs):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)",
+                [(self.model_name, h, np.asarray(v, dtype=np.float32).tobytes()) for h, v in pairs],
+            )
+            self._conn.commit()
+
+    def _embed_batch(self, texts, store: bool = True):
+        for attempt in range(self.max_retries + 1):
+            try:
+                vectors = self.inner.embed_documents(texts)
+                break
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff_seconds * (2 ** attempt) * (1 + random.random())
+                print(f"Embedding batch failed ({e}); retrying in {delay:.1f}s...")
+                with self._lock:
+                    self.stats["retries"] += 1
+                time.sleep(delay)
+        if store:
+            self._store(zip((self._hash(t) for t in texts), vectors))
+        with self._lock:
+            self.stats["batches"] += 1
+            self.stats["embedded"] += len(texts)
+        return vectors
+
+    def embed_documents(self, texts):
+        hashes = [self._hash(text) for text in texts]
+        vectors = self._lookup(set(hashes))
+        with self._lock:
+            self.stats["cache_hits"] += sum(1 for h in hashes if h in vectors)
+
+        # Each distinct missing text is embedded once
+        missing = list({h: t for h, t in zip(hashes, texts) if h not in vectors}.values())
+        if missing:
+            batches = list(batch_by_tokens(missing, self.max_batch_tokens))
+            if len(batches) == 1 or self.max_concurrency <= 1:
+                results = [self._embed_batch(batch) for batch in batches]
+            else:
+                with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+                    results = list(pool.map(self._embed_batch, batches))
+            for batch, batch_vectors in zip(batches, results):
+                vectors.update({self._hash(t): v for t, v in zip(batch, batch_vectors)})
+
+        return [vectors[h] for h in hashes]
+
+    def embed_query(self, text):
+        text_hash = self._hash(text)
+        with self._lock:
+            vector = self._queries.get(text_hash)
+            if vector is not None:
+                self._queries.move_to_end(text_hash)
+        if vector is None:
+            vector = self._lookup([text_hash]).get(text_hash)
+        if vector is not None:
+            with self._lock:
+                self.stats["cache_hits"] += 1
+        else:
+            vector = self._embed_batch([text], store=False)[0]
+        with self._lock:
+            self._queries[text_hash] = vector
+            self._queries.move_to_end(text_hash)
+            while len(self._queries) > self.query_cache_size:
+                self._queries.popitem(last=False)
+        return vector
+
+
+_embeddings = None
+_embeddings_backend = None
+_embeddings_lock = threading.Lock()
+
+def get_embeddings(backend: str = None) -> CachedEmbeddings:
+    """
+    The embedder used for both building and querying the vector store.
+    `backend` (or EMBEDDINGS_BACKEND) picks "openai" or "local".
+    """
+    global _embeddings, _embeddings_backend
+    backend = backend or EMBEDDINGS_BACKEND
+    with _embeddings_lock:
+        if _embeddings is None or _embeddings_backend != backend:
+            if backend == "local":
+                inner = HashingEmbeddings()
+                model_name = inner.model_name
+            else:
+                from langchain_openai import OpenAIEmbeddings
+                # Retries/backoff are handled by the wrapper
+                inner = OpenAIEmbeddings(model=EMBEDDING_MODEL, max_retries=0)
+                model_name = EMBEDDING_MODEL
+            _embeddings = CachedEmbeddings(inner, model_name)
+            _embeddings_backend = backend
+    return _embeddings
@@ -0,0 +1,144 @@
+import os
+import re
+import sqlite3
+import unicodedata
+from typing import Optional
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+# Built by scripts/build_fts.py
+FTS_TABLE = "_fts_tech_support"
+TABLE_NAME = "tech_support"
+# Vector-store metadata filters -> ticket table columns
+WHERE_COLUMNS = {"ticket_id": "Conversation_ID", "category": "Issue_Category", "status": "Issue_Status"}
+# Rank constant of reciprocal rank fusion; larger flattens the rank curve
+RRF_K = 60
+# Terms in more than this share of tickets are too common to search on
+MAX_TERM_SHARE = 0.2
+
+
+def has_fts_index(db_path: str) -> bool:
+    if not os.path.exists(db_path):
+        return False
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (FTS_TABLE,)).fetchone() is not None
+    finally:
+        conn.close()
+
+
+def search_terms(text: str) -> list:
+    """Distinct lower-case, accent-free words of `text`, as the FTS5 tokenizer sees them."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return list(dict.fromkeys(w for w in re.findall(r"\w+", text) if len(w) > 1 or w.isdigit()))
+
+
+def selective_terms(conn, terms: list) -> list:
+    """
+    The terms worth matching, rarest first: those that occur at all and in
+    at most MAX_TERM_SHARE of tickets (only the rarest if every term is that
+    common). Words like "what" or "error" would otherwise turn an any-word
+    search into ranking most of the table.
+    """
+    try:
+        # One lookup per term: fts5vocab only uses its term index for "="
+        doc_counts = {
+            t: row[0] for t in terms
+            for row in conn.execute(f"SELECT doc FROM {FTS_TABLE}_vocab WHERE term = ?", (t,))
+        }
+    except sqlite3.OperationalError:
+        # Index built before the vocab table existed
+        return terms
+    total = conn.execute(f"SELECT MAX(rowid) FROM {TABLE_NAME}").fetchone()[0] or 0
+    present = sorted((t for t in terms if doc_counts.get(t)), key=doc_counts.get)
+    return [t for t in present if doc_counts[t] <= MAX_TERM_SHARE * total] or present[:1]
+
+
+def match_expression(terms, any_term: bool = False) -> str:
+    """
+    FTS5 MATCH expression: every term quoted (so punctuation and FTS
+    operators are taken literally), all of them required, or any of them
+    with `any_term`.
+    """
+    return (" OR " if any_term else " ").join(f'"{t}"' for t in terms)
+
+
+def fts_search(db_path: str, text: str, k: int, where: dict = None):
+    """
+    Up to `k` tickets matching `text`, best BM25 first, as (ticket_id, text,
+    category, status) rows: tickets with every selective term, or if there
+    are none, tickets with any of them.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return []
+    filters, params = [], []
+    for key, value in (where or {}).items():
+        filters.append(f"t.{WHERE_COLUMNS[key]} = ?")
+        params.append(value)
+    extra = "".join(f" AND {f}" for f in filters)
+
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        selective = selective_terms(conn, terms)
+        rows = []
+        for any_term in (False, True):
+            if not selective or rows:
+                break
+            rows = conn.execute(
+                f"SELECT t.Conversation_ID, t.Tech_Response, t.Issue_Category, t.Issue_Status "
+                f"FROM {FTS_TABLE} JOIN {TABLE_NAME} t ON t.rowid = {FTS_TABLE}.rowid "
+                f"WHERE {FTS_TABLE} MATCH ?{extra} ORDER BY {FTS_TABLE}.rank LIMIT ?",
+                [match_expression(selective, any_term), *params, k],
+            ).fetchall()
+        return rows
+    finally:
+        conn.close()
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Ticket search that fuses the vector store with the FTS5 keyword index.
+
+    Both sides return `candidates` tickets; each ticket scores
+    sum(1 / (RRF_K + rank)) over the lists it appears in (reciprocal rank
+    fusion, so BM25 and cosine scores need no common scale) and the top
+    `k` are returned. Exact terms such as error codes or product names are
+    found by the keyword side even when their embedding is a poor match.
+    """
+
+    vector_retriever: BaseRetriever
+    db_path: str
+    k: int = 3
+    candidates: int = 10
+    where: Optional[dict] = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun):
+        vector_docs = self.vector_retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+        keyword_rows = fts_search(self.db_path, query, self.candidates, self.where)
+
+        scores, documents = {}, {}
+        for rank, doc in enumerate(vector_docs):
+            ticket = doc.metadata.get("ticket_id")
+            # Several chunks of one ticket: its best-ranked chunk counts
+            if ticket in documents:
+                continue
+            documents[ticket] = doc
+            scores[ticket] = 1.0 / (RRF_K + rank + 1)
+        for rank, (ticket, text, category, status) in enumerate(keyword_rows):
+            scores[ticket] = scores.get(ticket, 0.0) + 1.0 / (RRF_K + rank + 1)
+            if ticket not in documents:
+                documents[ticket] = Document(
+                    page_content=text or "",
+                    metadata={"ticket_id": ticket, "category": category, "status": status},
+                )
+
+        best = sorted(scores, key=scores.get, reverse=True)[:self.k]
+        return [
+            Document(page_content=documents[t].page_content,
+                     metadata={**documents[t].metadata, "score": round(scores[t], 5)})
+            for t in best
+        ]
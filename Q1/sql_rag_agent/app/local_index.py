@@ -0,0 +1,201 @@
+import json
+import os
+import threading
+from typing import Any, Optional
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+# Metadata columns kept as compact integer codes for pre-filtering
+FILTER_COLUMNS = ("category", "status")
+# From this many vectors (and with hnswlib installed) queries go through
+# an HNSW graph instead of a full dot-product scan
+ANN_THRESHOLD = int(os.getenv("LOCAL_INDEX_ANN_THRESHOLD", "50000"))
+
+
+def export_from_chroma(chroma_persist_dir: str, index_dir: str):
+    """
+    Dumps the persisted Chroma collection into the local index layout:
+      vectors.npy   float32 (n, dim), L2-normalised, memory-mappable
+      <col>.npy     int32 codes for each filter column, <col> vocab in meta.json
+      documents.jsonl  page content + metadata per row
+    """
+    import chromadb
+
+    print(f"Exporting vectors from {chroma_persist_dir} to {index_dir}...")
+    client = chromadb.PersistentClient(path=chroma_persist_dir)
+    collection = client.get_collection("langchain")
+    data = collection.get(include=["embeddings", "documents", "metadatas"])
+    build_index(index_dir, data["embeddings"], data["documents"], data["metadatas"], ids=data["ids"])
+
+
+def build_index(index_dir: str, embeddings, documents, metadatas, ids=None):
+    os.makedirs(index_dir, exist_ok=True)
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    if vectors.ndim != 2:
+        vectors = vectors.reshape(len(documents), -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    np.save(os.path.join(index_dir, "vectors.npy"), vectors / norms)
+
+    vocab = {}
+    for column in FILTER_COLUMNS:
+        values = [str((meta or {}).get(column, "")) for meta in metadatas]
+        vocab[column] = sorted(set(values))
+        lookup = {value: code for code, value in enumerate(vocab[column])}
+        np.save(os.path.join(index_dir, f"{column}.npy"), np.array([lookup[v] for v in values], dtype=np.int32))
+
+    with open(os.path.join(index_dir, "documents.jsonl"), "w", encoding="utf-8") as f:
+        for i, (text, meta) in enumerate(zip(documents, metadatas)):
+            row = {"id": ids[i] if ids else str(i), "text": text, "metadata": meta or {}}
+            f.write(json.dumps(row) + "\n")
+
+    with open(os.path.join(index_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"count": len(documents), "dim": int(vectors.shape[1]), "vocab": vocab}, f)
+
+    # A stale graph from an older export must not be reused
+    hnsw_path = os.path.join(index_dir, "hnsw.bin")
+    if os.path.exists(hnsw_path):
+        os.remove(hnsw_path)
+
+
+class LocalVectorIndex:
+    """
+    In-process top-k search over an exported index.
+
+    Small corpora (or filtered subsets) are scored exactly with one batched
+    dot product against the memory-mapped matrix; large ones use an HNSW
+    graph (hnswlib) when available.
+    """
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.vocab = meta["vocab"]
+        self.vectors = np.load(os.path.join(index_dir, "vectors.npy"), mmap_mode="r")
+        self.codes = {col: np.load(os.path.join(index_dir, f"{col}.npy")) for col in FILTER_COLUMNS}
+        with open(os.path.join(index_dir, "documents.jsonl"), encoding="utf-8") as f:
+            self.rows = [json.loads(line) for line in f]
+        self._hnsw = None
+        self._hnsw_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _mask(self, where: dict):
+        """Boolean row mask for equality filters like {"status": "Pending"}; None = no filter."""
+        if not where:
+            return None
+        mask = np.ones(len(self), dtype=bool)
+        for column, value in where.items():
+            if column not in self.codes:
+                raise ValueError(f"Can only filter on {FILTER_COLUMNS}, got '{column}'")
+            try:
+                code = self.vocab[column].index(str(value))
+            except ValueError:
+                return np.zeros(len(self), dtype=bool)
+            mask &= self.codes[column] == code
+        return mask
+
+    def _graph(self):
+        if self._hnsw is None:
+            with self._hnsw_lock:
+                if self._hnsw is None:
+                    import hnswlib
+
+                    graph = hnswlib.Index(space="ip", dim=self.vectors.shape[1])
+                    path = os.path.join(self.index_dir, "hnsw.bin")
+                    if os.path.exists(path):
+                        graph.load_index(path, max_elements=len(self))
+                    else:
+                        print(f"Building HNSW graph over {len(self)} vectors...")
+                        graph.init_index(max_elements=len(self), ef_construction=200, M=16)
+                        graph.add_items(np.asarray(self.vectors), np.arange(len(self)))
+                        graph.save_index(path)
+                    graph.set_ef(64)
+                    self._hnsw = graph
+        return self._hnsw
+
+    def _use_graph(self, candidates: int) -> bool:
+        # Filtered graph search degrades when only a small slice qualifies;
+        # those are cheaper as an exact scan over the gathered rows
+        if len(self) < ANN_THRESHOLD or candidates < len(self) // 8:
+            return False
+        try:
+            import hnswlib  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def search(self, queries, k: int = 3, where: dict = None):
+        """
+        `queries` is one vector or a (q, dim) matrix. Returns, per query, a
+        list of (row index, score) pairs, best first.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        mask = self._mask(where)
+        candidates = len(self) if mask is None else int(mask.sum())
+        if candidates == 0:
+            return [[] for _ in queries]
+        k = min(k, candidates)
+
+        if self._use_graph(candidates):
+            allowed = None if mask is None else (lambda i: bool(mask[i]))
+            labels, distances = self._graph().knn_query(queries, k=k, filter=allowed)
+            return [
+                [(int(i), float(1 - d)) for i, d in zip(row_labels, row_distances)]
+                for row_labels, row_distances in zip(labels, distances)
+            ]
+
+        if mask is not None and candidates < len(self) // 8:
+            # Very selective filter: gather just the matching rows
+            rows = np.flatnonzero(mask)
+            scores = queries @ self.vectors[rows].T
+        else:
+            # Scoring everything beats copying a large subset out of the mmap
+            rows = np.arange(len(self))
+            scores = queries @ self.vectors.T
+            if mask is not None:
+                scores[:, ~mask] = -np.inf
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for q, candidates_idx in enumerate(top):
+            ordered = candidates_idx[np.argsort(-scores[q, candidates_idx])]
+            results.append([(int(rows[i]), float(scores[q, i])) for i in ordered])
+        return results
+
+    def document(self, row: int, score: float = None) -> Document:
+        data = self.rows[row]
+        metadata = dict(data["metadata"])
+        if score is not None:
+            metadata["score"] = score
+        return Document(page_content=data["text"], metadata=metadata)
+
+
+class LocalIndexRetriever(BaseRetriever):
+    """LangChain retriever over a LocalVectorIndex (drop-in for Chroma's as_retriever())."""
+
+    index: LocalVectorIndex
+    embeddings: Any
+    k: int = 3
+    where: Optional[dict] = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun):
+        vector = self.embeddings.embed_query(query)
+        hits = self.index.search(vector, k=self.k, where=self.where or None)[0]
+        return [self.index.document(row, score) for row, score in hits]
+
+
+def load_local_index(chroma_persist_dir: str, index_dir: str) -> LocalVectorIndex:
+    """Opens the local index, re-exporting it first if Chroma changed since the last export."""
+    chroma_file = os.path.join(chroma_persist_dir, "chroma.sqlite3")
+    meta_file = os.path.join(index_dir, "meta.json")
+    if not os.path.exists(meta_file) or (
+        os.path.exists(chroma_file) and os.path.getmtime(chroma_file) > os.path.getmtime(meta_file)
+    ):
+        export_from_chroma(chroma_persist_dir, index_dir)
+    return LocalVectorIndex(index_dir)
@@ -0,0 +1,260 @@
+# app/query_guard.py
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+# Results up to this many rows are returned whole; bigger ones are summarised
+SQL_GUARD_MAX_ROWS = int(os.getenv("SQL_GUARD_MAX_ROWS", "50"))
+SQL_GUARD_SAMPLE_ROWS = int(os.getenv("SQL_GUARD_SAMPLE_ROWS", "10"))
+# Sorting/grouping/aggregating over a full scan of a bigger table is rejected,
+# and a large result's count, aggregates and sample cover at most this many rows
+SQL_GUARD_MAX_SCAN_ROWS = int(os.getenv("SQL_GUARD_MAX_SCAN_ROWS", "100000"))
+
+# Data-changing statement forms a WITH clause can lead into; matched as
+# forms, not words, so replace() or a column named "release" still reads
+_WRITE_STATEMENT = re.compile(
+    r"\b(?:insert(?:\s+or\s+\w+)?|replace)\s+into\b|\bupdate\s+(?:or\s+\w+\s+)?[\w.]+\s+set\b|\bdelete\s+from\b"
+)
+_READ_PRAGMAS = re.compile(r"^pragma\s+(table_info|table_xinfo|index_list|index_info|foreign_key_list)\s*\(")
+_AGGREGATE = re.compile(r"\b(count|sum|avg|min|max|total|group_concat)\s*\(|\bgroup\s+by\b|\bdistinct\b")
+_SCAN = re.compile(r"^SCAN (?:TABLE )?([\w\"\[\]`]+)")
+# "<table> [AS] <alias>" after FROM, JOIN or a comma; the plan names the alias
+_ALIAS = re.compile(r"(?:\bfrom|\bjoin|,)\s+([\w\"\[\]`.]+)\s+(?:as\s+)?([\w\"\[\]`]+)", re.I)
+_NOT_ALIAS = {
+    "where", "join", "inner", "left", "right", "full", "cross", "natural", "outer", "on", "using", "group",
+    "order", "limit", "union", "except", "intersect", "having", "window", "indexed", "not",
+}
+_CURSOR = re.compile(r"^\s*['\"]?([0-9a-f]{12}):(\d+)['\"]?\s*$")
+_NEXT_PAGE = re.compile(r'call sql_db_next_page with "([0-9a-f]{12}):0"')
+
+
+class QueryRejected(ValueError):
+    """Raised for SQL the guard won't run; the agent sees it as an "Error: ..." observation."""
+
+
+def _strip_literals(sql: str) -> str:
+    """
+    Drops comments and string literals, and replaces quoted identifiers
+    ("x", `x`, [x]) with a plain name, so keywords inside them don't count.
+    """
+    sql = re.sub(r"--[^\n]*|/\*.*?\*/", " ", sql, flags=re.S)
+    sql = re.sub(r"'(?:[^']|'')*'", "''", sql)
+    return re.sub(r'"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\]', "_ident", sql)
+
+
+def _aliases(sql: str, tables) -> dict:
+    """{alias: table} for the tables in `tables` that `sql` reads under another name."""
+    sql = re.sub(r"--[^\n]*|/\*.*?\*/", " ", sql, flags=re.S)
+    sql = re.sub(r"'(?:[^']|'')*'", "''", sql)
+    aliases = {}
+    for name, alias in _ALIAS.findall(sql):
+        name, alias = name.split(".")[-1].strip('"[]`'), alias.strip('"[]`')
+        if name in tables and alias.lower() not in _NOT_ALIAS:
+            aliases[alias] = name
+    return aliases
+
+
+def check_read_only(sql: str) -> str:
+    """
+    Returns `sql` without its trailing semicolon if it is a single read-only
+    statement (SELECT / WITH / EXPLAIN / schema PRAGMAs); raises otherwise.
+    """
+    sql = sql.strip().rstrip(";").strip()
+    bare = _strip_literals(sql).lower().strip()
+    if ";" in bare:
+        raise QueryRejected("only one SQL statement can be run at a time")
+    if _READ_PRAGMAS.match(bare):
+        return sql
+    first = bare.split(None, 1)[0] if bare else ""
+    if first not in ("select", "with", "explain") or _WRITE_STATEMENT.search(bare):
+        raise QueryRejected("only read-only SELECT queries are allowed")
+    return sql
+
+
+def _is_select(sql: str) -> bool:
+    return _strip_literals(sql).lower().lstrip().startswith(("select", "with"))
+
+
+class QueryGuard:
+    """
+    Safe execution of agent-written SQL against one database.
+
+    - only single read-only statements run (check_read_only)
+    - EXPLAIN QUERY PLAN is checked first: a query that must read every row
+      of a table bigger than `max_scan_rows` (full scan plus sort, grouping
+      or aggregation) is rejected with a hint to filter on an indexed column
+    - every SELECT is wrapped in a LIMIT, so at most `max_rows` rows are
+      materialised; bigger results come back as a row count, per-column
+      aggregates and an evenly spaced sample, plus a cursor for paging
+      through the rest with next_page()
+
+    `execute(sql)` runs a statement and returns rows as dicts,
+    `table_stats()` returns {table: (row count, [indexed columns])} and
+    `format_rows(rows, include_columns)` renders rows the way
+    SQLDatabase.run does.
+    """
+
+    def __init__(self, execute, table_stats, format_rows, max_rows: int = SQL_GUARD_MAX_ROWS,
+                 sample_rows: int = SQL_GUARD_SAMPLE_ROWS, max_scan_rows: int = SQL_GUARD_MAX_SCAN_ROWS,
+                 max_cursors: int = 256):
+        self.execute = execute
+        self.table_stats = table_stats
+        self.format_rows = format_rows
+        self.max_rows = max_rows
+        self.sample_rows = sample_rows
+        self.max_scan_rows = max_scan_rows
+        self.max_cursors = max_cursors
+        self._cursors = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _scanned_tables(self, sql: str):
+        """(big tables read in full, whether the plan needs every row before the first one)."""
+        plan = [str(row.get("detail", "")) for row in self.execute(f"EXPLAIN QUERY PLAN {sql}")]
+        stats = self.table_stats()
+        aliases = _aliases(sql, stats)
+        big = []
+        for detail in plan:
+            match = _SCAN.match(detail)
+            if match:
+                table = match.group(1).strip('"[]`')
+                table = aliases.get(table, table)
+                if table in stats and stats[table][0] > self.max_scan_rows:
+                    big.append(table)
+        blocking = any("USE TEMP B-TREE" in detail for detail in plan)
+        return big, blocking
+
+    def _check_plan(self, sql: str):
+        big, blocking = self._scanned_tables(sql)
+        # A plain scan stops at the injected LIMIT; sorting, grouping or
+        # aggregating has to read the whole table first
+        if big and (blocking or _AGGREGATE.search(_strip_literals(sql).lower())):
+            stats = self.table_stats()
+            table = big[0]
+            rows, indexed = stats[table]
+            hint = f" on an indexed column ({', '.join(indexed)})" if indexed else ""
+            raise QueryRejected(
+                f"this query would read all {rows:,} rows of {table}; add a WHERE filter{hint} "
+                f"or narrow the question"
+            )
+        return big
+
+    def _remember(self, key: str, sql: str):
+        with self._lock:
+            self._cursors[key] = sql
+            self._cursors.move_to_end(key)
+            while len(self._cursors) > self.max_cursors:
+                self._cursors.popitem(last=False)
+
+    def _cursor(self, sql: str, offset: int) -> str:
+        key = hashlib.sha1(sql.encode("utf-8")).hexdigest()[:12]
+        self._remember(key, sql)
+        return f"{key}:{offset}"
+
+    def revive(self, sql: str, text):
+        """
+        Returns `text`, an earlier run(sql) result, after re-registering
+        the cursor it offers: a result served from the query cache can
+        outlive its cursor in the LRU, and paging would never work again.
+        """
+        match = _NEXT_PAGE.search(text) if isinstance(text, str) else None
+        if match:
+            self._remember(match.group(1), sql)
+        return text
+
+    def _page(self, sql: str, offset: int):
+        return self.execute(f"SELECT * FROM ({sql}) LIMIT {self.max_rows + 1} OFFSET {offset}")
+
+    def run(self, sql: str, include_columns: bool = False) -> str:
+        sql = check_read_only(sql)
+        if not _is_select(sql):
+            return self.format_rows(self.execute(sql), include_columns)
+
+        big = self._check_plan(sql)
+        rows = self._page(sql, 0)
+        if len(rows) <= self.max_rows:
+            return self.format_rows(rows, include_columns)
+        return self._summarize(sql, rows[:self.max_rows], include_columns, can_count=not big)
+
+    def _summarize(self, sql: str, first_page, include_columns: bool, can_count: bool) -> str:
+        columns = list(first_page[0])
+        numeric = [
+            c for c in columns
+            if any(isinstance(r[c], (int, float)) for r in first_page)
+            and all(r[c] is None or isinstance(r[c], (int, float)) for r in first_page)
+        ]
+        lines = []
+        sample = first_page[:self.sample_rows]
+        if can_count:
+            aggregates = ", ".join(
+                f'MIN("{c}") AS "min {c}", MAX("{c}") AS "max {c}", AVG("{c}") AS "avg {c}"' for c in numeric
+            )
+            # The count and sample passes each read at most max_scan_rows
+            # rows of the result, however many it has
+            capped = f"SELECT * FROM ({sql}) LIMIT {self.max_scan_rows}"
+            stats = self.execute(f"SELECT COUNT(*) AS n{', ' + aggregates if aggregates else ''} FROM ({capped})")[0]
+            total = stats["n"]
+            if total < self.max_scan_rows:
+                lines.append(f"The query returned {total:,} rows; showing {len(sample)} evenly spaced sample rows.")
+            else:
+                lines.append(
+                    f"The query returned at least {total:,} rows; the figures and {len(sample)} evenly spaced "
+                    f"sample rows below cover the first {total:,}."
+                )
+            for c in numeric:
+                avg = stats[f"avg {c}"]
+                lines.append(
+                    f"  {c}: min={stats[f'min {c}']}, max={stats[f'max {c}']}, "
+                    f"avg={round(avg, 4) if avg is not None else None}"
+                )
+            step = max(total // self.sample_rows, 1)
+            sampled = self.execute(
+                f"SELECT * FROM (SELECT *, ROW_NUMBER() OVER () AS _row FROM ({capped})) "
+                f"WHERE (_row - 1) % {step} = 0 LIMIT {self.sample_rows}"
+            )
+            sample = [{c: r[c] for c in columns} for r in sampled]
+        else:
+            lines.append(
+                f"The query returned more than {self.max_rows} rows (too many to count cheaply); "
+                f"showing the first {len(sample)}."
+            )
+        lines.append(f"Columns: {', '.join(columns)}")
+        lines.append(f"Rows: {self.format_rows(sample, include_columns)}")
+        lines.append(
+            f'For the full rows {self.max_rows} at a time, call sql_db_next_page with "{self._cursor(sql, 0)}".'
+        )
+        return "\n".join(lines)
+
+    def next_page(self, cursor: str, include_columns: bool = False) -> str:
+        """Rows of an earlier large result, `max_rows` at a time, from a "<id>:<offset>" cursor."""
+        match = _CURSOR.match(cursor or "")
+        if not match:
+            return 'Error: expected a cursor like "0123456789ab:0" from an earlier query result'
+        with self._lock:
+            sql = self._cursors.get(match.group(1))
+        if sql is None:
+            return "Error: that cursor has expired; run the query again"
+        offset = int(match.group(2))
+        rows = self._page(sql, offset)
+        more = len(rows) > self.max_rows
+        rows = rows[:self.max_rows]
+        text = f"Rows {offset + 1}-{offset + len(rows)}: {self.format_rows(rows, include_columns)}"
+        if more:
+            text += f'\nNext page: "{self._cursor(sql, offset + self.max_rows)}"'
+        return text
+
+
+def next_page_tool(db):
+    """LangChain tool for paging through large results of a guarded SQLDatabase."""
+    from langchain.tools import Tool
+
+    return Tool(
+        name="sql_db_next_page",
+        func=db.guard.next_page,
+        description=(
+            "Input is a cursor string from an earlier sql_db_query result that was too large to show in full. "
+            "Output is the next page of rows and, if there are more, the cursor for the page after."
+        ),
+    )
@@ -0,0 +1,143 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Agent runs that may execute at once, across all sessions
+AGENT_WORKERS = int(os.getenv("AGENT_WORKERS", "4"))
+# Questions accepted but not yet answered, across all sessions / per session
+AGENT_MAX_PENDING = int(os.getenv("AGENT_MAX_PENDING", "32"))
+AGENT_MAX_PENDING_PER_SESSION = int(os.getenv("AGENT_MAX_PENDING_PER_SESSION", "2"))
+
+_DONE = object()
+
+
+class ServiceBusy(RuntimeError):
+    """Raised by AgentService.submit() when a question can't be queued right now."""
+
+
+class Job:
+    """One queued question. Its events can be read while it runs."""
+
+    def __init__(self, session_id: str, query: str):
+        self.session_id = session_id
+        self.query = query
+        self.submitted_at = time.perf_counter()
+        self.started_at = None
+        self.finished_at = None
+        self._events = queue.Queue()
+
+    def run(self, stream_fn):
+        self.started_at = time.perf_counter()
+        try:
+            for event in stream_fn(self.query):
+                self._events.put(event)
+        except Exception as e:
+            print(f"An error occurred: {e}")
+            self._events.put({"type": "token", "text": "An error occurred while processing your request. Please try again."})
+        finally:
+            self.finished_at = time.perf_counter()
+            self._events.put(_DONE)
+
+    def events(self):
+        """Yields the job's stream events until it finishes (blocks while it waits in the queue)."""
+        while True:
+            event = self._events.get()
+            if event is _DONE:
+                return
+            yield event
+
+    def result(self) -> str:
+        return "".join(e["text"] for e in self.events() if e["type"] == "token")
+
+
+class AgentService:
+    """
+    Runs questions from many chat sessions on a bounded worker pool.
+
+    Each session's questions are answered one at a time and in order, while
+    different sessions run side by side on up to `max_workers` threads.
+    When a session already has `max_pending_per_session` questions waiting
+    (or the service has `max_pending` in total), submit() raises ServiceBusy
+    instead of letting the backlog grow.
+    """
+
+    def __init__(self, stream_fn, max_workers: int = AGENT_WORKERS, max_pending: int = AGENT_MAX_PENDING,
+                 max_pending_per_session: int = AGENT_MAX_PENDING_PER_SESSION):
+        self.stream_fn = stream_fn
+        self.max_pending = max_pending
+        self.max_pending_per_session = max_pending_per_session
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agent-worker")
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._pending = 0
+        self._stats = {"submitted": 0, "rejected": 0, "completed": 0, "queue_wait_s": 0.0, "run_s": 0.0}
+
+    def submit(self, session_id: str, query: str) -> Job:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if (session and len(session) >= self.max_pending_per_session) or self._pending >= self.max_pending:
+                self._stats["rejected"] += 1
+                raise ServiceBusy("Too many questions in progress; please wait for the current answer.")
+            if session is None:
+                session = self._sessions[session_id] = deque()
+            job = Job(session_id, query)
+            session.append(job)
+            self._pending += 1
+            self._stats["submitted"] += 1
+            start = len(session) == 1
+        if start:
+            self._executor.submit(self._run_next, session_id)
+        return job
+
+    def _run_next(self, session_id: str):
+        with self._lock:
+            job = self._sessions[session_id][0]
+        job.run(self.stream_fn)
+        with self._lock:
+            session = self._sessions[session_id]
+            session.popleft()
+            self._pending -= 1
+            self._stats["completed"] += 1
+            self._stats["queue_wait_s"] += job.started_at - job.submitted_at
+            self._stats["run_s"] += job.finished_at - job.started_at
+            if not session:
+                del self._sessions[session_id]
+                return
+        # Requeue instead of looping so a busy session can't hold a worker
+        self._executor.submit(self._run_next, session_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = self._pending
+            stats["active_sessions"] = len(self._sessions)
+        return stats
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+class ChatMemory:
+    """
+    Bounded per-session chat transcript: keeps the last `max_messages`
+    messages and stores at most `max_chars` of each one.
+    """
+
+    def __init__(self, max_messages: int = 50, max_chars: int = 4000):
+        self.max_chars = max_chars
+        self._messages = deque(maxlen=max_messages)
+
+    def add(self, role: str, content: str):
+        if len(content) > self.max_chars:
+            content = content[:self.max_chars] + "…"
+        self._messages.append((role, content))
+
+    def __iter__(self):
+        for role, content in self._messages:
+            yield {"role": role, "content": content}
+
+    def __len__(self):
+        return len(self._messages)
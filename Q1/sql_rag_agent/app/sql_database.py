@@ -0,0 +1,219 @@
+# app/sql_database.py
+
+import re
+import sys
+import threading
+from collections import OrderedDict
+
+from langchain_community.utilities import SQLDatabase
+from langchain_community.utilities.sql_database import truncate_word
+
+from app.query_guard import QueryGuard, QueryRejected, check_read_only
+
+_QUOTED = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+_CACHEABLE = re.compile(r"^\s*(select|with|pragma\s+table_info|pragma\s+index_list|explain)\b", re.IGNORECASE)
+_VOLATILE = re.compile(r"\b(random|randomblob|changes|last_insert_rowid)\s*\(|'now'", re.IGNORECASE)
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Collapses whitespace and case outside string literals and drops a
+    trailing semicolon, so trivially different spellings share an entry.
+    """
+    parts = _QUOTED.split(sql.strip().rstrip(";").strip())
+    return "".join(
+        part if i % 2 else " ".join(part.lower().split()) for i, part in enumerate(parts)
+    )
+
+
+def is_cacheable(sql: str) -> bool:
+    """Only single read-only statements with deterministic results are cached."""
+    stripped = sql.strip().rstrip(";")
+    return bool(_CACHEABLE.match(stripped)) and ";" not in stripped and not _VOLATILE.search(stripped)
+
+
+def _size_of(value) -> int:
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    return sys.getsizeof(value)
+
+
+class QueryResultCache:
+    """
+    LRU cache of query results shared by every source, capped by the total
+    size of the cached results rather than the number of entries.
+    Entries are tagged with the database version they were read from and
+    are all dropped once that version changes.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, max_entry_bytes: int = 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries = OrderedDict()  # (source, key) -> (value, size)
+        self._versions = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def _check_version(self, source: str, version):
+        if self._versions.get(source) != version:
+            if source in self._versions:
+                self._drop_source(source)
+            self._versions[source] = version
+
+    def _drop_source(self, source: str):
+        stale = [key for key in self._entries if key[0] == source]
+        for key in stale:
+            _, size = self._entries.pop(key)
+            self._bytes -= size
+        self._stats["invalidations"] += len(stale)
+
+    def get(self, source: str, version, key):
+        with self._lock:
+            self._check_version(source, version)
+            entry = self._entries.get((source, key))
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end((source, key))
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def put(self, source: str, version, key, value):
+        size = _size_of(value)
+        if size > self.max_entry_bytes:
+            return
+        with self._lock:
+            self._check_version(source, version)
+            old = self._entries.pop((source, key), None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[(source, key)] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._stats["evictions"] += 1
+
+    def invalidate(self, source: str = None):
+        with self._lock:
+            if source is None:
+                self._stats["invalidations"] += len(self._entries)
+                self._entries.clear()
+                self._versions.clear()
+                self._bytes = 0
+            else:
+                self._drop_source(source)
+                self._versions.pop(source, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), bytes=self._bytes, max_bytes=self.max_bytes)
+
+
+query_cache = QueryResultCache()
+
+
+class CachedSQLDatabase(SQLDatabase):
+    """
+    SQLDatabase whose read queries and table-info lookups are memoized in
+    the shared query cache, keyed by source and normalized SQL text.
+    Every lookup re-checks `version_fn()` (the .db file fingerprint), so a
+    rebuilt table is never served from the cache.
+
+    With `guard` on, string queries go through a QueryGuard: read-only
+    statements only, row limits, full-scan checks and summarised large
+    results (see app/query_guard.py).
+    """
+
+    def __init__(self, engine, source: str, version_fn, cache=query_cache, guard: bool = True, **kwargs):
+        self.source = source
+        self.version_fn = version_fn
+        self.cache = cache
+        super().__init__(engine, **kwargs)
+        self.guard = QueryGuard(self._execute, self._table_stats, self._format_rows) if guard else None
+
+    def get_usable_table_names(self):
+        # Tables starting with "_" (e.g. the _rollups registry) are internal
+        return [name for name in super().get_usable_table_names() if not name.startswith("_")]
+
+    def rollups(self):
+        """Summary tables listed in the database's _rollups registry (see scripts/build_rollups.py)."""
+        def compute():
+            if not self._execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = '_rollups'"):
+                return []
+            return [dict(row) for row in self._execute("SELECT name, group_by, description FROM _rollups")]
+        return self._cached(("rollups",), compute)
+
+    def _table_stats(self):
+        """{table: (row count, [indexed columns])}, recomputed when the database changes."""
+        def compute():
+            stat_rows = {}
+            if self._execute("SELECT name FROM sqlite_master WHERE name = 'sqlite_stat1'"):
+                for row in self._execute("SELECT tbl, stat FROM sqlite_stat1"):
+                    if row["stat"]:
+                        stat_rows[row["tbl"]] = max(stat_rows.get(row["tbl"], 0), int(row["stat"].split()[0]))
+            stats = {}
+            for table in self.get_usable_table_names():
+                quoted = '"' + table.replace('"', '""') + '"'
+                rows = stat_rows.get(table)
+                if rows is None:
+                    rows = self._execute(f"SELECT COUNT(*) AS n FROM {quoted}")[0]["n"]
+                indexed = {r["name"] for r in self._execute(f"PRAGMA table_info({quoted})") if r["pk"]}
+                for index in self._execute(f"PRAGMA index_list({quoted})"):
+                    columns = self._execute(f"PRAGMA index_info(\"{index['name']}\")")
+                    if columns:
+                        indexed.add(columns[0]["name"])
+                stats[table] = (rows, sorted(indexed))
+            return stats
+        return self._cached(("table_stats",), compute)
+
+    def _format_rows(self, rows, include_columns=False) -> str:
+        # Same rendering as SQLDatabase.run
+        rows = [
+            {column: truncate_word(value, length=self._max_string_length) for column, value in row.items()}
+            for row in rows
+        ]
+        if not include_columns:
+            rows = [tuple(row.values()) for row in rows]
+        return str(rows) if rows else ""
+
+    def _cached(self, key, compute):
+        version = self.version_fn()
+        result = self.cache.get(self.source, version, key)
+        if result is None:
+            result = compute()
+            self.cache.put(self.source, version, key, result)
+        return result
+
+    def run(self, command, fetch="all", include_columns=False, *, parameters=None, execution_options=None):
+        if self.guard is not None and isinstance(command, str) and fetch != "cursor":
+            command = check_read_only(command)
+            if fetch == "all" and not parameters and not execution_options:
+                guarded = lambda: self.guard.run(command, include_columns)
+                if not is_cacheable(command):
+                    return guarded()
+                return self.guard.revive(
+                    command, self._cached(("guarded", normalize_sql(command), include_columns), guarded)
+                )
+        if fetch == "cursor" or execution_options or not isinstance(command, str) or not is_cacheable(command):
+            return super().run(
+                command, fetch, include_columns, parameters=parameters, execution_options=execution_options
+            )
+        key = ("run", normalize_sql(command), fetch, include_columns, repr(sorted((parameters or {}).items())))
+        return self._cached(
+            key, lambda: super(CachedSQLDatabase, self).run(command, fetch, include_columns, parameters=parameters)
+        )
+
+    def run_no_throw(self, command, fetch="all", include_columns=False, *, parameters=None,
+                     execution_options=None):
+        try:
+            return super().run_no_throw(
+                command, fetch, include_columns, parameters=parameters, execution_options=execution_options
+            )
+        except QueryRejected as e:
+            return f"Error: {e}"
+
+    def get_table_info(self, table_names=None):
+        key = ("table_info", tuple(sorted(table_names)) if table_names else None)
+        return self._cached(key, lambda: super(CachedSQLDatabase, self).get_table_info(table_names))
@@ -0,0 +1,70 @@
+import queue
+import threading
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Event shapes produced by stream_events() (and by Q2's rag.main.stream_user_query):
+#   {"type": "tool_start", "name": str, "input": str}
+#   {"type": "tool_end",   "name": str, "output": str}
+#   {"type": "token",      "text": str}
+_DONE = object()
+
+
+class StreamingEventHandler(BaseCallbackHandler):
+    """
+    Collects tool calls and answer tokens from an agent run into a queue.
+    Tokens are only forwarded while no tool is running, so text generated
+    inside a tool (e.g. the nested SQL agent) doesn't leak into the answer.
+    """
+
+    def __init__(self, events: "queue.Queue", preview_chars: int = 300):
+        self.events = events
+        self.preview_chars = preview_chars
+        self._tools = {}
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        self._tools[run_id] = name
+        self.events.put({"type": "tool_start", "name": name, "input": str(input_str)[:self.preview_chars]})
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        name = self._tools.pop(run_id, "tool")
+        output = getattr(output, "content", output)
+        self.events.put({"type": "tool_end", "name": name, "output": str(output)[:self.preview_chars]})
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        name = self._tools.pop(run_id, "tool")
+        self.events.put({"type": "tool_end", "name": name, "output": f"Error: {error}"})
+
+    def on_llm_new_token(self, token, **kwargs):
+        if token and not self._tools:
+            self.events.put({"type": "token", "text": token})
+
+
+def stream_events(run):
+    """
+    Runs `run(handler)` on a background thread and yields its events as
+    they arrive. The return value of `run` is sent as a final
+    {"type": "result", "value": ...} event; an exception is re-raised here.
+    """
+    events = queue.Queue()
+    handler = StreamingEventHandler(events)
+    outcome = {}
+
+    def target():
+        try:
+            outcome["value"] = run(handler)
+        except Exception as e:
+            outcome["error"] = e
+        finally:
+            events.put(_DONE)
+
+    threading.Thread(target=target, name="agent-stream", daemon=True).start()
+    while True:
+        event = events.get()
+        if event is _DONE:
+            break
+        yield event
+    if "error" in outcome:
+        raise outcome["error"]
+    yield {"type": "result", "value": outcome.get("value")}
@@ -0,0 +1,78 @@
+# benchmarks/bench_guard.py
+#
+# Which agent-style queries the query guard (app/query_guard.py) rejects as
+# full scans, and how long the plan check takes, on a synthetic tickets
+# table. Aliased forms are checked too: EXPLAIN QUERY PLAN names the scan by
+# alias ("SCAN t"), and they must be rejected like the plain ones.
+#
+# Run from the sql_rag_agent directory:
+#     python -m benchmarks.bench_guard --rows 300000
+
+import argparse
+import sqlite3
+import time
+
+from app.query_guard import QueryGuard, QueryRejected
+
+# (query, should be rejected)
+QUERIES = [
+    ("SELECT * FROM tickets", False),
+    ("SELECT * FROM tickets WHERE customer_id = 'c42'", False),
+    ("SELECT status, COUNT(*) FROM tickets GROUP BY status", True),
+    ("SELECT * FROM tickets ORDER BY created_at DESC", True),
+    ("SELECT t.status, COUNT(*) FROM tickets t GROUP BY t.status", True),
+    ("SELECT * FROM tickets AS t ORDER BY t.created_at DESC", True),
+    ('SELECT COUNT(DISTINCT t.customer_id) FROM "tickets" t', True),
+    ("SELECT t.* FROM tickets t WHERE t.customer_id = 'c42' ORDER BY t.created_at", False),
+]
+
+
+def make_db(rows):
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE tickets (ticket_id INTEGER PRIMARY KEY, customer_id TEXT, status TEXT, created_at TEXT)")
+    conn.executemany(
+        "INSERT INTO tickets VALUES (?, ?, ?, ?)",
+        ((i, f"c{i % 5000}", ("Open", "Pending", "Closed")[i % 3], f"2024-01-{i % 28 + 1:02d}") for i in range(rows)),
+    )
+    conn.execute("CREATE INDEX ix_tickets_customer_id ON tickets (customer_id)")
+    conn.commit()
+    return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check which queries the SQL query guard rejects.")
+    parser.add_argument("--rows", type=int, default=300_000)
+    parser.add_argument("--max-scan-rows", type=int, default=100_000,
+                        help="guard threshold for rejecting sorted/aggregated full scans")
+    args = parser.parse_args()
+
+    conn = make_db(args.rows)
+    guard = QueryGuard(
+        lambda sql: [dict(row) for row in conn.execute(sql)],
+        lambda: {"tickets": (args.rows, ["customer_id", "ticket_id"])},
+        lambda rows, include_columns: str([tuple(row.values()) for row in rows]),
+        max_scan_rows=args.max_scan_rows,
+    )
+    expect_rejects = args.rows > args.max_scan_rows
+
+    wrong = 0
+    print(f"{'query':<80} {'result':>9} {'ms':>8}")
+    for query, should_reject in QUERIES:
+        start = time.perf_counter()
+        try:
+            guard.run(query)
+            rejected = False
+        except QueryRejected:
+            rejected = True
+        elapsed = (time.perf_counter() - start) * 1000
+        ok = rejected == (should_reject and expect_rejects)
+        wrong += not ok
+        print(f"{query:<80} {'rejected' if rejected else 'ran':>9} {elapsed:8.1f}{'' if ok else '  <-- WRONG'}")
+    print(f"wrong: {wrong}/{len(QUERIES)}")
+    if wrong:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
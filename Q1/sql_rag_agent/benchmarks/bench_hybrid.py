@@ -0,0 +1,103 @@
+# benchmarks/bench_hybrid.py
+#
+# Recall@3 and latency of vector-only ticket search versus the hybrid
+# FTS5 + vector retriever, on synthetic tickets whose responses share a few
+# topic templates and differ in specific terms (error codes, device models).
+# Queries name one ticket's specific terms in new wording, which is where
+# embeddings alone blur together. Uses the offline HashingEmbeddings and
+# the local index, so no API key is needed.
+#
+# Run from the sql_rag_agent directory:
+#     python -m benchmarks.bench_hybrid --tickets 20000
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+from app.embeddings import HashingEmbeddings
+from app.hybrid_retriever import HybridRetriever
+from app.local_index import LocalIndexRetriever, LocalVectorIndex, build_index
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from build_fts import build_fts  # noqa: E402
+
+TEMPLATES = [
+    "Asked the customer to restart the router and update the firmware; the {device} showed error {code} during setup.",
+    "Reset the account password and cleared the session; login on the {device} failed with error {code} before.",
+    "Refunded the duplicate charge; billing page on the {device} reported error {code} at checkout.",
+    "Reinstalled the driver after the {device} crashed with error {code} when printing.",
+]
+CATEGORIES = ["Wi-Fi", "Login", "Billing", "Hardware"]
+DEVICES = ["Pixel 7", "iPhone 14", "Galaxy S23", "ThinkPad X1", "MacBook Air", "Echo Dot", "Kindle"]
+
+
+def make_db(path: str, n: int, seed: int = 0):
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE tech_support (Conversation_ID INTEGER PRIMARY KEY, Customer_Issue TEXT, "
+        "Tech_Response TEXT, Issue_Category TEXT, Issue_Status TEXT)"
+    )
+    rows = []
+    for i in range(n):
+        topic = rng.randrange(len(TEMPLATES))
+        device, code = rng.choice(DEVICES), f"0x{rng.randrange(16**6):06X}"
+        rows.append((i, f"problem with my {device}", TEMPLATES[topic].format(device=device, code=code),
+                     CATEGORIES[topic], rng.choice(["Open", "Resolved"])))
+    conn.executemany("INSERT INTO tech_support VALUES (?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+    return rows
+
+
+def recall_and_latency(retriever, queries):
+    hits, timings = 0, []
+    for query, ticket in queries:
+        start = time.perf_counter()
+        docs = retriever.invoke(query)
+        timings.append((time.perf_counter() - start) * 1000)
+        hits += any(doc.metadata.get("ticket_id") == ticket for doc in docs)
+    return {"recall_at_3": round(hits / len(queries), 3), "p50_ms": round(statistics.median(timings), 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vector-only vs hybrid ticket search.")
+    parser.add_argument("--tickets", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "customer_support.db")
+        rows = make_db(db_path, args.tickets)
+        build_fts(db_path)
+
+        embeddings = HashingEmbeddings()
+        texts = [row[2] for row in rows]
+        metadatas = [{"ticket_id": row[0], "category": row[3], "status": row[4]} for row in rows]
+        build_index(os.path.join(tmp_dir, "index"), embeddings.embed_documents(texts), texts, metadatas)
+        index = LocalVectorIndex(os.path.join(tmp_dir, "index"))
+
+        rng = random.Random(1)
+        queries = []
+        for row in rng.sample(rows, args.queries):
+            code = row[2].split("error ")[1].split()[0]
+            device = next(d for d in DEVICES if d in row[2])
+            queries.append((f"what fixed error {code} on a {device}?", row[0]))
+
+        vector = LocalIndexRetriever(index=index, embeddings=embeddings, k=3)
+        hybrid = HybridRetriever(
+            vector_retriever=LocalIndexRetriever(index=index, embeddings=embeddings, k=10),
+            db_path=db_path, k=3, candidates=10,
+        )
+        for name, retriever in [("vector", vector), ("hybrid", hybrid)]:
+            print(json.dumps({"retriever": name, "tickets": args.tickets, **recall_and_latency(retriever, queries)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# benchmarks/bench_retrieval.py
+#
+# p50/p99 top-3 retrieval latency and resident memory of the Chroma store vs
+# the in-process LocalVectorIndex, on synthetic ticket vectors. Both stores
+# are built up front; each backend is then loaded and queried in a fresh
+# process so its memory is measured in isolation. Query vectors are
+# precomputed so only the retrieval stack is timed.
+#
+# Run from the sql_rag_agent directory:
+#     python -m benchmarks.bench_retrieval --sizes 10000 100000
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from app.local_index import LocalVectorIndex, build_index
+
+CATEGORIES = ["Wi-Fi", "Billing", "Login", "Hardware", "Software"]
+STATUSES = ["Open", "Pending", "Resolved"]
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def make_corpus(n: int, dim: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(50, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, 50, n)] + 0.3 * rng.normal(size=(n, dim)).astype(np.float32)
+    metadatas = [
+        {"ticket_id": i, "category": CATEGORIES[i % len(CATEGORIES)], "status": STATUSES[i % len(STATUSES)]}
+        for i in range(n)
+    ]
+    documents = [f"ticket {i} response text" for i in range(n)]
+    queries = centers[rng.integers(0, 50, 200)] + 0.3 * rng.normal(size=(200, dim)).astype(np.float32)
+    return vectors, documents, metadatas, queries
+
+
+def build_chroma(persist_dir, vectors, documents, metadatas):
+    import chromadb
+
+    client = chromadb.PersistentClient(path=persist_dir)
+    collection = client.get_or_create_collection("langchain")
+    for start in range(0, len(documents), 5000):
+        end = min(start + 5000, len(documents))
+        collection.add(
+            ids=[str(i) for i in range(start, end)],
+            embeddings=vectors[start:end].tolist(),
+            documents=documents[start:end],
+            metadatas=metadatas[start:end],
+        )
+
+
+def percentiles(timings):
+    ms = np.array(timings) * 1000
+    return {"p50_ms": round(float(np.percentile(ms, 50)), 3), "p99_ms": round(float(np.percentile(ms, 99)), 3)}
+
+
+def time_calls(fn, queries):
+    timings = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(q)
+        timings.append(time.perf_counter() - start)
+    return percentiles(timings)
+
+
+def run_backend(backend: str, store_dir: str, queries_path: str) -> dict:
+    """Runs in a child process: load one backend, query it, report."""
+    queries = np.load(queries_path)
+    before = rss_mb()
+    if backend == "chroma":
+        from langchain_chroma import Chroma
+
+        store = Chroma(persist_directory=store_dir)
+
+        def search(q, where=None):
+            return store.similarity_search_by_vector(q.tolist(), k=3, filter=where)
+    else:
+        index = LocalVectorIndex(store_dir)
+
+        def search(q, where=None):
+            return [index.document(row, score) for row, score in index.search(q, k=3, where=where)[0]]
+
+    search(queries[0])  # load/warm-up (includes building the HNSW graph if used)
+    loaded = rss_mb()
+    result = {
+        "backend": backend,
+        "top3": time_calls(search, queries),
+        "top3_filtered": time_calls(lambda q: search(q, {"status": "Pending"}), queries),
+    }
+    result["memory_mb"] = round(max(loaded, rss_mb()) - before, 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Chroma vs the local vector index.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--child", nargs=3, metavar=("BACKEND", "STORE_DIR", "QUERIES"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_backend(*args.child)))
+        return
+
+    for n in args.sizes:
+        vectors, documents, metadatas, queries = make_corpus(n, args.dim)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            stores = {"chroma": os.path.join(tmp_dir, "chroma"), "local": os.path.join(tmp_dir, "local_index")}
+            build_chroma(stores["chroma"], vectors, documents, metadatas)
+            build_index(stores["local"], vectors, documents, metadatas)
+            queries_path = os.path.join(tmp_dir, "queries.npy")
+            np.save(queries_path, queries)
+
+            for backend, store_dir in stores.items():
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_retrieval", "--child", backend, store_dir, queries_path],
+                    check=True, capture_output=True, text=True,
+                )
+                result = json.loads(out.stdout.strip().splitlines()[-1])
+                result.update(vectors=n, dim=args.dim)
+                print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
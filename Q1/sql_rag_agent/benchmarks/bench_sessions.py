@@ -0,0 +1,130 @@
+# benchmarks/bench_sessions.py
+#
+# Throughput and latency of N simulated chat sessions against a stub agent
+# (sleeps stand in for LLM and tool latency, so no API key is needed).
+#
+#   serial   - every question runs under one global lock, the way concurrent
+#              Streamlit sessions serialise on a single shared executor
+#   service  - questions go through app.service.AgentService (bounded worker
+#              pool, per-session ordering, backpressure)
+#
+# Each session asks its questions one after another, waiting for each
+# answer, like a user in the chat UI. A rejected question (ServiceBusy) is
+# retried after a short pause and counted.
+#
+# Run from the sql_rag_agent directory:
+#     python -m benchmarks.bench_sessions --sessions 1 8 32 --questions 5
+
+import argparse
+import json
+import statistics
+import threading
+import time
+
+from app.service import AgentService, ServiceBusy
+
+
+def make_stub(tool_seconds: float, tokens: int, token_seconds: float):
+    def stream_fn(query):
+        yield {"type": "tool_start", "name": "sql_database_query", "input": query}
+        time.sleep(tool_seconds)
+        yield {"type": "tool_end", "name": "sql_database_query", "output": "42"}
+        for i in range(tokens):
+            time.sleep(token_seconds)
+            yield {"type": "token", "text": f"tok{i} "}
+    return stream_fn
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run_sessions(sessions: int, questions: int, ask):
+    """`ask(session_id, query)` returns (time to first token, total latency)."""
+    ttft, latency = [], []
+    lock = threading.Lock()
+
+    def session(i):
+        for q in range(questions):
+            first, total = ask(f"s{i}", f"question {q} from session {i}")
+            with lock:
+                ttft.append(first)
+                latency.append(total)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "answers_per_s": round(len(latency) / elapsed, 2),
+        "ttft_p50_s": round(statistics.median(ttft), 3),
+        "latency_p50_s": round(statistics.median(latency), 3),
+        "latency_p95_s": round(percentile(latency, 0.95), 3),
+    }
+
+
+def serial_ask(stream_fn):
+    lock = threading.Lock()
+
+    def ask(session_id, query):
+        start = time.perf_counter()
+        first = None
+        with lock:
+            for event in stream_fn(query):
+                if event["type"] == "token" and first is None:
+                    first = time.perf_counter() - start
+        return first, time.perf_counter() - start
+    return ask
+
+
+def service_ask(service, retries):
+    def ask(session_id, query):
+        start = time.perf_counter()
+        while True:
+            try:
+                job = service.submit(session_id, query)
+                break
+            except ServiceBusy:
+                with retries["lock"]:
+                    retries["count"] += 1
+                time.sleep(0.05)
+        first = None
+        for event in job.events():
+            if event["type"] == "token" and first is None:
+                first = time.perf_counter() - start
+        return first, time.perf_counter() - start
+    return ask
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent chat sessions against a stub agent.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--max-pending", type=int, default=16)
+    parser.add_argument("--tool-seconds", type=float, default=0.2)
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--token-seconds", type=float, default=0.01)
+    args = parser.parse_args()
+
+    stream_fn = make_stub(args.tool_seconds, args.tokens, args.token_seconds)
+    report = []
+    for sessions in args.sessions:
+        row = {"sessions": sessions, "serial": run_sessions(sessions, args.questions, serial_ask(stream_fn))}
+        service = AgentService(stream_fn, max_workers=args.workers, max_pending=args.max_pending)
+        retries = {"count": 0, "lock": threading.Lock()}
+        row["service"] = run_sessions(sessions, args.questions, service_ask(service, retries))
+        row["service"]["busy_rejections"] = retries["count"]
+        service.shutdown()
+        report.append(row)
+        print(json.dumps(row))
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/bench_startup.py
+#
+# Startup cost of app.agent: cold `import app.agent` time, time to build the
+# main agent (tools are built in parallel), and optionally time-to-first-answer
+# for one question. Every measurement runs in a fresh interpreter so module
+# caches from an earlier step don't hide import cost.
+#
+# Run from the sql_rag_agent directory:
+#     python -m benchmarks.bench_startup --runs 5
+#     python -m benchmarks.bench_startup --ask "How many tickets are Pending?"
+#
+# Building the agent needs the ticket DB and vector store, and --ask needs
+# OPENAI_API_KEY; those steps are skipped with a note when they fail.
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import app.agent as agent
+result = {"import_s": time.perf_counter() - t0}
+step = sys.argv[1]
+if step in ("build", "ask"):
+    t1 = time.perf_counter()
+    agent.get_main_agent()
+    result["build_s"] = time.perf_counter() - t1
+if step == "ask":
+    t2 = time.perf_counter()
+    agent.get_answer(sys.argv[2], use_cache=False)
+    result["answer_s"] = time.perf_counter() - t2
+    result["first_answer_s"] = time.perf_counter() - t0
+print("RESULT " + json.dumps(result))
+"""
+
+
+def run_child(step: str, question: str = ""):
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD, step, question],
+        capture_output=True, text=True,
+    )
+    for line in proc.stdout.splitlines():
+        if line.startswith("RESULT "):
+            return json.loads(line[len("RESULT "):])
+    tail = (proc.stderr.strip().splitlines() or ["no output"])[-1]
+    print(f"  {step} step failed: {tail}")
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure app.agent startup cost.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--ask", default=None, help="Also time one full question end to end.")
+    args = parser.parse_args()
+
+    imports = [r["import_s"] for r in (run_child("import") for _ in range(args.runs)) if r]
+    report = {}
+    if imports:
+        report["cold_import_s"] = {"median": statistics.median(imports), "min": min(imports)}
+
+    build = run_child("build")
+    if build:
+        report["agent_build_s"] = build["build_s"]
+
+    if args.ask:
+        ask = run_child("ask", args.ask)
+        if ask:
+            report["time_to_first_answer_s"] = ask["first_answer_s"]
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
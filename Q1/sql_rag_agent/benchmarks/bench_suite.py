@@ -0,0 +1,138 @@
+# benchmarks/bench_suite.py
+#
+# Offline end-to-end benchmark of the support agent at several ticket
+# counts, with machine-readable JSON results for comparing runs. For each
+# scale, on a synthetic customer_support.db in a scratch directory:
+#
+#   vector_build  scripts/build_vectorstore.py's load -> documents -> chunks
+#                 -> Chroma, from scratch and again with nothing changed,
+#                 plus the FTS5 index (scripts/build_fts.py): wall time,
+#                 chunks/s, embedding calls, peak memory
+#   query         get_answer() over a fixed question mix with
+#                 ScriptedChatModel (canned tool calls, configurable
+#                 latency) and the local embedder: throughput, latency
+#                 percentiles, peak memory, LLM calls, tokens, tool calls
+#                 and SQL statements per question
+#
+# Run from the sql_rag_agent directory:
+#     python -m benchmarks.bench_suite --scales 1000 10000 --output results/bench.json
+#     python -m benchmarks.bench_suite --scales 5000 --llm-latency 0.2 --retriever chroma
+
+import argparse
+import os
+import tempfile
+import time
+
+os.environ.setdefault("AGENT_VERBOSE", "0")
+
+import app.agent as agent
+from app.embeddings import get_embeddings
+from benchmarks.harness import (
+    ScriptedChatModel, SqlCounter, isolated, latency_stats, load_build_vectorstore, make_ticket_db, peak_rss_mb,
+    run_metadata, write_results,
+)
+
+QUESTIONS = [
+    "How many tickets have a 'Pending' status?",
+    "What fixed error 0x00AB12 on a Pixel 7?",
+    "How many tickets are there per category?",
+    "How do I fix a router firmware problem?",
+    "Count tickets per status",
+    "The billing page shows an error at checkout, what should I do?",
+]
+
+
+def bench_vector_build(scale: int) -> dict:
+    build_vectorstore = load_build_vectorstore()
+    from build_fts import build_fts
+
+    embeddings = get_embeddings()
+    result = {"suite": "vector_build", "scale": scale}
+    for run in ("full", "unchanged"):
+        before = dict(embeddings.stats)
+        start = time.perf_counter()
+        df = build_vectorstore.load_data_from_db()
+        chunks = build_vectorstore.split_documents(build_vectorstore.create_documents(df))
+        counts = build_vectorstore.create_and_store_embeddings(chunks, full_rebuild=run == "full",
+                                                               embeddings=embeddings)
+        seconds = time.perf_counter() - start
+        total = sum(counts.values()) - counts["deleted"]
+        result[run] = {
+            "wall_s": round(seconds, 3), "chunks": total, "chunks_per_s": round(total / seconds, 1),
+            "embedded": embeddings.stats["embedded"] - before["embedded"],
+            "embedding_batches": embeddings.stats["batches"] - before["batches"],
+        }
+    start = time.perf_counter()
+    build_fts(agent.DB_PATH)
+    result["fts_build_s"] = round(time.perf_counter() - start, 3)
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def bench_query(scale: int, llm: ScriptedChatModel, questions, retriever: str) -> dict:
+    start = time.perf_counter()
+    agent._main_agent = agent.create_main_agent(retriever)
+    build_s = time.perf_counter() - start
+    # Warm-up pass (first SQL reflection, index load), then drop memoized SQL results
+    for question in questions:
+        agent.get_answer(question, use_cache=False)
+    from app.sql_database import query_cache
+    query_cache.invalidate()
+
+    llm.stats.clear()
+    latencies = []
+    with SqlCounter() as sql:
+        start = time.perf_counter()
+        for question in questions:
+            t0 = time.perf_counter()
+            agent.get_answer(question, use_cache=False)
+            latencies.append(time.perf_counter() - t0)
+        wall = time.perf_counter() - start
+    n = len(questions)
+    return {
+        "suite": "query", "scale": scale, "questions": n, "retriever": retriever,
+        "agent_build_s": round(build_s, 3),
+        "throughput_qps": round(n / wall, 3),
+        **latency_stats(latencies),
+        "peak_rss_mb": peak_rss_mb(),
+        "llm_calls_per_question": round(llm.stats.get("calls", 0) / n, 2),
+        "prompt_tokens_per_question": round(llm.stats.get("prompt_tokens", 0) / n, 1),
+        "tool_calls": {k[5:]: v for k, v in llm.stats.items() if k.startswith("tool:") and v},
+        "sql_statements_per_question": round(sql.count / n, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite (vector build, query path).")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10000], help="tickets in the database")
+    parser.add_argument("--questions", type=int, default=len(QUESTIONS) * 3)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds per LLM call")
+    parser.add_argument("--per-token", type=float, default=0.0, help="extra seconds per prompt token")
+    parser.add_argument("--retriever", choices=["local", "chroma"], default="local")
+    parser.add_argument("--output", default="-", help='JSON results file ("-" prints them)')
+    args = parser.parse_args()
+
+    llm = ScriptedChatModel(latency=args.llm_latency, per_token=args.per_token)
+    questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(args.questions)]
+    saved_llm, agent._llm = agent._llm, llm
+
+    metadata = run_metadata(args)
+    results = []
+    try:
+        for scale in args.scales:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                db_path = os.path.join(tmp_dir, "customer_support.db")
+                make_ticket_db(db_path, scale)
+                with isolated(tmp_dir, db_path):
+                    results.append(bench_vector_build(scale))
+                    results.append(bench_query(scale, llm, questions, args.retriever))
+                for result in results[-2:]:
+                    print(f"  {result['suite']:<12} scale={scale}: "
+                          + ", ".join(f"{k}={v}" for k, v in result.items() if k not in ("suite", "scale")))
+    finally:
+        agent._llm = saved_llm
+    write_results(args.output, metadata, results)
+
+
+if __name__ == "__main__":
+    main()
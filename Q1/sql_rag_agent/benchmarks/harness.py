@@ -0,0 +1,248 @@
+# benchmarks/harness.py
+#
+# Offline stand-ins for the benchmarks, so nothing needs an API key:
+#   - ScriptedChatModel: tool-calling chat model that replays canned tool
+#     calls (ticket counts go to the SQL agent and its canned SQL, "how do
+#     I fix ..." questions to the ticket search) with a configurable
+#     per-call and per-prompt-token latency, counting calls, tokens and
+#     tool calls
+#   - make_ticket_db(): synthetic customer_support.db at a given size
+#   - isolated(): points app.agent and scripts/build_vectorstore.py at a
+#     scratch directory and the local HashingEmbeddings
+#   - SqlCounter: counts statements SQLAlchemy sends to SQLite
+#   - helpers for percentiles, peak memory and JSON results
+
+import json
+import os
+import platform
+import random
+import resource
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts")
+
+CATEGORIES = ["Wi-Fi", "Login", "Billing", "Hardware", "Software"]
+STATUSES = ["Open", "Pending", "Resolved"]
+DEVICES = ["Pixel 7", "iPhone 14", "Galaxy S23", "ThinkPad X1", "MacBook Air", "Echo Dot", "Kindle"]
+RESPONSES = [
+    "Asked the customer to restart the router and update the firmware; the {device} showed error {code}.",
+    "Reset the account password and cleared the session; login on the {device} failed with error {code}.",
+    "Refunded the duplicate charge; the billing page on the {device} reported error {code} at checkout.",
+    "Reinstalled the driver after the {device} crashed with error {code} when printing.",
+    "Rolled back the app update; it froze on the {device} with error {code} on launch.",
+]
+# Canned SQL the scripted SQL agent runs for count-style questions
+CANNED_SQL = {
+    "status": "SELECT Issue_Status, COUNT(*) FROM tech_support GROUP BY Issue_Status",
+    "category": "SELECT Issue_Category, COUNT(*) FROM tech_support GROUP BY Issue_Category",
+    "pending": "SELECT COUNT(*) FROM tech_support WHERE Issue_Status = 'Pending'",
+}
+COUNT_WORDS = ("how many", "count", "number of", "per status", "per category")
+
+
+def make_ticket_db(path: str, n: int, seed: int = 0):
+    """A tech_support table of `n` tickets with the columns the app reads."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE tech_support (Conversation_ID INTEGER PRIMARY KEY, Customer_Issue TEXT, "
+        "Tech_Response TEXT, Issue_Category TEXT, Issue_Status TEXT)"
+    )
+    rows = []
+    for i in range(n):
+        topic = rng.randrange(len(RESPONSES))
+        device, code = rng.choice(DEVICES), f"0x{rng.randrange(16**6):06X}"
+        rows.append((i, f"problem with my {device}", RESPONSES[topic].format(device=device, code=code),
+                     CATEGORIES[topic], rng.choice(STATUSES)))
+    conn.executemany("INSERT INTO tech_support VALUES (?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def count_tokens(text: str) -> int:
+    # Rough, but cheap enough to call on every prompt
+    return len(text) // 4 + 1
+
+
+def tool_step(messages, tool_names):
+    """
+    Next (tool, args) of the scripted exchange, or ("answer", text). The
+    main agent sends count questions to sql_database_query and everything
+    else to the ticket search; the SQL agent runs one canned query; both
+    answer with the last tool result.
+    """
+    last_human = max(i for i, m in enumerate(messages) if isinstance(m, HumanMessage))
+    question = str(messages[last_human].content)
+    results = [str(m.content) for m in messages[last_human:] if isinstance(m, ToolMessage)]
+    if results:
+        return "answer", results[-1][:300]
+    lower = question.lower()
+    if "sql_db_query" in tool_names:
+        key = next((k for k in CANNED_SQL if k in lower), "status")
+        return "sql_db_query", {"query": CANNED_SQL[key]}
+    if "sql_database_query" in tool_names and any(w in lower for w in COUNT_WORDS):
+        return "sql_database_query", {"__arg1": question}
+    return "support_ticket_description_search", {"query": question}
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Tool-calling chat model that answers from `step_fn(messages, tool
+    names)` (default: tool_step) after sleeping `latency` seconds plus
+    `per_token` seconds per prompt token. `stats` counts calls, tokens
+    and tool calls by name; it is shared with the copies bind_tools()
+    returns.
+    """
+
+    step_fn: object = tool_step
+    latency: float = 0.0
+    per_token: float = 0.0
+    tool_names: list = []
+    stats: dict = {}
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-chat"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.model_copy(update={"tool_names": [getattr(t, "name", None) or t["name"] for t in tools]})
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        prompt = "\n".join(str(m.content) for m in messages)
+        prompt_tokens = count_tokens(prompt)
+        time.sleep(self.latency + prompt_tokens * self.per_token)
+        kind, value = self.step_fn(messages, self.tool_names)
+        if kind == "answer":
+            message = AIMessage(content=value)
+        else:
+            call_id = f"call_{len(messages)}_{kind}"
+            message = AIMessage(content="", tool_calls=[{"name": kind, "args": value, "id": call_id}])
+        completion_tokens = count_tokens(json.dumps(value, default=str))
+        with _stats_lock:
+            for key, amount in (("calls", 1), ("prompt_tokens", prompt_tokens),
+                                ("completion_tokens", completion_tokens), (f"tool:{kind}", kind != "answer")):
+                self.stats[key] = self.stats.get(key, 0) + amount
+        return ChatResult(generations=[ChatGeneration(message=message)],
+                          llm_output={"token_usage": {"prompt_tokens": prompt_tokens,
+                                                      "completion_tokens": completion_tokens}})
+
+
+_stats_lock = threading.Lock()
+
+
+class SqlCounter:
+    """Counts statements sent through any SQLAlchemy engine while installed."""
+
+    def __init__(self):
+        self.count = 0
+
+    def _before(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+        event.listen(Engine, "before_cursor_execute", self._before)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+        event.remove(Engine, "before_cursor_execute", self._before)
+        return False
+
+
+def load_build_vectorstore():
+    """scripts/build_vectorstore.py as a module (scripts/ isn't a package)."""
+    if SCRIPTS_DIR not in sys.path:
+        sys.path.append(SCRIPTS_DIR)
+    import build_vectorstore
+    return build_vectorstore
+
+
+@contextmanager
+def isolated(work_dir: str, db_path: str):
+    """
+    Points app.agent and build_vectorstore at `db_path` and vector stores
+    under `work_dir`, with a fresh HashingEmbeddings cache there; restores
+    the real paths on exit.
+    """
+    import app.agent as agent
+    import app.embeddings as embeddings
+
+    build_vectorstore = load_build_vectorstore()
+    chroma_dir = os.path.join(work_dir, "chroma_db")
+    patches = [
+        (agent, "DB_PATH", db_path), (agent, "CHROMA_PERSIST_DIR", chroma_dir),
+        (agent, "LOCAL_INDEX_DIR", os.path.join(work_dir, "local_index")),
+        (agent, "_main_agent", None),
+        (build_vectorstore, "DB_PATH", db_path), (build_vectorstore, "CHROMA_PERSIST_DIR", chroma_dir),
+        (build_vectorstore, "MANIFEST_PATH", os.path.join(chroma_dir, "manifest.json")),
+        (embeddings, "_embeddings", embeddings.CachedEmbeddings(
+            embeddings.HashingEmbeddings(), embeddings.HashingEmbeddings().model_name,
+            cache_path=os.path.join(work_dir, "embeddings.db"))),
+        (embeddings, "_embeddings_backend", embeddings.EMBEDDINGS_BACKEND),
+    ]
+    saved = [(module, name, getattr(module, name)) for module, name, _ in patches]
+    for module, name, value in patches:
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for module, name, value in saved:
+            setattr(module, name, value)
+
+
+def percentile(sorted_values, q: float) -> float:
+    """Linear-interpolated percentile (q in 0..100) of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+
+def latency_stats(seconds) -> dict:
+    values = sorted(s * 1000 for s in seconds)
+    return {
+        "p50_ms": round(percentile(values, 50), 3), "p95_ms": round(percentile(values, 95), 3),
+        "p99_ms": round(percentile(values, 99), 3), "mean_ms": round(sum(values) / max(len(values), 1), 3),
+    }
+
+
+def peak_rss_mb() -> float:
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def run_metadata(args) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "commit": commit, "python": platform.python_version(), "platform": platform.platform(),
+        "cpus": os.cpu_count(), "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "args": vars(args),
+    }
+
+
+def write_results(path, metadata: dict, results: list):
+    """Writes {"meta", "results"} as JSON to `path` ("-" prints it)."""
+    text = json.dumps({"meta": metadata, "results": results}, indent=2, default=str)
+    if path == "-":
+        print(text)
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text + "\n")
+    print(f"Results written to {path}")
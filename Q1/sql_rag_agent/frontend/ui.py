@@ -1,6 +1,7 @@
 import streamlit as st
 import sys
 import os
+import uuid
 
 # --- PATH SETUP ---
 # This is a crucial step to ensure the app can find the 'app' module
@@ -12,12 +13,14 @@ try:
     current_dir = os.path.dirname(os.path.abspath(__file__))
     project_root = os.path.abspath(os.path.join(current_dir, '..'))
     sys.path.append(project_root)
-    from app.agent import get_answer
+    from app.agent import stream_answer, warm_up
+    from app.service import AgentService, ChatMemory, ServiceBusy
 except ImportError:
     # This block is a fallback for different execution environments
     # It assumes 'app' is in the python path
     try:
-        from app.agent import get_answer
+        from app.agent import stream_answer, warm_up
+        from app.service import AgentService, ChatMemory, ServiceBusy
     except ImportError as e:
         st.error(f"Error importing agent: {e}. Make sure you are running Streamlit from the 'sql_rag_agent' root directory.")
         st.stop()
@@ -30,33 +33,67 @@ st.title("🤖 AI Customer Support Assistant")
 st.caption("Ask me about customer support tickets. I can find specific data or search for solutions.")
 
 
+# --- SHARED AGENT SERVICE ---
+# One agent and one bounded worker pool per server process, shared by every
+# browser session. The agent is built in the background on first load.
+@st.cache_resource
+def get_agent_service():
+    warm_up()
+    return AgentService(stream_answer)
+
+service = get_agent_service()
+
+
 # --- CHAT HISTORY INITIALIZATION ---
-# This uses the session state to keep the chat history persistent
-if "messages" not in st.session_state:
-    st.session_state.messages = [{"role": "assistant", "content": "How can I help you today?"}]
+# Each session keeps a bounded transcript (last messages only) in its state
+if "memory" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+    st.session_state.memory = ChatMemory()
+    st.session_state.memory.add("assistant", "How can I help you today?")
 
 
 # --- DISPLAY CHAT MESSAGES ---
 # This loop iterates through the saved messages and displays them
-for message in st.session_state.messages:
+for message in st.session_state.memory:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
 
 
+# --- STREAMED RESPONSE RENDERING ---
+def answer_tokens(events, status):
+    """
+    Feeds answer tokens to st.write_stream and logs tool activity in the
+    status box as it happens.
+    """
+    for event in events:
+        if event["type"] == "tool_start":
+            status.update(label=f"Using {event['name']}...")
+            status.markdown(f"**{event['name']}** ← {event['input']}")
+        elif event["type"] == "tool_end":
+            status.markdown(f"**{event['name']}** → {event['output']}")
+        elif event["type"] == "token":
+            yield event["text"]
+
+
 # --- USER INPUT HANDLING ---
 # The st.chat_input widget waits for the user to enter a message
 if prompt := st.chat_input("Ask a question..."):
     # 1. Add user's message to history and display it
-    st.session_state.messages.append({"role": "user", "content": prompt})
+    st.session_state.memory.add("user", prompt)
     with st.chat_message("user"):
         st.markdown(prompt)
 
-    # 2. Get the assistant's response
+    # 2. Queue the question on the shared service and stream the answer back
     with st.chat_message("assistant"):
-        # Show a "thinking" spinner while the agent processes the query
-        with st.spinner("Thinking..."):
-            response = get_answer(prompt)
-            st.markdown(response)
+        try:
+            job = service.submit(st.session_state.session_id, prompt)
+        except ServiceBusy as e:
+            response = f"⏳ {e}"
+            st.warning(response)
+        else:
+            status = st.status("Thinking...", expanded=False)
+            response = st.write_stream(answer_tokens(job.events(), status))
+            status.update(label="Done", state="complete")
 
     # 3. Add assistant's response to history
-    st.session_state.messages.append({"role": "assistant", "content": response})
\ No newline at end of file
+    st.session_state.memory.add("assistant", response)
\ No newline at end of file
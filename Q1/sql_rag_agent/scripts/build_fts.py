@@ -0,0 +1,58 @@
+# scripts/build_fts.py
+#
+# Builds an FTS5 full-text index over the ticket text in customer_support.db,
+# so keyword lookups ("error 0x80070005", "router firmware") are a BM25-ranked
+# index hit. The index is an external-content table over tech_support (the
+# text is not stored twice) named with a leading underscore, which keeps it
+# out of the SQL agent's schema. app.hybrid_retriever fuses it with the
+# vector store for support_ticket_description_search. Re-run after the
+# ticket data is reloaded.
+#
+#     python scripts/build_fts.py
+
+import os
+import sqlite3
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(SCRIPT_DIR, '..', 'data', 'db', 'customer_support.db')
+TABLE_NAME = "tech_support"
+FTS_TABLE = "_fts_tech_support"
+# Indexed when present in the table
+TEXT_COLUMNS = ["Customer_Issue", "Tech_Response"]
+# Folds case and accents
+TOKENIZER = "unicode61 remove_diacritics 2"
+
+
+def build_fts(db_path: str = DB_PATH):
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        existing = [row[1] for row in conn.execute(f"PRAGMA table_info({TABLE_NAME})")]
+        columns = [c for c in TEXT_COLUMNS if c in existing]
+        if not columns:
+            raise ValueError(f"{TABLE_NAME} has none of the text columns {TEXT_COLUMNS}")
+        start = time.perf_counter()
+        conn.execute("BEGIN")
+        conn.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}_vocab")
+        conn.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        conn.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({', '.join(columns)}, "
+            f"content={TABLE_NAME}, content_rowid='rowid', tokenize='{TOKENIZER}')"
+        )
+        conn.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')")
+        # Per-term document counts, used to skip terms too common to search on
+        conn.execute(f"CREATE VIRTUAL TABLE {FTS_TABLE}_vocab USING fts5vocab({FTS_TABLE}, 'row')")
+        conn.execute("COMMIT")
+        conn.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+        rows = conn.execute(f"SELECT COUNT(*) FROM {TABLE_NAME}").fetchone()[0]
+        print(f"Built {FTS_TABLE} over {', '.join(columns)}: {rows} rows in {time.perf_counter() - start:.2f}s")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    build_fts()
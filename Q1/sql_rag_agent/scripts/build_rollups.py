@@ -0,0 +1,66 @@
+# scripts/build_rollups.py
+#
+# Builds materialised summary tables ("rollups") over the tech_support table
+# in customer_support.db, so common counts such as "tickets by status" are
+# an index lookup instead of a GROUP BY scan. Each rollup is recorded in a
+# `_rollups` registry table that app.agent reads to point the SQL agent at
+# them. Re-run after the ticket data is reloaded.
+#
+#     python scripts/build_rollups.py
+
+import json
+import os
+import sqlite3
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(SCRIPT_DIR, '..', 'data', 'db', 'customer_support.db')
+TABLE_NAME = "tech_support"
+REGISTRY_TABLE = "_rollups"
+
+# name -> (group columns, SELECT, description)
+ROLLUPS = {
+    "tech_support_status_summary": (
+        ["Issue_Status"],
+        f"SELECT Issue_Status, COUNT(*) AS tickets FROM {TABLE_NAME} GROUP BY Issue_Status",
+        "number of tickets per issue status",
+    ),
+    "tech_support_category_summary": (
+        ["Issue_Category", "Issue_Status"],
+        f"SELECT Issue_Category, Issue_Status, COUNT(*) AS tickets FROM {TABLE_NAME} "
+        f"GROUP BY Issue_Category, Issue_Status",
+        "number of tickets per issue category and status",
+    ),
+}
+
+
+def build_rollups(db_path: str = DB_PATH):
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("BEGIN")
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {REGISTRY_TABLE} ("
+            " name TEXT PRIMARY KEY, base_tables TEXT NOT NULL, group_by TEXT NOT NULL,"
+            " description TEXT NOT NULL, row_count INTEGER NOT NULL, refreshed_at TEXT NOT NULL)"
+        )
+        for name, (group_by, select_sql, description) in ROLLUPS.items():
+            conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+            conn.execute(f'CREATE TABLE "{name}" AS {select_sql}')
+            conn.execute(f'CREATE UNIQUE INDEX "ux_{name}" ON "{name}" ({", ".join(group_by)})')
+            rows = conn.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0]
+            conn.execute(
+                f"INSERT OR REPLACE INTO {REGISTRY_TABLE} VALUES (?, ?, ?, ?, ?, ?)",
+                (name, json.dumps([TABLE_NAME]), json.dumps(group_by), description, rows,
+                 time.strftime("%Y-%m-%d %H:%M:%S")),
+            )
+            print(f"Built {name}: {rows} rows")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    build_rollups()
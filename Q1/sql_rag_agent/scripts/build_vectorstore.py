@@ -1,9 +1,14 @@
+import argparse
+import hashlib
+import json
 import os
 import sqlite3
+import sys
+from collections import defaultdict
+
 import pandas as pd
 from dotenv import load_dotenv
 from langchain_community.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 
@@ -16,8 +21,15 @@ load_dotenv()
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(SCRIPT_DIR, '..', 'data', 'db', 'customer_support.db')
 CHROMA_PERSIST_DIR = os.path.join(SCRIPT_DIR, '..', 'vector_store', 'chroma_db')
+
+# Makes the 'app' package importable when run as `python scripts/build_vectorstore.py`
+sys.path.append(os.path.abspath(os.path.join(SCRIPT_DIR, '..')))
+from app.embeddings import get_embeddings
+
+MANIFEST_PATH = os.path.join(CHROMA_PERSIST_DIR, 'manifest.json')
 TABLE_NAME = "tech_support"
 COLUMN_TO_EMBED = "Tech_Response"  
+UPSERT_BATCH_SIZE = 512
 
 # --- 2. DATA LOADING ---
 def load_data_from_db():
@@ -54,43 +66,147 @@ def create_documents(df):
 
 # --- 4. CHUNKING ---
 def split_documents(documents):
-    """Splits the documents into smaller chunks for better embedding and retrieval."""
+    """
+    Splits the documents into smaller chunks for better embedding and retrieval.
+    Chunks are yielded document by document, so embedding can start before
+    the whole table has been split.
+    """
     print("Splitting documents into chunks...")
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=800,
         chunk_overlap=100,
         length_function=len,
     )
-    chunks = text_splitter.split_documents(documents)
-    print(f"Split documents into {len(chunks)} chunks.")
-    return chunks
+    for document in documents:
+        yield from text_splitter.split_documents([document])
+
+# --- 5. CHUNK IDS AND HASHES ---
+def chunk_hash(chunk):
+    """Hash of a chunk's text plus metadata; changes whenever either changes."""
+    payload = chunk.page_content + "\n" + json.dumps(chunk.metadata, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
-# --- 5. EMBEDDING AND STORAGE ---
-def create_and_store_embeddings(chunks):
-    """Creates embeddings and stores them in a ChromaDB persistent vector store."""
-    print("Generating embeddings and creating ChromaDB vector store...")
+def assign_chunk_ids(chunks):
+    """
+    Yields (id, chunk) pairs with a stable id, "<ticket_id>:<n>", where n
+    counts the ticket's chunks in order. The same ticket text always maps to
+    the same ids, so unchanged chunks can be recognised on the next run.
+    """
+    counters = defaultdict(int)
+    for chunk in chunks:
+        ticket_id = chunk.metadata["ticket_id"]
+        yield f"{ticket_id}:{counters[ticket_id]}", chunk
+        counters[ticket_id] += 1
 
+# --- 6. MANIFEST ---
+# The manifest records which chunk ids (and content hashes) are already
+# embedded in the Chroma collection.
+def load_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return None
+    with open(MANIFEST_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(manifest):
+    tmp_path = MANIFEST_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+# --- 7. EMBEDDING AND STORAGE ---
+def open_vector_store(embeddings):
+    """Opens (or creates) the persistent ChromaDB collection."""
     # Ensure the target directory exists
     if not os.path.exists(CHROMA_PERSIST_DIR):
         os.makedirs(CHROMA_PERSIST_DIR)
         print(f"Created directory: {CHROMA_PERSIST_DIR}")
 
-    # Initialize the embedding model
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+    return Chroma(persist_directory=CHROMA_PERSIST_DIR, embedding_function=embeddings)
+
+def create_and_store_embeddings(chunks, full_rebuild=False, embeddings=None):
+    """
+    Brings the ChromaDB store in line with `chunks` (any iterable), embedding
+    only chunks that are new or whose content/metadata changed and deleting
+    chunks that no longer exist. Changed chunks are embedded and upserted in
+    batches while the rest of the stream is still being read.
+    Returns a dict of counts.
+    """
+    print("Syncing chunks with the ChromaDB vector store...")
+    embeddings = embeddings or get_embeddings()
+    vector_store = open_vector_store(embeddings)
+    manifest = load_manifest()
 
-    # Create the Chroma vector store from the document chunks
-    # This will generate embeddings and save them to the specified directory
-    vector_store = Chroma.from_documents(
-        documents=chunks,
-        embedding=embeddings,
-        persist_directory=CHROMA_PERSIST_DIR
+    if manifest is not None and manifest.get("embedding_model") != embeddings.model_name:
+        print("Embedding model changed since the last build; rebuilding everything.")
+        full_rebuild = True
+    if manifest is None and vector_store._collection.count() > 0:
+        print("Existing store has no manifest; rebuilding everything.")
+        full_rebuild = True
+    if full_rebuild:
+        vector_store.delete_collection()
+        vector_store = open_vector_store(embeddings)
+        manifest = None
+
+    manifest = manifest or {"embedding_model": embeddings.model_name, "chunks": {}}
+    known = manifest["chunks"]
+    counts = {"added": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+    seen = set()
+    batch = []
+
+    def flush():
+        # Upsert and checkpoint the manifest after each batch, so an
+        # interrupted run resumes where it stopped
+        vector_store.add_documents(
+            [chunk for _, chunk, _ in batch],
+            ids=[chunk_id for chunk_id, _, _ in batch],
+        )
+        known.update({chunk_id: digest for chunk_id, _, digest in batch})
+        save_manifest(manifest)
+        print(f"Embedded {counts['added'] + counts['updated']} changed chunks so far...")
+        batch.clear()
+
+    for chunk_id, chunk in assign_chunk_ids(chunks):
+        seen.add(chunk_id)
+        digest = chunk_hash(chunk)
+        if known.get(chunk_id) == digest:
+            counts["unchanged"] += 1
+            continue
+        counts["updated" if chunk_id in known else "added"] += 1
+        batch.append((chunk_id, chunk, digest))
+        if len(batch) >= UPSERT_BATCH_SIZE:
+            flush()
+    if batch:
+        flush()
+
+    stale_ids = [chunk_id for chunk_id in known if chunk_id not in seen]
+    if stale_ids:
+        vector_store.delete(ids=stale_ids)
+        for chunk_id in stale_ids:
+            del known[chunk_id]
+        counts["deleted"] = len(stale_ids)
+
+    save_manifest(manifest)
+    print(
+        f"Vector store is up to date: {counts['added']} added, {counts['updated']} updated, "
+        f"{counts['deleted']} deleted, {counts['unchanged']} unchanged."
     )
-    print("Vector store created and saved successfully!")
+    print(f"Embedding stats: {embeddings.stats}")
     print(f"ChromaDB is persisting data to: {CHROMA_PERSIST_DIR}")
-    return vector_store
+    return counts
 
 # --- MAIN EXECUTION ---
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or update the support ticket vector store.")
+    parser.add_argument(
+        "--full", action="store_true",
+        help="drop the collection and re-embed every chunk instead of only the changed ones",
+    )
+    parser.add_argument(
+        "--embeddings", choices=["openai", "local"], default=None,
+        help="embedding backend (default: EMBEDDINGS_BACKEND or openai)",
+    )
+    args = parser.parse_args()
+
     # Step 1: Load data
     dataframe = load_data_from_db()
 
@@ -102,9 +218,11 @@ if __name__ == "__main__":
             # Step 3: Split documents
             doc_chunks = split_documents(docs)
 
-            # Step 4: Create and store embeddings
-            create_and_store_embeddings(doc_chunks)
+            # Step 4: Embed new/changed chunks and drop removed ones
+            create_and_store_embeddings(
+                doc_chunks, full_rebuild=args.full, embeddings=get_embeddings(args.embeddings)
+            )
         else:
             print("No documents were created. Please check the source data.")
     else:
-        print("Data loading failed or the DataFrame is empty. Halting execution.")
\ No newline at end of file
+        print("Data loading failed or the DataFrame is empty. Halting execution.")
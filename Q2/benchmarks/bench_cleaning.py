@@ -0,0 +1,118 @@
+# benchmarks/bench_cleaning.py
+#
+# Peak RSS and wall time of the in-memory vs streaming cleaning pipeline on
+# a synthetic amazon.csv-shaped file. Each run happens in a fresh process so
+# peak RSS is measured per mode; the input is generated row by row because
+# Linux carries the parent's peak RSS over into the child's ru_maxrss.
+#
+# Run from the Q2 directory:
+#     python -m benchmarks.bench_cleaning --rows 200000 500000 --chunksize 50000
+
+import argparse
+import csv
+import json
+import random
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+RUN_ONE = """
+import dataclasses, json, resource, sys, time
+from pathlib import Path
+from data_processing.clean_amazon import SPEC
+from data_processing.pipeline import clean_table
+
+tmp, chunksize = Path(sys.argv[1]), int(sys.argv[2]) or None
+spec = dataclasses.replace(
+    SPEC, input_file=tmp / "amazon.csv", output_file=tmp / "clean.parquet", sqlite_db=tmp / "amazon.db"
+)
+start = time.perf_counter()
+rows = clean_table(spec, chunksize=chunksize)
+print(json.dumps({
+    "rows_out": rows,
+    "seconds": round(time.perf_counter() - start, 3),
+    "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+}))
+"""
+
+
+AMAZON_COLUMNS = [
+    "product_id", "product_name", "category", "discounted_price", "actual_price",
+    "discount_percentage", "rating", "rating_count", "about_product", "user_id", "user_name",
+    "review_id", "review_title", "review_content", "img_link", "product_link",
+]
+
+
+def make_amazon_csv(path: Path, rows: int, duplicate_ratio: float = 0.05, seed: int = 0):
+    rng = random.Random(seed)
+    recent = []
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=AMAZON_COLUMNS)
+        writer.writeheader()
+        for i in range(rows):
+            if recent and rng.random() < duplicate_ratio:
+                writer.writerow(rng.choice(recent))
+                continue
+            record = _amazon_record(rng, i)
+            writer.writerow(record)
+            # Duplicates are drawn from the last 1000 distinct rows
+            if len(recent) < 1000:
+                recent.append(record)
+            else:
+                recent[i % 1000] = record
+
+
+def _amazon_record(rng: random.Random, i: int) -> dict:
+    actual = rng.randint(100, 50000)
+    discounted = rng.randint(50, actual)
+    return {
+        "product_id": f"B{i:09d}",
+        "product_name": f"Product {i} " + "x" * rng.randint(20, 120),
+        "category": rng.choice(["Electronics", "Computers&Accessories", "Home&Kitchen", "OfficeProducts"]),
+        "discounted_price": f"₹{discounted:,}",
+        "actual_price": f"₹{actual:,}",
+        "discount_percentage": f"{round(100 * (actual - discounted) / actual)}%",
+        "rating": rng.choice(["4.1", "3.9", "4.5", "|", "4.0"]),
+        "rating_count": f"{rng.randint(0, 500000):,}",
+        "about_product": "about " * rng.randint(10, 80),
+        "user_id": f"U{rng.randint(0, 10**6)}",
+        "user_name": "someone",
+        "review_id": f"R{i}",
+        "review_title": "title",
+        "review_content": "review " * rng.randint(5, 60),
+        "img_link": "https://example.com/img.jpg",
+        "product_link": "https://example.com/p",
+    }
+
+
+def run_mode(tmp: Path, chunksize: int) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", RUN_ONE, str(tmp), str(chunksize or 0)],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark in-memory vs streaming cleaning.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 300000])
+    parser.add_argument("--chunksize", type=int, default=50000)
+    args = parser.parse_args()
+
+    report = []
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp = Path(tmp_dir)
+            make_amazon_csv(tmp / "amazon.csv", rows)
+            input_mb = (tmp / "amazon.csv").stat().st_size / 1024 / 1024
+            for mode, chunksize in [("in_memory", None), ("streaming", args.chunksize)]:
+                result = run_mode(tmp, chunksize)
+                result.update(mode=mode, rows_in=rows, input_mb=round(input_mb, 1))
+                report.append(result)
+                print(json.dumps(result))
+    return report
+
+
+if __name__ == "__main__":
+    main()
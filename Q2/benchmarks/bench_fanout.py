@@ -0,0 +1,82 @@
+# benchmarks/bench_fanout.py
+#
+# Compares sequential vs concurrent per-source agents in process_user_query
+# using a stub LLM that sleeps instead of calling OpenAI.
+#
+# Run from the Q2 directory:
+#     python -m benchmarks.bench_fanout --llm-latency 0.5
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from langchain_core.language_models.fake import FakeListLLM
+
+import rag.main as rag_main
+from rag.agents import query_agent
+from rag.config import DB_PATHS
+
+
+class SleepyLLM(FakeListLLM):
+    """
+    Plays a two-step ReAct script (list tables, then answer) and sleeps
+    on every call to stand in for GPT-4 latency.
+    """
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.sleep or 0)
+        if "Action: sql_db_list_tables" in prompt:
+            return "Thought: I now know the final answer\nFinal Answer: 42"
+        return "Thought: I should look at the tables\nAction: sql_db_list_tables\nAction Input: "
+
+
+def make_source_dbs(tmp_dir, sources):
+    for source in sources:
+        path = os.path.join(tmp_dir, f"{source}.db")
+        conn = sqlite3.connect(path)
+        conn.execute(f"CREATE TABLE {source}_products (product TEXT, price REAL)")
+        conn.commit()
+        conn.close()
+        DB_PATHS[source] = path
+
+
+def time_query(query, concurrent, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        rag_main.process_user_query(query, concurrent=concurrent, use_cache=False)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds slept per LLM call")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    sources = ["amazon", "bigbasket"]
+    query = "Compare prices on amazon and bigbasket"
+
+    query_agent.llm = SleepyLLM(responses=[""], sleep=args.llm_latency)
+    rag_main.generate_summary = lambda results: "\n".join(f"{k}: {v}" for k, v in results.items())
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        make_source_dbs(tmp_dir, sources)
+        sequential = time_query(query, concurrent=False, repeats=args.repeats)
+        concurrent = time_query(query, concurrent=True, repeats=args.repeats)
+
+    single_source = 2 * args.llm_latency  # two LLM rounds per agent
+    print(f"LLM latency per call : {args.llm_latency:.2f}s")
+    print(f"Slowest single source: ~{single_source:.2f}s")
+    print(f"Sequential           : {sequential:.2f}s")
+    print(f"Concurrent           : {concurrent:.2f}s")
+    print(f"Speed-up             : {sequential / concurrent:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/bench_formats.py
+#
+# Cleaned-artifact formats: CSV (the old cleaned_data/*.csv) versus the
+# Parquet files the pipeline now writes, on synthetic Olist-style orders /
+# order_items tables. Reports file size, time to read everything back,
+# time to read two columns (column projection), whether the dates come
+# back as timestamps, and the time to load SQLite from each.
+#
+# Run from the Q2 directory:
+#     python -m benchmarks.bench_formats --orders 200000
+
+import argparse
+import dataclasses
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.bench_loader import make_tables
+from data_processing.clean_ecommerce_data import SPECS
+from data_processing.columnar import iter_parquet, read_parquet, write_parquet
+from data_processing.pipeline import table_loader
+
+PROJECTION = {"orders": ["order_status", "order_purchase_timestamp"], "order_items": ["product_id", "price"]}
+
+
+def _timed(fn, repeats: int = 3):
+    best, result = None, None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best * 1000, 1), result
+
+
+def bench_table(tmp: Path, name: str, df: pd.DataFrame) -> dict:
+    spec = {spec.table: spec for spec in SPECS}[name]
+    csv_path, parquet_path = tmp / f"{name}.csv", tmp / f"{name}.parquet"
+    df.to_csv(csv_path, index=False)
+    write_parquet(df, parquet_path)
+
+    csv_full_ms, csv_df = _timed(lambda: pd.read_csv(csv_path))
+    parquet_full_ms, parquet_df = _timed(lambda: read_parquet(parquet_path))
+    csv_cols_ms, _ = _timed(lambda: pd.read_csv(csv_path, usecols=PROJECTION[name]))
+    parquet_cols_ms, _ = _timed(lambda: read_parquet(parquet_path, columns=PROJECTION[name]))
+
+    def load_sqlite(chunks, db_name):
+        with table_loader(dataclasses.replace(spec, sqlite_db=tmp / db_name)) as loader:
+            for chunk in chunks:
+                loader.write(chunk)
+
+    # CSV dates go in as the text they already are; Parquet timestamps are
+    # formatted by the loader, so the load itself is about even
+    csv_load_ms, _ = _timed(lambda: load_sqlite(pd.read_csv(csv_path, chunksize=65536), "csv.db"), repeats=1)
+    parquet_load_ms, _ = _timed(lambda: load_sqlite(iter_parquet(parquet_path), "parquet.db"), repeats=1)
+
+    date_columns = [c for c in df.columns if pd.api.types.is_datetime64_any_dtype(df[c])]
+    report = {
+        "table": name,
+        "rows": len(df),
+        "csv_mb": round(csv_path.stat().st_size / 1024 / 1024, 2),
+        "parquet_mb": round(parquet_path.stat().st_size / 1024 / 1024, 2),
+        "read_all_ms": {"csv": csv_full_ms, "parquet": parquet_full_ms},
+        "read_2_columns_ms": {"csv": csv_cols_ms, "parquet": parquet_cols_ms},
+        "sqlite_load_ms": {"csv": csv_load_ms, "parquet": parquet_load_ms},
+    }
+    if date_columns:
+        report["dates_typed"] = {
+            "csv": all(pd.api.types.is_datetime64_any_dtype(csv_df[c]) for c in date_columns),
+            "parquet": all(pd.api.types.is_datetime64_any_dtype(parquet_df[c]) for c in date_columns),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CSV vs Parquet cleaned artifacts.")
+    parser.add_argument("--orders", type=int, default=200000)
+    args = parser.parse_args()
+
+    tables = make_tables(args.orders)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, df in tables.items():
+            print(json.dumps(bench_table(Path(tmp_dir), name, df)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/bench_fts.py
+#
+# Keyword lookups over review text on a synthetic amazon_products table:
+# the LIKE '%word%' queries the agents used to write (a full scan of every
+# row's text) versus the FTS5 index the loader now builds, queried through
+# rag.db.text_search (BM25-ranked, top k). Prints index build time, size,
+# query plans and p50 latency per search.
+#
+# Run from the Q2 directory:
+#     python -m benchmarks.bench_fts --rows 200000
+
+import argparse
+import dataclasses
+import json
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_cleaning import make_amazon_csv
+from data_processing.clean_amazon import SPEC
+from data_processing.pipeline import clean_table
+from rag.config import DB_PATHS
+from rag.db import text_search
+
+SOURCE = "amazon"
+WORDS = ["charger", "bluetooth", "warranty", "stainless", "refund", "backlight", "cable"]
+
+
+def add_review_words(db_path: Path, seed: int = 0):
+    """Sprinkles searchable words into the generated review text (each in ~0.3% of rows)."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT rowid FROM amazon_products").fetchall()
+    updates = [(" ".join(rng.sample(WORDS, 2)), rowid) for (rowid,) in rows if rng.random() < 0.01]
+    conn.executemany("UPDATE amazon_products SET review_content = review_content || ' ' || ? WHERE rowid = ?",
+                     updates)
+    conn.commit()
+    conn.close()
+
+
+def timed(fn, repeats: int = 20) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(timings), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LIKE scans vs FTS5 search.")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp = Path(tmp_dir)
+        make_amazon_csv(tmp / "amazon.csv", args.rows)
+        spec = dataclasses.replace(
+            SPEC, input_file=tmp / "amazon.csv", output_file=tmp / "amazon.parquet", sqlite_db=tmp / "amazon.db",
+            fts=[],
+        )
+        clean_table(spec)
+        add_review_words(spec.sqlite_db)
+
+        from data_processing.fts import build_fts
+        conn = sqlite3.connect(spec.sqlite_db, isolation_level=None)
+        start = time.perf_counter()
+        for index in SPEC.fts:
+            build_fts(conn, index)
+        build_seconds = time.perf_counter() - start
+        conn.close()
+        DB_PATHS[SOURCE] = os.path.abspath(spec.sqlite_db)
+
+        conn = sqlite3.connect(spec.sqlite_db)
+        like_sql = ("SELECT product_id, product_name FROM amazon_products "
+                    "WHERE review_content LIKE ? OR product_name LIKE ? OR about_product LIKE ? LIMIT ?")
+        print(json.dumps({
+            "rows": args.rows,
+            "fts_build_seconds": round(build_seconds, 2),
+            "db_mb": round(os.path.getsize(spec.sqlite_db) / 1024 / 1024, 1),
+            "like_plan": [r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + like_sql, ("%a%",) * 3 + (1,))],
+            "fts_plan": [r[3] for r in conn.execute(
+                'EXPLAIN QUERY PLAN SELECT rowid FROM "_fts_amazon_products" WHERE "_fts_amazon_products" MATCH ?',
+                ("a",))],
+        }))
+        for phrase in ["charger", "bluetooth warranty", "stainless refund cable"]:
+            words = phrase.split()
+            # What an agent writes for "products whose reviews mention ..."
+            like_ms = timed(lambda: conn.execute(like_sql, (f"%{words[0]}%",) * 3 + (args.k,)).fetchall())
+            like_all_ms = timed(lambda: conn.execute(
+                "SELECT COUNT(*) FROM amazon_products WHERE " + " AND ".join(["review_content LIKE ?"] * len(words)),
+                [f"%{w}%" for w in words]).fetchall(), repeats=5)
+            fts_ms = timed(lambda: text_search.search(SOURCE, phrase, k=args.k))
+            hits = text_search.search(SOURCE, phrase, k=args.k)
+            print(json.dumps({
+                "search": phrase, "like_first_k_ms": like_ms, "like_count_ms": like_all_ms,
+                "fts_top_k_ms": fts_ms, "fts_hits": len(hits),
+            }))
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# benchmarks/bench_guard.py
+#
+# Memory and output size of agent-style queries with and without the query
+# guard (rag/db/query_guard.py), on a synthetic order_items table. Each
+# query is run through CachedSQLDatabase.run_no_throw exactly as the
+# sql_db_query tool does; peak Python memory is measured with tracemalloc
+# and output size in tokens (what lands in the agent's context).
+#
+# Run from the Q2 directory:
+#     python -m benchmarks.bench_guard --rows 300000
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+from rag.cache.query_cache import QueryResultCache
+from rag.config import DB_PATHS
+from rag.db.connection_pool import get_engine
+from rag.db.sql_database import CachedSQLDatabase
+
+SOURCE = "bench_guard"
+
+QUERIES = [
+    "SELECT * FROM order_items",
+    "SELECT * FROM order_items ORDER BY price DESC",
+    "SELECT seller_id, SUM(price) FROM order_items GROUP BY seller_id",
+    "SELECT * FROM order_items WHERE product_id = 'p42'",
+]
+
+# EXPLAIN QUERY PLAN names these scans by alias ("SCAN oi"); the guard has
+# to reject them like the unaliased forms above
+ALIASED = [
+    "SELECT oi.seller_id, SUM(oi.price) FROM order_items oi GROUP BY oi.seller_id",
+    "SELECT * FROM order_items AS oi ORDER BY oi.price DESC",
+]
+
+
+def count_tokens(text: str) -> int:
+    try:
+        import tiktoken
+        return len(tiktoken.get_encoding("cl100k_base").encode(text))
+    except Exception:
+        return len(text) // 4 + 1
+
+
+def make_db(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE order_items (order_id TEXT, order_item_id INTEGER, product_id TEXT, seller_id TEXT, "
+        "price REAL, freight_value REAL, PRIMARY KEY (order_id, order_item_id))"
+    )
+    conn.executemany(
+        "INSERT INTO order_items VALUES (?, ?, ?, ?, ?, ?)",
+        ((f"o{i // 2}", i % 2 + 1, f"p{i % 3000}", f"s{i % 900}", float(i % 700), 5.0) for i in range(rows)),
+    )
+    conn.execute("CREATE INDEX ix_order_items_product_id ON order_items (product_id)")
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def measure(db, query):
+    tracemalloc.start()
+    start = time.perf_counter()
+    output = db.run_no_throw(query)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024, count_tokens(str(output)), elapsed, str(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the SQL query guard.")
+    parser.add_argument("--rows", type=int, default=300_000)
+    parser.add_argument("--max-scan-rows", type=int, default=100_000,
+                        help="guard threshold for rejecting sorted/aggregated full scans")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        DB_PATHS[SOURCE] = os.path.join(tmp_dir, "bench.db")
+        make_db(DB_PATHS[SOURCE], args.rows)
+        engine = get_engine(SOURCE)
+        # Separate empty caches so neither run is served from memory
+        plain = CachedSQLDatabase(engine, source=SOURCE, cache=QueryResultCache(), guard=False)
+        guarded = CachedSQLDatabase(engine, source=SOURCE, cache=QueryResultCache(), guard=True)
+        guarded.guard.max_scan_rows = args.max_scan_rows
+
+        print(f"{'query':<66} {'peak MB':>16} {'tokens':>18} {'seconds':>14}")
+        for query in QUERIES:
+            p_mem, p_tok, p_s, _ = measure(plain, query)
+            g_mem, g_tok, g_s, g_out = measure(guarded, query)
+            print(f"{query:<66} {p_mem:7.1f} -> {g_mem:6.1f} {p_tok:9,} -> {g_tok:6,} {p_s:6.2f} -> {g_s:5.2f}")
+            print(f"    guarded: {g_out.splitlines()[0][:110]}")
+
+        if args.rows > args.max_scan_rows:
+            for query in ALIASED:
+                output = str(guarded.run_no_throw(query))
+                assert output.startswith("Error: this query would read all"), f"aliased scan not rejected: {query}"
+            print(f"aliased full scans rejected: {len(ALIASED)}/{len(ALIASED)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+# benchmarks/bench_join.py
+#
+# Join-path planner on an Olist-shaped database: prints the planned join
+# path for typical multi-table questions and the planner's build/plan time,
+# then runs the SQL agent on each question with and without the planner
+# (tool + hint) and reports agent steps (tool calls) per question.
+#
+# By default the agent runs on ScriptedChatModel with join_step(): a ReAct
+# policy that only knows how tables join from what it has read, either
+# the planner's hint or table schemas. Without the hint it lists the
+# tables and reads schemas until the needed tables are linked by shared
+# columns; with the hint it reads the path's schemas and queries. Those
+# step counts are a simulation: they follow from that policy, not from
+# what a real model does, and are labelled as such in the output. --live
+# uses the real GPT-4 agent instead (needs OPENAI_API_KEY) and is what to
+# quote for the planner's effect on agent steps.
+#
+# Run from the Q2 directory:
+#     python -m benchmarks.bench_join
+#     python -m benchmarks.bench_join --db sqlite/ecommerce.db --live
+
+import argparse
+import os
+import re
+import sqlite3
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("RAG_AGENT_VERBOSE", "0")
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from benchmarks.harness import ScriptedChatModel
+from rag.config import DB_PATHS
+from rag.db import join_planner
+from rag.db.join_planner import JoinPlanner
+
+SOURCE = "ecommerce"
+
+QUESTIONS = [
+    ("What is the average review score for each product category in English?",
+     ["order_reviews", "category_translation"]),
+    ("Which product categories have the most delivered orders?",
+     ["orders", "category_translation"]),
+    ("What is the total price of items in orders with a 1-star review?",
+     ["order_items", "order_reviews"]),
+    ("Which sellers sell the heaviest products?",
+     ["order_items", "products"]),
+]
+
+
+def make_db(path, orders: int = 5000):
+    """Same tables, keys and indexes as clean_ecommerce_data.py produces."""
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE orders (order_id TEXT PRIMARY KEY, customer_id TEXT, order_status TEXT,
+                             order_purchase_timestamp TEXT);
+        CREATE INDEX ix_orders_customer_id ON orders (customer_id);
+        CREATE TABLE order_items (order_id TEXT, order_item_id INTEGER, product_id TEXT, seller_id TEXT,
+                                  price REAL, freight_value REAL, PRIMARY KEY (order_id, order_item_id));
+        CREATE INDEX ix_order_items_product_id ON order_items (product_id);
+        CREATE INDEX ix_order_items_seller_id ON order_items (seller_id);
+        CREATE TABLE order_reviews (review_id TEXT, order_id TEXT, review_score INTEGER,
+                                    review_comment_message TEXT);
+        CREATE INDEX ix_order_reviews_order_id ON order_reviews (order_id);
+        CREATE TABLE products (product_id TEXT PRIMARY KEY, product_category_name TEXT, product_weight_g REAL);
+        CREATE INDEX ix_products_category ON products (product_category_name);
+        CREATE TABLE category_translation (product_category_name TEXT PRIMARY KEY,
+                                           product_category_name_english TEXT);
+    """)
+    categories = [f"categoria_{i}" for i in range(20)]
+    conn.executemany("INSERT INTO category_translation VALUES (?, ?)",
+                     [(c, c.replace("categoria", "category")) for c in categories])
+    conn.executemany("INSERT INTO products VALUES (?, ?, ?)",
+                     [(f"p{i}", categories[i % 20], 100.0 + i) for i in range(500)])
+    conn.executemany("INSERT INTO orders VALUES (?, ?, ?, ?)",
+                     [(f"o{i}", f"c{i % 3000}", "delivered", "2018-01-01 00:00:00") for i in range(orders)])
+    conn.executemany("INSERT INTO order_items VALUES (?, ?, ?, ?, ?, ?)",
+                     [(f"o{i // 2}", i % 2 + 1, f"p{i % 500}", f"s{i % 90}", 10.0, 1.0) for i in range(orders * 2)])
+    conn.executemany("INSERT INTO order_reviews VALUES (?, ?, ?, ?)",
+                     [(f"r{i}", f"o{i}", i % 5 + 1, "") for i in range(orders)])
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+class StepCounter(BaseCallbackHandler):
+    def __init__(self):
+        self.steps = 0
+
+    def on_agent_action(self, action, **kwargs):
+        self.steps += 1
+
+
+HINT_MARKER = "Join path between the relevant tables:"
+
+
+def _schemas(observations) -> dict:
+    """{table: [columns]} from the sql_db_schema observations so far."""
+    tables = {}
+    for text in observations:
+        for table, body in re.findall(r'CREATE TABLE "?(\w+)"? \((.*?)\n\)', text, re.S):
+            tables[table] = [c for c in re.findall(r'^\s*"?(\w+)"? \w+', body, re.M)
+                             if c.upper() not in ("PRIMARY", "FOREIGN", "UNIQUE", "CHECK", "CONSTRAINT")]
+    return tables
+
+
+def _shared_column_path(schemas: dict, tables):
+    """JOIN lines linking `tables` through shared column names, or None if the schemas read don't link them."""
+    lines, joined = [f"FROM {tables[0]}"], {tables[0]}
+    for target in tables[1:]:
+        # Breadth-first over tables whose schema has been read
+        parents, frontier = {t: None for t in joined}, list(joined)
+        while frontier and target not in parents:
+            table = frontier.pop(0)
+            for other, columns in schemas.items():
+                shared = set(schemas.get(table, [])) & set(columns)
+                if other not in parents and shared:
+                    parents[other] = (table, sorted(shared)[0])
+                    frontier.append(other)
+        if target not in parents:
+            return None
+        node, chain = target, []
+        while parents[node] is not None:
+            table, column = parents[node]
+            chain.append(f"JOIN {node} ON {node}.{column} = {table}.{column}")
+            node = table
+        for line in reversed(chain):
+            table = line.split()[1]
+            if table not in joined:
+                lines.append(line)
+                joined.add(table)
+    return lines
+
+
+def join_step(prompt: str):
+    """
+    Next (tool, input) of a ReAct agent answering one of QUESTIONS, or
+    ("answer", text). It reads the schemas of the question's tables; with
+    the planner's hint it queries along the hinted path, without it it
+    lists the tables and reads the schema of the unread table whose name
+    suggests a column it has seen, until the question's tables link up.
+    """
+    scratchpad = prompt[prompt.rfind("\nQuestion: "):]
+    question = scratchpad.split("\n", 2)[1][len("Question: "):]
+    tables = next(t for q, t in QUESTIONS if question.startswith(q))
+    actions = re.findall(r"\nAction: (\w+)\nAction Input: (.*?)\nObservation: (.*?)(?=\nThought:|\Z)",
+                         scratchpad, re.S)
+    if any(action == "sql_db_query" for action, _, _ in actions):
+        return "answer", actions[-1][2].strip()[:300]
+    schemas = _schemas([obs for action, _, obs in actions if action == "sql_db_schema"])
+
+    if HINT_MARKER in scratchpad:
+        hinted = scratchpad[scratchpad.index(HINT_MARKER):]
+        path = [line for line in hinted.split("\n")[1:] if line.startswith(("FROM ", "JOIN "))]
+        path_tables = [line.split()[1] for line in path]
+        if not all(t in schemas for t in path_tables):
+            return "sql_db_schema", ", ".join(path_tables)
+        return "sql_db_query", "SELECT COUNT(*) " + " ".join(path)
+
+    listed = [obs for action, _, obs in actions if action == "sql_db_list_tables"]
+    if not listed:
+        return "sql_db_list_tables", ""
+    if not all(t in schemas for t in tables):
+        return "sql_db_schema", ", ".join(tables)
+    path = _shared_column_path(schemas, tables)
+    if path is not None:
+        return "sql_db_query", "SELECT COUNT(*) " + " ".join(path)
+    # Read the unread table whose name suggests a key already seen
+    known = {c for columns in schemas.values() for c in columns}
+    unread = [t.strip() for t in listed[0].split(",") if t.strip() and t.strip() not in schemas]
+    probe = max(unread, key=lambda t: (len(set(_columns_of(t)) & known), -unread.index(t)))
+    return "sql_db_schema", probe
+
+
+def _columns_of(table: str) -> list:
+    # What an agent guesses from a table's name before reading it: the
+    # name's words as likely key columns (products -> product_id)
+    stem = table[:-1] if table.endswith("s") else table
+    return [f"{stem}_id", f"{stem}_name", stem]
+
+
+def run_agent(questions, enabled: bool, llm=None):
+    """(mean agent steps, median latency in s, LLM calls) per question, with or without the planner."""
+    from rag.agents import query_agent
+
+    if llm is not None:
+        query_agent.llm = llm
+        llm.stats.clear()
+    query_agent.JOIN_PLANNER_ENABLED = enabled
+    join_planner.JOIN_PLANNER_ENABLED = enabled
+    query_agent.invalidate(SOURCE)
+    agent = query_agent.get_agent(SOURCE)
+    database = query_agent.get_database(SOURCE)
+
+    steps, latencies = [], []
+    for question, tables in questions:
+        counter = StepCounter()
+        hint = join_planner.join_hint(SOURCE, tables)
+        start = time.perf_counter()
+        with database.scoped_tables(None):
+            agent.invoke({"input": f"{question}\n\n{hint}" if hint else question}, config={"callbacks": [counter]})
+        latencies.append(time.perf_counter() - start)
+        steps.append(counter.steps)
+    calls = llm.stats.get("calls", 0) / len(questions) if llm is not None else None
+    return statistics.mean(steps), statistics.median(latencies), calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the join-path planner.")
+    parser.add_argument("--db", default=None, help="existing ecommerce.db (default: a synthetic one)")
+    parser.add_argument("--live", action="store_true",
+                        help="run the real GPT-4 agent instead of simulating it with the scripted one")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds per scripted LLM call")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.db:
+            DB_PATHS[SOURCE] = os.path.abspath(args.db)
+        else:
+            DB_PATHS[SOURCE] = os.path.join(tmp_dir, "ecommerce.db")
+            make_db(DB_PATHS[SOURCE])
+
+        conn = sqlite3.connect(DB_PATHS[SOURCE])
+        start = time.perf_counter()
+        planner = JoinPlanner.from_connection(conn)
+        build_ms = (time.perf_counter() - start) * 1000
+        conn.close()
+
+        print(f"Key graph: {len(planner.facts)} tables, {len(planner.edges)} edges, built in {build_ms:.1f} ms")
+        for edge in planner.edges:
+            print(f"  {edge['child']}.{edge['column']} -> {edge['parent']}.{edge['ref_column']} "
+                  f"(weight {edge['weight']:.2f})")
+
+        for question, tables in QUESTIONS:
+            start = time.perf_counter()
+            plan = planner.describe(tables)
+            plan_ms = (time.perf_counter() - start) * 1000
+            print(f"\n{question}\n  tables: {', '.join(tables)}  (planned in {plan_ms:.2f} ms)")
+            print("  " + plan.replace("\n", "\n  "))
+
+        llm = None if args.live else ScriptedChatModel(step_fn=join_step, latency=args.llm_latency, stats={})
+        without_steps, without_latency, without_calls = run_agent(QUESTIONS, enabled=False, llm=llm)
+        with_steps, with_latency, with_calls = run_agent(QUESTIONS, enabled=True, llm=llm)
+        if args.live:
+            print(f"\nAgent (GPT-4), {len(QUESTIONS)} questions:")
+        else:
+            print(f"\nAgent (SIMULATED: scripted join_step policy, not a real model), {len(QUESTIONS)} questions;"
+                  f" run with --live for measured step counts")
+        print(f"Agent steps / question : {without_steps:.2f} -> {with_steps:.2f}")
+        if llm is not None:
+            print(f"LLM calls / question   : {without_calls:.2f} -> {with_calls:.2f}")
+        print(f"Latency p50 / question : {without_latency:.2f}s -> {with_latency:.2f}s")
+
+if __name__ == "__main__":
+    main()
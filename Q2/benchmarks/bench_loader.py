@@ -0,0 +1,117 @@
+# benchmarks/bench_loader.py
+#
+# Load time and typical agent query latency for the old df.to_sql() path
+# versus data_processing.sqlite_loader.TableLoader, on synthetic Olist-style
+# orders / order_items tables.
+#
+# Run from the Q2 directory:
+#     python -m benchmarks.bench_loader --orders 100000
+
+import argparse
+import dataclasses
+import json
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_processing.clean_ecommerce_data import SPECS
+from data_processing.pipeline import table_loader
+
+QUERIES = {
+    "order_lookup": "SELECT * FROM orders WHERE order_id = 'o{pick}'",
+    "items_for_product": "SELECT COUNT(*), SUM(price) FROM order_items WHERE product_id = 'p{pick_product}'",
+    "order_join": (
+        "SELECT o.order_status, i.price FROM orders o JOIN order_items i ON i.order_id = o.order_id "
+        "WHERE o.order_id = 'o{pick}'"
+    ),
+    "status_filter": "SELECT COUNT(*) FROM orders WHERE order_status = 'canceled'",
+}
+
+
+def make_tables(n_orders: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    order_ids = np.array([f"o{i}" for i in range(n_orders)])
+    purchase = pd.Timestamp("2017-01-01") + pd.to_timedelta(rng.integers(0, 600, n_orders), unit="D")
+    orders = pd.DataFrame({
+        "order_id": order_ids,
+        "customer_id": [f"c{i}" for i in rng.integers(0, n_orders, n_orders)],
+        "order_status": rng.choice(["delivered", "shipped", "canceled", "invoiced"], n_orders, p=[0.9, 0.05, 0.03, 0.02]),
+        "order_purchase_timestamp": purchase,
+        "order_approved_at": purchase + pd.Timedelta(hours=2),
+        "order_delivered_carrier_date": purchase + pd.Timedelta(days=2),
+        "order_delivered_customer_date": purchase + pd.Timedelta(days=8),
+        "order_estimated_delivery_date": purchase + pd.Timedelta(days=15),
+    })
+    items_per_order = rng.integers(1, 3, n_orders)
+    n_items = int(items_per_order.sum())
+    order_items = pd.DataFrame({
+        "order_id": np.repeat(order_ids, items_per_order),
+        "order_item_id": np.concatenate([np.arange(1, k + 1) for k in items_per_order]),
+        "product_id": [f"p{i}" for i in rng.integers(0, max(n_orders // 3, 1), n_items)],
+        "seller_id": [f"s{i}" for i in rng.integers(0, 3000, n_items)],
+        "shipping_limit_date": "2018-01-01 00:00:00",
+        "price": rng.uniform(5, 500, n_items).round(2),
+        "freight_value": rng.uniform(1, 50, n_items).round(2),
+    })
+    return {"orders": orders, "order_items": order_items}
+
+
+def load_to_sql(db_path: Path, tables: dict):
+    conn = sqlite3.connect(db_path)
+    for name, df in tables.items():
+        df.to_sql(name, conn, if_exists="replace", index=False)
+    conn.close()
+
+
+def load_bulk(db_path: Path, tables: dict):
+    specs = {spec.table: spec for spec in SPECS}
+    for name, df in tables.items():
+        spec = dataclasses.replace(specs[name], sqlite_db=db_path)
+        with table_loader(spec) as loader:
+            loader.write(df)
+
+
+def time_queries(db_path: Path, n_orders: int, repeats: int = 50):
+    rng = np.random.default_rng(1)
+    conn = sqlite3.connect(db_path)
+    latencies = {}
+    for name, template in QUERIES.items():
+        timings = []
+        for _ in range(repeats):
+            sql = template.format(pick=rng.integers(0, n_orders), pick_product=rng.integers(0, max(n_orders // 3, 1)))
+            start = time.perf_counter()
+            conn.execute(sql).fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+        latencies[name] = round(statistics.median(timings), 3)
+    conn.close()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark to_sql vs the bulk SQLite loader.")
+    parser.add_argument("--orders", type=int, default=100000)
+    args = parser.parse_args()
+
+    tables = make_tables(args.orders)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for mode, load in [("to_sql", load_to_sql), ("bulk_loader", load_bulk)]:
+            db_path = Path(tmp_dir) / f"{mode}.db"
+            start = time.perf_counter()
+            load(db_path, tables)
+            load_seconds = time.perf_counter() - start
+            print(json.dumps({
+                "mode": mode,
+                "orders": args.orders,
+                "order_items": len(tables["order_items"]),
+                "load_seconds": round(load_seconds, 3),
+                "query_p50_ms": time_queries(db_path, args.orders),
+            }))
+
+
+if __name__ == "__main__":
+    main()
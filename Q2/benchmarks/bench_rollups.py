@@ -0,0 +1,95 @@
+# benchmarks/bench_rollups.py
+#
+# Typical aggregate questions answered from the base table vs from the
+# rollups built by data_processing (bigbasket shape, synthetic rows). Prints
+# the query plan and p50 latency of each pair, plus the rollup build time.
+#
+# Run from the Q2 directory:
+#     python -m benchmarks.bench_rollups --rows 500000
+
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_processing.clean_bigbasket import ROLLUPS
+from data_processing.rollups import refresh_rollups
+from data_processing.sqlite_loader import TableLoader
+
+PAIRS = [
+    ("top discounted brands",
+     "SELECT brand, AVG(discount_percentage) AS d FROM bigbasket_products GROUP BY brand ORDER BY d DESC LIMIT 10",
+     "SELECT brand, avg_discount_percentage FROM bigbasket_brand_summary "
+     "ORDER BY avg_discount_percentage DESC LIMIT 10"),
+    ("average rating of one category",
+     "SELECT AVG(rating) FROM bigbasket_products WHERE category = 'category_3'",
+     "SELECT SUM(avg_rating * products) / SUM(products) FROM bigbasket_category_summary "
+     "WHERE category = 'category_3'"),
+    ("products per brand",
+     "SELECT COUNT(*) FROM bigbasket_products WHERE brand = 'brand_42'",
+     "SELECT products FROM bigbasket_brand_summary WHERE brand = 'brand_42'"),
+]
+
+
+def make_table(db_path, rows):
+    rng = np.random.default_rng(0)
+    market = rng.uniform(20, 2000, rows).round(2)
+    sale = (market * rng.uniform(0.5, 1.0, rows)).round(2)
+    df = pd.DataFrame({
+        "product": [f"product_{i}" for i in range(rows)],
+        "category": [f"category_{i}" for i in rng.integers(0, 11, rows)],
+        "sub_category": [f"sub_{i}" for i in rng.integers(0, 90, rows)],
+        "brand": [f"brand_{i}" for i in rng.integers(0, 2000, rows)],
+        "sale_price": sale,
+        "market_price": market,
+        "type": "generic",
+        "rating": rng.uniform(1, 5, rows).round(1),
+        "description": "",
+        "discount_percentage": ((market - sale) / market * 100).round(2),
+    })
+    with TableLoader(db_path, "bigbasket_products", indexes=[["category"], ["brand"], ["rating"]]) as loader:
+        loader.write(df)
+
+
+def p50(conn, sql, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        conn.execute(sql).fetchall()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def plan(conn, sql):
+    return "; ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rollup tables against base-table aggregates.")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "bigbasket.db")
+        make_table(db_path, args.rows)
+        start = time.perf_counter()
+        refresh_rollups(db_path, ROLLUPS)
+        print(f"Rollups built in {time.perf_counter() - start:.2f}s over {args.rows:,} rows\n")
+
+        conn = sqlite3.connect(db_path)
+        for label, base_sql, rollup_sql in PAIRS:
+            base_ms, rollup_ms = p50(conn, base_sql, args.repeats), p50(conn, rollup_sql, args.repeats)
+            print(f"{label}: {base_ms:.2f} ms -> {rollup_ms:.3f} ms ({base_ms / rollup_ms:.0f}x)")
+            print(f"    base  : {plan(conn, base_sql)}")
+            print(f"    rollup: {plan(conn, rollup_sql)}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# benchmarks/bench_router.py
+#
+# How much traffic the templated-SQL fast path (rag/router.py) takes off the
+# agents, and how much faster it answers. Builds the synthetic datasets,
+# then answers a question mix twice with process_user_query, with the
+# router off and on; agents and summary use ScriptedChatModel with a
+# configurable latency, so the agent path costs what an LLM would.
+#
+# Run from the Q2 directory:
+#     python -m benchmarks.bench_router --scale 5000 --llm-latency 0.3
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("RAG_AGENT_VERBOSE", "0")
+
+import rag.main as rag_main
+from benchmarks.bench_suite import point_sources_at
+from benchmarks.harness import ScriptedChatModel, build_datasets, latency_stats, run_metadata, write_results
+from rag import router
+from rag.agents import query_agent
+from rag.cache.query_cache import query_cache
+from rag.chains import summarization_chain
+from rag.db import connection_pool
+
+# (question, should it take the fast path)
+QUESTIONS = [
+    ("How many orders were delivered?", True),
+    ("Order status breakdown", True),
+    ("How many cancelled orders are there?", True),
+    ("Top 10 rated products on amazon", True),
+    ("Which amazon products have the best ratings?", True),
+    ("Show me the 3 most discounted products on bigbasket", True),
+    ("What is the price of product 12 on bigbasket?", True),
+    ("Top rated amazon electronics", False),
+    ("Cheapest beverages on bigbasket", False),
+    ("Which products have the most reviews?", False),
+    ("Compare highly rated products on amazon and bigbasket", False),
+    ("How many orders by payment type?", False),
+    ("How many orders were delivered in 2017?", False),
+    ("Top rated products on amazon with 4 stars", False),
+    ("Top 5 discounted products on bigbasket with 50 percent off", False),
+]
+
+
+def run_mix(questions, enabled: bool) -> dict:
+    rag_main.ROUTER_ENABLED = enabled
+    query_cache.invalidate()
+    by_path = {"fast": [], "agent": []}
+    start = time.perf_counter()
+    for question, _ in questions:
+        fast_before = router.stats()["fast_path"]
+        t0 = time.perf_counter()
+        rag_main.process_user_query(question, use_cache=False)
+        took = time.perf_counter() - t0
+        by_path["fast" if router.stats()["fast_path"] > fast_before else "agent"].append(took)
+    wall = time.perf_counter() - start
+    n = len(questions)
+    return {
+        "router": enabled, "questions": n, "wall_s": round(wall, 3),
+        **latency_stats(by_path["fast"] + by_path["agent"]),
+        "fast_path_share": round(len(by_path["fast"]) / n, 3),
+        "fast_path": latency_stats(by_path["fast"]) if by_path["fast"] else None,
+        "agent_path": latency_stats(by_path["agent"]) if by_path["agent"] else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the templated-SQL fast path.")
+    parser.add_argument("--scale", type=int, default=5000, help="orders per dataset")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the question mix")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds per LLM call")
+    parser.add_argument("--output", default="-", help='JSON results file ("-" prints them)')
+    args = parser.parse_args()
+
+    llm = ScriptedChatModel(latency=args.llm_latency)
+    query_agent.llm = llm
+    summarization_chain.summarizer = summarization_chain.make_summarizer(llm)
+    questions = QUESTIONS * args.repeat
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp = Path(tmp_dir)
+        specs = build_datasets(tmp, args.scale)["specs"]
+        sources = point_sources_at(specs, str(tmp / "schema_index"))
+        # Misrouted questions are the ones that matter most
+        routed = {q: router.route(q) is not None for q, _ in QUESTIONS}
+        wrong = [q for q, expected in QUESTIONS if routed[q] != expected]
+        for q in wrong:
+            print(f"  unexpected route for {q!r}: fast path={routed[q]}")
+        for enabled in (False, True):
+            results.append(run_mix(questions, enabled))
+            print("  " + ", ".join(f"{k}={v}" for k, v in results[-1].items()))
+        results.append({"misrouted": wrong, "router_stats": router.stats()})
+        for source in sources:
+            connection_pool.get_pool(source).close()
+    write_results(args.output, run_metadata(args), results)
+
+
+if __name__ == "__main__":
+    main()
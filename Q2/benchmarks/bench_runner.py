@@ -0,0 +1,127 @@
+# benchmarks/bench_runner.py
+#
+# Wall time of data_processing.run_all on synthetic copies of all three
+# datasets (amazon, bigbasket and the five Olist tables):
+#   - full build on one worker (the old one-script-at-a-time behaviour)
+#   - full build on --jobs workers
+#   - rebuild with nothing changed (every task skipped by content hash)
+#   - rebuild after one input file changed (only its downstream tasks run)
+#
+# Run from the Q2 directory:
+#     python -m benchmarks.bench_runner --orders 100000 --jobs 8
+
+import argparse
+import dataclasses
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_cleaning import make_amazon_csv
+from benchmarks.bench_loader import make_tables
+from data_processing.run_all import build_tasks, dataset_specs, run
+
+
+def make_inputs(tmp: Path, n_orders: int, seed: int = 0) -> dict:
+    """Writes one synthetic input CSV per table; returns {table: path}."""
+    rng = np.random.default_rng(seed)
+    tables = make_tables(n_orders, seed)
+    n_products = max(n_orders // 3, 1)
+    categories = [f"categoria_{i}" for i in range(70)]
+    tables["products"] = pd.DataFrame({
+        "product_id": [f"p{i}" for i in range(n_products)],
+        "product_category_name": rng.choice(categories, n_products),
+        "product_name_lenght": rng.integers(10, 60, n_products),
+        "product_description_lenght": rng.integers(50, 3000, n_products),
+        "product_photos_qty": rng.integers(1, 6, n_products),
+        "product_weight_g": rng.integers(50, 20000, n_products),
+        "product_length_cm": rng.integers(10, 100, n_products),
+        "product_height_cm": rng.integers(2, 100, n_products),
+        "product_width_cm": rng.integers(6, 100, n_products),
+    })
+    tables["order_reviews"] = pd.DataFrame({
+        "review_id": [f"r{i}" for i in range(n_orders)],
+        "order_id": tables["orders"]["order_id"],
+        "review_score": rng.integers(1, 6, n_orders),
+        "review_comment_title": None,
+        "review_comment_message": rng.choice(["", "ótimo", "chegou antes do prazo", "não recebi"], n_orders),
+        "review_creation_date": "2018-01-10 00:00:00",
+        "review_answer_timestamp": "2018-01-11 12:00:00",
+    })
+    tables["category_translation"] = pd.DataFrame({
+        "product_category_name": categories,
+        "product_category_name_english": [c.replace("categoria", "category") for c in categories],
+    })
+    n_bigbasket = n_orders // 4
+    tables["bigbasket_products"] = pd.DataFrame({
+        "index": np.arange(n_bigbasket),
+        "product": [f"product {i}" for i in range(n_bigbasket)],
+        "category": rng.choice(["Beverages", "Snacks & Branded Foods", "Beauty & Hygiene"], n_bigbasket),
+        "sub_category": rng.choice(["Tea", "Coffee", "Chips", "Skin Care"], n_bigbasket),
+        "brand": [f"brand {i}" for i in rng.integers(0, 2000, n_bigbasket)],
+        "sale_price": rng.uniform(10, 900, n_bigbasket).round(2),
+        "market_price": rng.uniform(900, 1200, n_bigbasket).round(2),
+        "type": rng.choice([" Green Tea", "Instant Coffee ", "Face Wash"], n_bigbasket),
+        "rating": rng.choice([3.5, 4.0, 4.2, np.nan], n_bigbasket),
+        "description": "description " * 8,
+    })
+
+    paths = {}
+    for table, df in tables.items():
+        paths[table] = tmp / "inputs" / f"{table}.csv"
+        paths[table].parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(paths[table], index=False)
+    paths["amazon_products"] = tmp / "inputs" / "amazon_products.csv"
+    make_amazon_csv(paths["amazon_products"], n_orders)
+    return paths
+
+
+def timed_run(specs, jobs: int, state_path: Path) -> dict:
+    start = time.perf_counter()
+    report = run(build_tasks(specs), jobs=jobs, state_path=state_path)
+    wall = time.perf_counter() - start
+    statuses = {}
+    for r in report:
+        statuses[r["status"]] = statuses.get(r["status"], 0) + 1
+    return {"wall_seconds": round(wall, 3), "tasks": statuses,
+            "task_seconds": round(sum(r["seconds"] for r in report), 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the parallel cleaning runner.")
+    parser.add_argument("--orders", type=int, default=50000)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp = Path(tmp_dir)
+        inputs = make_inputs(tmp, args.orders)
+
+        def specs_in(out: Path):
+            return [
+                dataclasses.replace(
+                    spec, input_file=inputs[spec.table], output_file=out / f"{spec.table}.parquet",
+                    sqlite_db=out / f"{spec.sqlite_db.name}",
+                )
+                for spec in dataset_specs()
+            ]
+
+        results = {}
+        serial = specs_in(tmp / "serial")
+        results["full_1_worker"] = timed_run(serial, 1, tmp / "serial" / "state.json")
+        parallel = specs_in(tmp / "parallel")
+        results[f"full_{args.jobs}_workers"] = timed_run(parallel, args.jobs, tmp / "parallel" / "state.json")
+        results["unchanged"] = timed_run(parallel, args.jobs, tmp / "parallel" / "state.json")
+        pd.read_csv(inputs["orders"]).iloc[:-1].to_csv(inputs["orders"], index=False)
+        results["orders_changed"] = timed_run(parallel, args.jobs, tmp / "parallel" / "state.json")
+
+        for name, result in results.items():
+            print(json.dumps({"run": name, "orders": args.orders, "cpus": os.cpu_count(), **result}))
+
+
+if __name__ == "__main__":
+    main()
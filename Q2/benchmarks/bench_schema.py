@@ -0,0 +1,148 @@
+# benchmarks/bench_schema.py
+#
+# Prompt size and end-to-end latency of a multi-table question with and
+# without semantic table selection (rag.db.schema_index), on a synthetic
+# 30+ table database shaped like the Olist ecommerce.db plus unrelated
+# tables. The LLM is a ReAct stub that lists tables, asks for the schema of
+# everything it was shown, then answers; it sleeps for a fixed time plus a
+# per-prompt-token cost. Embeddings come from a local hashing embedder, so
+# no API key is needed.
+#
+# Run from the Q2 directory:
+#     python -m benchmarks.bench_schema --questions 5
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+import numpy as np
+from langchain_core.language_models.fake import FakeListLLM
+
+import rag.main as rag_main
+from benchmarks.harness import HashingEmbeddings
+from rag.agents import query_agent
+from rag.config import DB_PATHS
+from rag.db import schema_index
+
+SOURCE = "ecommerce"
+
+TABLES = {
+    "orders": ["order_id", "customer_id", "order_status", "order_purchase_timestamp", "order_delivered_customer_date"],
+    "order_items": ["order_id", "order_item_id", "product_id", "seller_id", "price", "freight_value"],
+    "order_reviews": ["review_id", "order_id", "review_score", "review_comment_message"],
+    "order_payments": ["order_id", "payment_type", "payment_installments", "payment_value"],
+    "products": ["product_id", "product_category_name", "product_weight_g", "product_photos_qty"],
+    "category_translation": ["product_category_name", "product_category_name_english"],
+    "customers": ["customer_id", "customer_city", "customer_state"],
+    "sellers": ["seller_id", "seller_city", "seller_state"],
+    "geolocation": ["zip_code_prefix", "lat", "lng", "city", "state"],
+}
+# Unrelated tables a large warehouse would also contain
+for area, cols in {
+    "hr": ["employee_id", "department", "salary", "hire_date", "manager_id"],
+    "marketing": ["campaign_id", "channel", "budget", "start_date", "clicks"],
+    "web": ["session_id", "page", "referrer", "duration_seconds", "device"],
+    "inventory": ["warehouse_id", "sku", "stock_level", "reorder_point", "updated_at"],
+    "finance": ["ledger_id", "account", "debit", "credit", "posted_at"],
+    "support": ["ticket_id", "agent", "priority", "opened_at", "closed_at"],
+}.items():
+    for suffix in ("events", "snapshots", "audit", "daily", "archive"):
+        TABLES[f"{area}_{suffix}"] = cols
+
+QUESTIONS = [
+    "What is the average review score for each product category in English?",
+    "Which sellers have the highest total freight value on delivered orders?",
+    "How many orders were paid with credit card per customer state?",
+    "Which product categories have the most orders?",
+    "What share of orders with a 1-star review were delivered late?",
+]
+
+
+def count_tokens(text: str) -> int:
+    try:
+        import tiktoken
+        return len(tiktoken.get_encoding("cl100k_base").encode(text))
+    except Exception:
+        return len(text) // 4 + 1
+
+
+class SchemaReadingLLM(FakeListLLM):
+    """list tables -> schema of every listed table -> answer, sleeping per prompt token."""
+
+    prompt_tokens: list = []
+    per_token: float = 0.0
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        tokens = count_tokens(prompt)
+        self.prompt_tokens.append(tokens)
+        time.sleep((self.sleep or 0) + tokens * self.per_token)
+        if "Action: sql_db_schema" in prompt:
+            return "Thought: I now know the final answer\nFinal Answer: 42"
+        if "Action: sql_db_list_tables" in prompt:
+            listed = prompt.rsplit("Observation:", 1)[1].split("\n")[0].strip()
+            return f"Thought: I need their schema\nAction: sql_db_schema\nAction Input: {listed}"
+        return "Thought: I should look at the tables\nAction: sql_db_list_tables\nAction Input: "
+
+
+def make_db(path):
+    rng = np.random.default_rng(0)
+    conn = sqlite3.connect(path)
+    for table, columns in TABLES.items():
+        conn.execute(f"CREATE TABLE {table} ({', '.join(f'{c} TEXT' for c in columns)})")
+        rows = [[f"{c}_{rng.integers(0, 20)}" for c in columns] for _ in range(50)]
+        conn.executemany(f"INSERT INTO {table} VALUES ({', '.join('?' for _ in columns)})", rows)
+    conn.commit()
+    conn.close()
+
+
+def run(questions, enabled, llm):
+    schema_index.SCHEMA_INDEX_ENABLED = enabled
+    per_question_tokens, latencies = [], []
+    for question in questions:
+        llm.prompt_tokens.clear()
+        start = time.perf_counter()
+        rag_main.run_source_agent(SOURCE, question)
+        latencies.append(time.perf_counter() - start)
+        per_question_tokens.append(sum(llm.prompt_tokens))
+    return np.mean(per_question_tokens), np.median(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark semantic table selection.")
+    parser.add_argument("--questions", type=int, default=len(QUESTIONS))
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="fixed seconds per LLM call")
+    parser.add_argument("--per-token", type=float, default=0.0002, help="extra seconds per prompt token")
+    args = parser.parse_args()
+
+    llm = SchemaReadingLLM(responses=[""], sleep=args.llm_latency, per_token=args.per_token, prompt_tokens=[])
+    query_agent.llm = llm
+    questions = QUESTIONS[:args.questions]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        DB_PATHS[SOURCE] = os.path.join(tmp_dir, "ecommerce.db")
+        make_db(DB_PATHS[SOURCE])
+        index = schema_index.SchemaIndex(SOURCE, embeddings=HashingEmbeddings(), index_dir=tmp_dir)
+        schema_index._indexes[SOURCE] = index
+
+        start = time.perf_counter()
+        index.tables()
+        build_time = time.perf_counter() - start
+        for question in questions:
+            print(f"  {question}\n    -> {index.select_tables(question)}")
+
+        full_tokens, full_latency = run(questions, False, llm)
+        scoped_tokens, scoped_latency = run(questions, True, llm)
+
+    print(f"\nTables in database      : {len(TABLES)}")
+    print(f"Schema index build      : {build_time * 1000:.0f} ms (once per db version)")
+    print(f"Prompt tokens / question: {full_tokens:,.0f} -> {scoped_tokens:,.0f} "
+          f"({1 - scoped_tokens / full_tokens:.0%} fewer)")
+    print(f"Latency p50 / question  : {full_latency:.2f}s -> {scoped_latency:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
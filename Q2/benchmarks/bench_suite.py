@@ -0,0 +1,181 @@
+# benchmarks/bench_suite.py
+#
+# Offline end-to-end benchmark of the Q2 stack at several data scales, with
+# machine-readable JSON results for comparing runs (e.g. before and after a
+# change, on the same machine). For each scale it:
+#
+#   cleaning  builds synthetic copies of every dataset through
+#             data_processing.run_all (clean -> Parquet -> SQLite, rollups,
+#             FTS indexes): wall time, input rows/s, child peak memory
+#   schema    builds the semantic schema index of each source
+#   query     answers a fixed question mix with process_user_query: the
+#             agents and the summary use ScriptedChatModel (canned tool
+#             calls, configurable latency), embeddings are local. Reports
+#             throughput, latency percentiles, peak memory, LLM calls and
+#             tokens, SQL statements and pool checkouts per question, and
+#             the per-stage breakdown from rag.tracing
+#
+# Run from the Q2 directory:
+#     python -m benchmarks.bench_suite --scales 1000 10000 --output results/bench.json
+#     python -m benchmarks.bench_suite --scales 5000 --llm-latency 0.2 --clients 4
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("RAG_AGENT_VERBOSE", "0")
+
+import rag.main as rag_main
+from benchmarks.harness import (
+    HashingEmbeddings, ScriptedChatModel, build_datasets, latency_stats, peak_rss_mb, run_metadata,
+    write_results,
+)
+from rag import tracing
+from rag.agents import query_agent
+from rag.cache.query_cache import query_cache
+from rag.chains import summarization_chain
+from rag.config import DB_PATHS
+from rag.db import connection_pool, schema_index
+
+QUESTIONS = [
+    "Which amazon products have the best ratings?",
+    "Cheapest beverages on bigbasket",
+    "Compare highly rated products on amazon and bigbasket",
+    "Which products have the most reviews?",
+    "Show me bigbasket tea brands under 200 rupees",
+    "Top rated amazon electronics",
+]
+
+
+def bench_cleaning(tmp: Path, scale: int, jobs: int) -> tuple:
+    built = build_datasets(tmp, scale, jobs=jobs)
+    statuses = {}
+    for r in built["report"]:
+        statuses[r["status"]] = statuses.get(r["status"], 0) + 1
+    dbs = {spec.sqlite_db for spec in built["specs"]}
+    return built["specs"], {
+        "suite": "cleaning", "scale": scale, "jobs": jobs,
+        "wall_s": round(built["seconds"], 3),
+        "input_rows": built["input_rows"],
+        "rows_per_s": round(built["input_rows"] / built["seconds"], 1),
+        "tasks": statuses,
+        "task_s": round(sum(r["seconds"] for r in built["report"]), 3),
+        "db_mb": round(sum(os.path.getsize(db) for db in dbs) / 1024 / 1024, 2),
+        "child_peak_rss_mb": peak_rss_mb(children=True),
+    }
+
+
+def point_sources_at(specs, index_dir: str) -> dict:
+    """Points DB_PATHS at the built databases and gives each a local-embedding schema index."""
+    sources = {}
+    for spec in specs:
+        source = spec.sqlite_db.stem
+        DB_PATHS[source] = str(spec.sqlite_db.resolve())
+        sources[source] = spec.sqlite_db
+    query_agent.invalidate()
+    with schema_index._indexes_lock:
+        schema_index._indexes.clear()
+        for source in sources:
+            schema_index._indexes[source] = schema_index.SchemaIndex(
+                source, embeddings=HashingEmbeddings(), index_dir=index_dir
+            )
+    return sources
+
+
+def bench_schema(scale: int, sources) -> dict:
+    timings = {}
+    for source in sources:
+        start = time.perf_counter()
+        schema_index.get_schema_index(source).tables()
+        timings[source] = round(time.perf_counter() - start, 4)
+    return {"suite": "schema_index", "scale": scale, "build_s": timings}
+
+
+def pool_checkouts(sources) -> int:
+    return sum(connection_pool.get_pool(source).stats()["checkouts"] for source in sources)
+
+
+def bench_query(scale: int, sources, llm: ScriptedChatModel, questions, clients: int, trace_path: str) -> dict:
+    # One warm-up pass builds the agents and schema indexes; memoized SQL
+    # results are dropped, so each distinct question reaches SQLite once
+    for question in questions:
+        rag_main.process_user_query(question, use_cache=False)
+    query_cache.invalidate()
+
+    llm.stats.clear()
+    checkouts_before = pool_checkouts(sources)
+    tracing.enable(trace_path)
+
+    def ask(question):
+        start = time.perf_counter()
+        rag_main.process_user_query(question, use_cache=False)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    if clients > 1:
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            latencies = list(pool.map(ask, questions))
+    else:
+        latencies = [ask(q) for q in questions]
+    wall = time.perf_counter() - start
+    tracing.disable()
+    tracing.close()
+
+    spans = list(tracing.read_spans(trace_path))
+    stages = tracing.latency_report(spans)
+    n = len(questions)
+    return {
+        "suite": "query", "scale": scale, "questions": n, "clients": clients,
+        "throughput_qps": round(n / wall, 3),
+        **latency_stats(latencies),
+        "peak_rss_mb": peak_rss_mb(),
+        "llm_calls_per_question": round(llm.stats.get("calls", 0) / n, 2),
+        "prompt_tokens_per_question": round(llm.stats.get("prompt_tokens", 0) / n, 1),
+        "sql_statements_per_question": round(sum(1 for s in spans if s["name"] == "sql") / n, 2),
+        "pool_checkouts_per_question": round((pool_checkouts(sources) - checkouts_before) / n, 2),
+        "stages": {name: {k: v for k, v in row.items() if k in ("count", "p50_ms", "p95_ms", "p99_ms")}
+                   for name, row in stages.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite (cleaning, schema index, query path).")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10000], help="orders per dataset")
+    parser.add_argument("--questions", type=int, default=len(QUESTIONS) * 3)
+    parser.add_argument("--clients", type=int, default=1, help="questions answered concurrently")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds per LLM call")
+    parser.add_argument("--per-token", type=float, default=0.0, help="extra seconds per prompt token")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="cleaning runner workers")
+    parser.add_argument("--output", default="-", help='JSON results file ("-" prints them)')
+    args = parser.parse_args()
+
+    llm = ScriptedChatModel(latency=args.llm_latency, per_token=args.per_token)
+    query_agent.llm = llm
+    summarization_chain.summarizer = summarization_chain.make_summarizer(llm)
+    questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(args.questions)]
+
+    metadata = run_metadata(args)
+    results = []
+    for scale in args.scales:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp = Path(tmp_dir)
+            specs, cleaning = bench_cleaning(tmp, scale, args.jobs)
+            results.append(cleaning)
+            sources = point_sources_at(specs, str(tmp / "schema_index"))
+            results.append(bench_schema(scale, sources))
+            results.append(bench_query(scale, sources, llm, questions, args.clients, str(tmp / "traces.jsonl")))
+            for result in results[-3:]:
+                print(f"  {result['suite']:<12} scale={scale}: "
+                      + ", ".join(f"{k}={v}" for k, v in result.items()
+                                  if k not in ("suite", "scale", "stages", "tasks")))
+            for source in sources:
+                connection_pool.get_pool(source).close()
+    write_results(args.output, metadata, results)
+
+
+if __name__ == "__main__":
+    main()
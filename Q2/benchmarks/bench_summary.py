@@ -0,0 +1,110 @@
+# benchmarks/bench_summary.py
+#
+# Cost of the summary stage. Builds the synthetic datasets, then answers
+# single-source and multi-source questions with process_user_query (router
+# off, so every question goes through the agents), with the summary
+# short-circuit off (always one LLM call over everything, as before) and on.
+# Agents and summary use separate ScriptedChatModels, so summary calls and
+# tokens are counted on their own; --per-token makes latency grow with the
+# prompt like a real model's. Also reports how much the size-aware merge
+# trims a prompt with one oversized answer.
+#
+# Run from the Q2 directory:
+#     python -m benchmarks.bench_summary --scale 5000 --llm-latency 0.3 --per-token 0.0005
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("RAG_AGENT_VERBOSE", "0")
+
+import rag.main as rag_main
+from benchmarks.bench_suite import point_sources_at
+from benchmarks.harness import ScriptedChatModel, build_datasets, count_tokens, latency_stats, run_metadata, \
+    write_results
+from rag.agents import query_agent
+from rag.cache.query_cache import query_cache
+from rag.chains import summarization_chain
+from rag.db import connection_pool
+
+MIXES = {
+    "single_source": [
+        "Top rated amazon electronics",
+        "Cheapest beverages on bigbasket",
+        "Which sellers have the most late deliveries?",
+    ],
+    "multi_source": [
+        "Which products have the most reviews?",
+        "Compare highly rated products on amazon and bigbasket",
+    ],
+}
+
+
+def run_mix(questions, summary_llm: ScriptedChatModel, agent_llm: ScriptedChatModel, short_circuit: bool) -> dict:
+    summarization_chain.SUMMARY_SHORT_CIRCUIT = short_circuit
+    query_cache.invalidate()
+    summary_llm.stats.clear()
+    agent_llm.stats.clear()
+    latencies = []
+    for question in questions:
+        start = time.perf_counter()
+        rag_main.process_user_query(question, use_cache=False)
+        latencies.append(time.perf_counter() - start)
+    n = len(questions)
+    return {
+        "short_circuit": short_circuit, "questions": n, **latency_stats(latencies),
+        "summary_calls_per_question": round(summary_llm.stats.get("calls", 0) / n, 2),
+        "summary_prompt_tokens_per_question": round(summary_llm.stats.get("prompt_tokens", 0) / n, 1),
+        "total_prompt_tokens_per_question": round(
+            (summary_llm.stats.get("prompt_tokens", 0) + agent_llm.stats.get("prompt_tokens", 0)) / n, 1),
+    }
+
+
+def bench_merge() -> dict:
+    results = {"amazon": "row, " * 5000, "bigbasket": "Tata Tea Gold costs 245 rupees.", "zepto": "Error: timed out"}
+    untrimmed = summarization_chain._join_results(results)
+    _, joined, _ = summarization_chain._plan(results)
+    return {"suite": "merge", "untrimmed_tokens": count_tokens(untrimmed), "merged_tokens": count_tokens(joined),
+            "short_answer_kept": results["bigbasket"] in joined}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the summary stage.")
+    parser.add_argument("--scale", type=int, default=5000, help="orders per dataset")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over each question mix")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds per LLM call")
+    parser.add_argument("--per-token", type=float, default=0.0002, help="extra seconds per prompt token")
+    parser.add_argument("--output", default="-", help='JSON results file ("-" prints them)')
+    args = parser.parse_args()
+
+    agent_llm = ScriptedChatModel(latency=args.llm_latency, per_token=args.per_token, stats={})
+    summary_llm = ScriptedChatModel(latency=args.llm_latency, per_token=args.per_token, stats={})
+    query_agent.llm = agent_llm
+    summarization_chain.summarizer = summarization_chain.make_summarizer(summary_llm)
+    rag_main.ROUTER_ENABLED = False
+
+    results = [bench_merge()]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp = Path(tmp_dir)
+        specs = build_datasets(tmp, args.scale)["specs"]
+        sources = point_sources_at(specs, str(tmp / "schema_index"))
+        # Warm-up: builds the agents and schema indexes
+        for questions in MIXES.values():
+            for question in questions:
+                rag_main.process_user_query(question, use_cache=False)
+        for mix, questions in MIXES.items():
+            for short_circuit in (False, True):
+                results.append({"suite": mix, **run_mix(questions * args.repeat, summary_llm, agent_llm,
+                                                        short_circuit)})
+        for result in results:
+            print("  " + ", ".join(f"{k}={v}" for k, v in result.items()))
+        for source in sources:
+            connection_pool.get_pool(source).close()
+    write_results(args.output, run_metadata(args), results)
+
+
+if __name__ == "__main__":
+    main()
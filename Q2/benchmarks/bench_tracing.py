@@ -0,0 +1,90 @@
+# benchmarks/bench_tracing.py
+#
+# Cost of request tracing (rag/tracing.py): per-span overhead with tracing
+# off and on (JSONL and SQLite sinks), and p50 latency of point lookups
+# through CachedSQLDatabase plus a fake chat model call with the callback
+# handler attached, off vs on. Ends with the per-stage report built from
+# the spans just written, as `python -m rag.tracing` prints it.
+#
+# Run from the Q2 directory:
+#     python -m benchmarks.bench_tracing --requests 2000
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from benchmarks.bench_guard import make_db
+from rag import tracing
+from rag.cache.query_cache import QueryResultCache
+from rag.config import DB_PATHS
+from rag.db.connection_pool import get_engine
+from rag.db.sql_database import CachedSQLDatabase
+
+SOURCE = "bench_tracing"
+
+
+def span_cost_us(n: int) -> float:
+    # Nested in one request, as stage spans are
+    with tracing.trace("spans"):
+        start = time.perf_counter()
+        for i in range(n):
+            with tracing.span("noop", i=i) as s:
+                s.set(done=True)
+        return (time.perf_counter() - start) / n * 1e6
+
+
+def request_p50_ms(db, llm, n: int) -> float:
+    timings = []
+    for i in range(n):
+        start = time.perf_counter()
+        with tracing.trace("request", query=f"product p{i % 3000}"):
+            with tracing.span("agent", source=SOURCE):
+                llm.invoke("which product?", config={"callbacks": tracing.callbacks()})
+                db.run(f"SELECT * FROM order_items WHERE product_id = 'p{i % 3000}'")
+            with tracing.span("summary"):
+                llm.invoke("summarise", config={"callbacks": tracing.callbacks()})
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tracing overhead.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--spans", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        DB_PATHS[SOURCE] = os.path.join(tmp_dir, "bench.db")
+        make_db(DB_PATHS[SOURCE], args.rows)
+        # No result memoization, so every request reaches SQLite
+        db = CachedSQLDatabase(get_engine(SOURCE), source=SOURCE, cache=QueryResultCache(max_bytes=0), guard=False)
+        llm = FakeListChatModel(responses=["p42 is a charger"])
+
+        tracing.disable()
+        request_p50_ms(db, llm, 200)  # warm-up
+        off_span = span_cost_us(args.spans)
+        off_request = request_p50_ms(db, llm, args.requests)
+        print(f"tracing off: {off_span:7.3f} us/span, request p50 {off_request:.3f} ms")
+
+        for name in ("traces.jsonl", "traces.db"):
+            path = os.path.join(tmp_dir, name)
+            tracing.enable(path)
+            on_span = span_cost_us(args.spans)
+            on_request = request_p50_ms(db, llm, args.requests)
+            tracing.disable()
+            print(f"tracing on ({name}): {on_span:7.3f} us/span, request p50 {on_request:.3f} ms "
+                  f"(+{on_request - off_request:.3f} ms)")
+
+        print()
+        spans = tracing.read_spans(os.path.join(tmp_dir, "traces.jsonl"))
+        tracing.print_report(tracing.latency_report(r for r in spans if r["name"] not in ("noop", "spans")))
+        tracing.close()
+
+
+if __name__ == "__main__":
+    main()
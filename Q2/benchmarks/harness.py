@@ -0,0 +1,193 @@
+# benchmarks/harness.py
+#
+# Offline stand-ins shared by the benchmarks, so nothing needs an API key:
+#   - HashingEmbeddings: deterministic local embedder
+#   - ScriptedChatModel: chat model that replays a scripted ReAct exchange
+#     (list tables -> schema -> canned SQL -> final answer) with a
+#     configurable per-call and per-prompt-token latency, and counts calls
+#     and tokens
+#   - build_datasets(): synthetic copies of every dataset at a given scale,
+#     built by the real cleaning runner, so the SQLite files match ours
+#   - small helpers for percentiles, peak memory and JSON results
+
+import dataclasses
+import hashlib
+import json
+import os
+import platform
+import re
+import resource
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from rag.tracing import percentile
+
+# Canned query the scripted agent runs against each dataset's main table
+CANNED_SQL = {
+    "amazon_products": "SELECT product_name, rating FROM amazon_products WHERE rating >= 4 "
+                       "ORDER BY rating_count DESC LIMIT 5",
+    "bigbasket_products": "SELECT product, sale_price FROM bigbasket_products WHERE category = 'Beverages' "
+                          "ORDER BY sale_price LIMIT 5",
+    "orders": "SELECT order_status, COUNT(*) FROM orders GROUP BY order_status",
+}
+SUMMARY_MARKER = "Summarize the product-related results"
+
+
+class HashingEmbeddings:
+    """Deterministic bag-of-words embedder (crudely stemmed), good enough to rank schema text."""
+
+    def __init__(self, size: int = 512):
+        self.size = size
+
+    def embed_query(self, text):
+        vector = np.zeros(self.size, dtype=np.float32)
+        for word in re.findall(r"[a-z]+", text.lower().replace("_", " ")):
+            word = word[:-1] if word.endswith("s") and len(word) > 3 else word
+            digest = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "little")
+            vector[digest % self.size] += 1.0
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+
+def count_tokens(text: str) -> int:
+    # Rough, but cheap enough to call on every prompt
+    return len(text) // 4 + 1
+
+
+def react_step(prompt: str):
+    """
+    Next (tool, tool input) of the scripted SQL-agent exchange for `prompt`,
+    or ("answer", text): list tables, read the main table's schema, run its
+    canned query, answer with the result. The summary prompt is answered
+    directly.
+    """
+    if SUMMARY_MARKER in prompt:
+        sources = re.findall(r"^Source: (\w+)", prompt, re.M)
+        return "answer", f"Summary of {len(sources)} sources: {', '.join(sources)}."
+    scratchpad = prompt[prompt.rfind("\nQuestion: "):]
+    observations = re.findall(r"\nObservation: (.*?)(?=\nThought:|\Z)", scratchpad, re.S)
+    if not observations:
+        return "sql_db_list_tables", ""
+    tables = [t.strip() for t in observations[0].split(",") if t.strip()]
+    table = next((t for t in CANNED_SQL if t in tables), tables[0] if tables else "")
+    if len(observations) == 1:
+        return "sql_db_schema", table
+    if len(observations) == 2:
+        return "sql_db_query", CANNED_SQL.get(table, f"SELECT COUNT(*) FROM {table}")
+    return "answer", observations[-1].strip()[:300]
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Chat model that answers from `step_fn(prompt)` (default: react_step)
+    in ReAct text format, after sleeping `latency` seconds plus `per_token`
+    seconds per prompt token. `stats` counts calls and tokens; reported
+    token usage feeds rag.tracing like a real model's would.
+    """
+
+    step_fn: object = react_step
+    latency: float = 0.0
+    per_token: float = 0.0
+    stats: dict = {}
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-chat"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        prompt = "\n".join(str(m.content) for m in messages)
+        prompt_tokens = count_tokens(prompt)
+        time.sleep(self.latency + prompt_tokens * self.per_token)
+        kind, value = self.step_fn(prompt)
+        if kind == "answer":
+            text = f"Thought: I now know the final answer\nFinal Answer: {value}"
+        else:
+            text = f"Thought: I should use {kind}\nAction: {kind}\nAction Input: {value}"
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": count_tokens(text)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        with _stats_lock:
+            self.stats["calls"] = self.stats.get("calls", 0) + 1
+            for key, value in usage.items():
+                self.stats[key] = self.stats.get(key, 0) + value
+        message = AIMessage(content=text, usage_metadata={
+            "input_tokens": usage["prompt_tokens"], "output_tokens": usage["completion_tokens"],
+            "total_tokens": usage["total_tokens"],
+        })
+        return ChatResult(generations=[ChatGeneration(message=message)],
+                          llm_output={"token_usage": usage, "model_name": self._llm_type})
+
+
+_stats_lock = threading.Lock()
+
+
+def build_datasets(tmp: Path, scale: int, jobs: int = 1) -> dict:
+    """
+    Synthetic inputs for every dataset with `scale` orders (and as many
+    Amazon rows), cleaned and loaded by data_processing.run_all into
+    tmp/db. Returns the specs, the runner's report, wall time and input rows.
+    """
+    from benchmarks.bench_runner import make_inputs
+    from data_processing.run_all import build_tasks, dataset_specs, run
+
+    inputs = make_inputs(tmp, scale)
+    out = tmp / "db"
+    specs = [
+        dataclasses.replace(
+            spec, input_file=inputs[spec.table], output_file=out / f"{spec.table}.parquet",
+            sqlite_db=out / spec.sqlite_db.name,
+        )
+        for spec in dataset_specs()
+    ]
+    input_rows = 0
+    for path in inputs.values():
+        with open(path, "rb") as f:
+            input_rows += sum(1 for _ in f) - 1
+    start = time.perf_counter()
+    report = run(build_tasks(specs), jobs=jobs, state_path=out / "state.json")
+    return {"specs": specs, "report": report, "seconds": time.perf_counter() - start, "input_rows": input_rows}
+
+
+def latency_stats(seconds) -> dict:
+    values = sorted(s * 1000 for s in seconds)
+    return {
+        "p50_ms": round(percentile(values, 50), 3), "p95_ms": round(percentile(values, 95), 3),
+        "p99_ms": round(percentile(values, 99), 3), "mean_ms": round(sum(values) / max(len(values), 1), 3),
+    }
+
+
+def peak_rss_mb(children: bool = False) -> float:
+    """Peak resident memory so far of this process (or of its finished child processes)."""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    return round(usage.ru_maxrss / 1024, 1)
+
+
+def run_metadata(args) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "commit": commit, "python": platform.python_version(), "platform": platform.platform(),
+        "cpus": os.cpu_count(), "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "args": vars(args),
+    }
+
+
+def write_results(path, metadata: dict, results: list):
+    """Writes {"meta", "results"} as JSON to `path` ("-" prints it)."""
+    text = json.dumps({"meta": metadata, "results": results}, indent=2, default=str)
+    if path == "-":
+        print(text)
+        return
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Path(path).write_text(text + "\n", encoding="utf-8")
+    print(f"Results written to {path}")
@@ -1,19 +1,16 @@
+# Run from the Q2 directory:
+#     python -m data_processing.clean_amazon [--chunksize 50000] [--load-only] [--csv]
+
 import pandas as pd
-import sqlite3
-from pathlib import Path
 
-# Input/output paths
-input_file = Path("../datasets/amazon/amazon.csv")
-output_clean_csv = Path("../cleaned_data/clean_amazon.csv")
-sqlite_db = Path("../sqlite/amazon.db")   # ✅ changed
+from data_processing.fts import FtsIndex
+from data_processing.pipeline import BASE_DIR, TableSpec, clean_table, parse_args
+from data_processing.rollups import Rollup
 
-# Load data
-df = pd.read_csv(input_file)
+# Price/count columns are parsed by hand below, so keep them as text even
+# in chunks where pandas could have inferred a number
+RAW_TEXT_COLUMNS = ["discounted_price", "actual_price", "discount_percentage", "rating", "rating_count"]
 
-# ---- Cleaning Steps ----
-df['discounted_price'] = df['discounted_price'].str.replace('₹', '').str.replace(',', '').astype(float)
-df['actual_price'] = df['actual_price'].str.replace('₹', '').str.replace(',', '').astype(float)
-df['discount_percentage'] = df['discount_percentage'].str.replace('%', '').astype(float)
 
 def clean_rating(val):
     try:
@@ -21,17 +18,72 @@ def clean_rating(val):
     except:
         return None
 
-df['rating'] = df['rating'].apply(clean_rating)
-df['rating_count'] = df['rating_count'].fillna("0").str.replace(',', '').astype(int)
-df.drop_duplicates(inplace=True)
 
-# Save cleaned CSV
-output_clean_csv.parent.mkdir(parents=True, exist_ok=True)
-df.to_csv(output_clean_csv, index=False)
+# ---- Cleaning Steps ----
+def clean_amazon(df: pd.DataFrame) -> pd.DataFrame:
+    df['discounted_price'] = df['discounted_price'].str.replace('₹', '').str.replace(',', '').astype(float)
+    df['actual_price'] = df['actual_price'].str.replace('₹', '').str.replace(',', '').astype(float)
+    df['discount_percentage'] = df['discount_percentage'].str.replace('%', '').astype(float)
+    df['rating'] = df['rating'].apply(clean_rating)
+    df['rating_count'] = df['rating_count'].fillna("0").str.replace(',', '').astype(int)
+    return df
+
+
+# "Computers&Accessories|Cables|USBCables" -> "Computers&Accessories"
+TOP_CATEGORY = "substr(category, 1, instr(category || '|', '|') - 1)"
+
+ROLLUPS = [
+    Rollup(
+        name="amazon_category_summary",
+        base_tables=["amazon_products"],
+        group_by=["category"],
+        select_sql="""
+            SELECT category, COUNT(*) AS products, AVG(rating) AS avg_rating,
+                   SUM(rating_count) AS total_ratings, AVG(discounted_price) AS avg_discounted_price,
+                   AVG(actual_price) AS avg_actual_price, AVG(discount_percentage) AS avg_discount_percentage,
+                   MAX(discount_percentage) AS max_discount_percentage
+            FROM amazon_products GROUP BY category""",
+        description="product count, average rating, rating count, prices and discounts per full category path",
+    ),
+    Rollup(
+        name="amazon_top_category_summary",
+        base_tables=["amazon_products"],
+        group_by=["top_category"],
+        select_sql=f"""
+            SELECT {TOP_CATEGORY} AS top_category, COUNT(*) AS products, AVG(rating) AS avg_rating,
+                   SUM(rating_count) AS total_ratings, AVG(discounted_price) AS avg_discounted_price,
+                   AVG(discount_percentage) AS avg_discount_percentage,
+                   MAX(discount_percentage) AS max_discount_percentage
+            FROM amazon_products GROUP BY top_category""",
+        description="the same measures per top-level category (first part of the category path)",
+    ),
+]
+
+FTS = [
+    FtsIndex(
+        name="_fts_amazon_products",
+        table="amazon_products",
+        columns=["product_name", "about_product", "review_title", "review_content"],
+        show=["product_id", "product_name", "category", "rating"],
+        description="Amazon product names, descriptions and review text",
+    ),
+]
+
+SPEC = TableSpec(
+    table="amazon_products",
+    input_file=BASE_DIR / "datasets" / "amazon" / "amazon.csv",
+    output_file=BASE_DIR / "cleaned_data" / "clean_amazon.parquet",
+    sqlite_db=BASE_DIR / "sqlite" / "amazon.db",   # ✅ changed
+    clean=clean_amazon,
+    read_csv_kwargs={"dtype": {col: str for col in RAW_TEXT_COLUMNS}},
+    # product_id repeats across reviews, so it's indexed rather than a key
+    indexes=[["product_id"], ["category"], ["rating"]],
+    rollups=ROLLUPS,
+    fts=FTS,
+)
 
-# Save to SQLite DB
-conn = sqlite3.connect(sqlite_db)   # ✅ uses amazon.db
-df.to_sql("amazon_products", conn, if_exists="replace", index=False)
-conn.close()
 
-print("✅ Cleaned and saved to CSV and SQLite DB.")
+if __name__ == "__main__":
+    args = parse_args("Clean the Amazon sales dataset.")
+    clean_table(SPEC, chunksize=args.chunksize, load_only=args.load_only, csv=args.csv)
+    print("✅ Cleaned and saved to Parquet and SQLite DB.")
@@ -1,52 +1,95 @@
+# Run from the Q2 directory:
+#     python -m data_processing.clean_bigbasket [--chunksize 50000] [--load-only] [--csv]
+
 import pandas as pd
-import sqlite3
-from pathlib import Path
 
-# Paths
-input_file = Path("../datasets/bigbasket/BigBasket Products.csv")
-output_clean_csv = Path("../cleaned_data/clean_bigbasket.csv")
-sqlite_db = Path("../sqlite/bigbasket.db")
+from data_processing.fts import FtsIndex
+from data_processing.pipeline import BASE_DIR, TableSpec, clean_table, parse_args
+from data_processing.rollups import Rollup
+
+TEXT_COLUMNS = ["product", "category", "sub_category", "brand", "type", "description"]
 
-# Load dataset
-df = pd.read_csv(input_file)
 
 # --- Cleaning ---
+def clean_bigbasket(df: pd.DataFrame) -> pd.DataFrame:
+    # 1. Drop 'index' column if it just duplicates row numbers
+    if "index" in df.columns:
+        df = df.drop(columns=["index"])
+
+    # 2. Drop rows with missing product or brand
+    df = df.dropna(subset=["product", "brand"])
 
-# 1. Drop 'index' column if it just duplicates row numbers
-if "index" in df.columns:
-    df.drop(columns=["index"], inplace=True)
+    # 3. Clean 'rating' — keep as float, missing left as-is
+    # (you can choose to fillna(df['rating'].mean()) if needed)
 
-# 2. Drop rows with missing product or brand
-df.dropna(subset=["product", "brand"], inplace=True)
+    # 4. Fill missing description with empty string
+    df["description"] = df["description"].fillna("")
 
-# 3. Clean 'rating' — keep as float, missing left as-is
-# (you can choose to fillna(df['rating'].mean()) if needed)
+    # 5. Remove rows with negative or zero prices (optional)
+    df = df[(df["sale_price"] > 0) & (df["market_price"] > 0)].copy()
 
-# 4. Fill missing description with empty string
-df["description"] = df["description"].fillna("")
+    # 6. Add discount percentage column
+    df["discount_percentage"] = ((df["market_price"] - df["sale_price"]) / df["market_price"]) * 100
+    df["discount_percentage"] = df["discount_percentage"].round(2)
 
-# 5. Remove rows with negative or zero prices (optional)
-df = df[(df["sale_price"] > 0) & (df["market_price"] > 0)]
+    # 7. Clean 'type' column formatting
+    df["type"] = df["type"].str.strip().str.lower()
 
-# 6. Add discount percentage column
-df["discount_percentage"] = ((df["market_price"] - df["sale_price"]) / df["market_price"]) * 100
-df["discount_percentage"] = df["discount_percentage"].round(2)
+    # 8. Duplicates are removed by clean_table()
+    return df
 
-# 7. Clean 'type' column formatting
-df["type"] = df["type"].str.strip().str.lower()
 
-# 8. Remove duplicates
-df.drop_duplicates(inplace=True)
+ROLLUPS = [
+    Rollup(
+        name="bigbasket_category_summary",
+        base_tables=["bigbasket_products"],
+        group_by=["category", "sub_category"],
+        select_sql="""
+            SELECT category, sub_category, COUNT(*) AS products, COUNT(DISTINCT brand) AS brands,
+                   AVG(rating) AS avg_rating, AVG(sale_price) AS avg_sale_price,
+                   AVG(market_price) AS avg_market_price, AVG(discount_percentage) AS avg_discount_percentage,
+                   MAX(discount_percentage) AS max_discount_percentage
+            FROM bigbasket_products GROUP BY category, sub_category""",
+        description="products, brands, average rating, prices and discounts per category and sub-category",
+    ),
+    Rollup(
+        name="bigbasket_brand_summary",
+        base_tables=["bigbasket_products"],
+        group_by=["brand"],
+        select_sql="""
+            SELECT brand, COUNT(*) AS products, AVG(rating) AS avg_rating, AVG(sale_price) AS avg_sale_price,
+                   AVG(discount_percentage) AS avg_discount_percentage,
+                   MAX(discount_percentage) AS max_discount_percentage
+            FROM bigbasket_products GROUP BY brand""",
+        description="products, average rating, average price and average/max discount per brand",
+    ),
+]
 
-# --- Save cleaned data ---
+FTS = [
+    FtsIndex(
+        name="_fts_bigbasket_products",
+        table="bigbasket_products",
+        columns=["product", "description"],
+        show=["product", "brand", "category", "sale_price"],
+        description="BigBasket product names and descriptions",
+    ),
+]
 
-# CSV
-output_clean_csv.parent.mkdir(parents=True, exist_ok=True)
-df.to_csv(output_clean_csv, index=False)
+SPEC = TableSpec(
+    table="bigbasket_products",
+    input_file=BASE_DIR / "datasets" / "bigbasket" / "BigBasket Products.csv",
+    output_file=BASE_DIR / "cleaned_data" / "clean_bigbasket.parquet",
+    sqlite_db=BASE_DIR / "sqlite" / "bigbasket.db",
+    clean=clean_bigbasket,
+    # Keeps text columns as text in chunks where they happen to be all empty
+    read_csv_kwargs={"dtype": {col: str for col in TEXT_COLUMNS}},
+    indexes=[["category"], ["brand"], ["rating"]],
+    rollups=ROLLUPS,
+    fts=FTS,
+)
 
-# SQLite DB
-conn = sqlite3.connect(sqlite_db)
-df.to_sql("bigbasket_products", conn, if_exists="replace", index=False)
-conn.close()
 
-print("✅ BigBasket data cleaned and saved to CSV and SQLite DB.")
+if __name__ == "__main__":
+    args = parse_args("Clean the BigBasket products dataset.")
+    clean_table(SPEC, chunksize=args.chunksize, load_only=args.load_only, csv=args.csv)
+    print("✅ BigBasket data cleaned and saved to Parquet and SQLite DB.")
@@ -1,71 +1,160 @@
+# Run from the Q2 directory:
+#     python -m data_processing.clean_ecommerce_data [--chunksize 50000] [--load-only] [--csv]
+
 import pandas as pd
-import sqlite3
-from pathlib import Path
 
-# === Setup paths ===
-input_dir = Path("../datasets/ecommerce")
-output_csv_dir = Path("../cleaned_data/ecommerce")
-sqlite_db_path = Path("../sqlite/ecommerce.db")
+from data_processing.fts import FtsIndex, refresh_fts
+from data_processing.pipeline import BASE_DIR, TableSpec, clean_table, parse_args
+from data_processing.rollups import Rollup, refresh_rollups
 
-# Create folders if they don’t exist
-output_csv_dir.mkdir(parents=True, exist_ok=True)
-sqlite_db_path.parent.mkdir(parents=True, exist_ok=True)
+# === Setup paths ===
+input_dir = BASE_DIR / "datasets" / "ecommerce"
+output_dir = BASE_DIR / "cleaned_data" / "ecommerce"
+sqlite_db_path = BASE_DIR / "sqlite" / "ecommerce.db"
 
-# Connect to DB
-conn = sqlite3.connect(sqlite_db_path)
 
 # 1. olist_order_items_dataset.csv
-df_items = pd.read_csv(input_dir / "olist_order_items_dataset.csv")
-# No nulls, but remove duplicates
-df_items.drop_duplicates(inplace=True)
-df_items.to_csv(output_csv_dir / "clean_order_items.csv", index=False)
-df_items.to_sql("order_items", conn, if_exists="replace", index=False)
+def clean_order_items(df: pd.DataFrame) -> pd.DataFrame:
+    # No nulls, duplicates are removed by clean_table()
+    return df
+
 
 # 2. olist_order_reviews_dataset.csv
-df_reviews = pd.read_csv(input_dir / "olist_order_reviews_dataset.csv")
-df_reviews["review_comment_title"] = df_reviews["review_comment_title"].fillna("")
-df_reviews["review_comment_message"] = df_reviews["review_comment_message"].fillna("")
-df_reviews["review_creation_date"] = pd.to_datetime(df_reviews["review_creation_date"])
-df_reviews["review_answer_timestamp"] = pd.to_datetime(df_reviews["review_answer_timestamp"])
-df_reviews.drop_duplicates(inplace=True)
-df_reviews.to_csv(output_csv_dir / "clean_order_reviews.csv", index=False)
-df_reviews.to_sql("order_reviews", conn, if_exists="replace", index=False)
+def clean_order_reviews(df: pd.DataFrame) -> pd.DataFrame:
+    df["review_comment_title"] = df["review_comment_title"].fillna("")
+    df["review_comment_message"] = df["review_comment_message"].fillna("")
+    df["review_creation_date"] = pd.to_datetime(df["review_creation_date"])
+    df["review_answer_timestamp"] = pd.to_datetime(df["review_answer_timestamp"])
+    return df
+
 
 # 3. olist_orders_dataset.csv
-df_orders = pd.read_csv(input_dir / "olist_orders_dataset.csv")
-df_orders["order_approved_at"] = pd.to_datetime(df_orders["order_approved_at"])
-df_orders["order_purchase_timestamp"] = pd.to_datetime(df_orders["order_purchase_timestamp"])
-df_orders["order_delivered_carrier_date"] = pd.to_datetime(df_orders["order_delivered_carrier_date"])
-df_orders["order_delivered_customer_date"] = pd.to_datetime(df_orders["order_delivered_customer_date"])
-df_orders["order_estimated_delivery_date"] = pd.to_datetime(df_orders["order_estimated_delivery_date"])
-df_orders.drop_duplicates(inplace=True)
-df_orders.to_csv(output_csv_dir / "clean_orders.csv", index=False)
-df_orders.to_sql("orders", conn, if_exists="replace", index=False)
+def clean_orders(df: pd.DataFrame) -> pd.DataFrame:
+    df["order_approved_at"] = pd.to_datetime(df["order_approved_at"])
+    df["order_purchase_timestamp"] = pd.to_datetime(df["order_purchase_timestamp"])
+    df["order_delivered_carrier_date"] = pd.to_datetime(df["order_delivered_carrier_date"])
+    df["order_delivered_customer_date"] = pd.to_datetime(df["order_delivered_customer_date"])
+    df["order_estimated_delivery_date"] = pd.to_datetime(df["order_estimated_delivery_date"])
+    return df
+
 
 # 4. olist_products_dataset.csv
-df_products = pd.read_csv(input_dir / "olist_products_dataset.csv")
-df_products.dropna(subset=["product_id"], inplace=True)
-df_products.fillna({
-    "product_category_name": "",
-    "product_name_lenght": 0,
-    "product_description_lenght": 0,
-    "product_photos_qty": 0,
-    "product_weight_g": 0,
-    "product_length_cm": 0,
-    "product_height_cm": 0,
-    "product_width_cm": 0
-}, inplace=True)
-df_products.drop_duplicates(inplace=True)
-df_products.to_csv(output_csv_dir / "clean_products.csv", index=False)
-df_products.to_sql("products", conn, if_exists="replace", index=False)
+def clean_products(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.dropna(subset=["product_id"])
+    return df.fillna({
+        "product_category_name": "",
+        "product_name_lenght": 0,
+        "product_description_lenght": 0,
+        "product_photos_qty": 0,
+        "product_weight_g": 0,
+        "product_length_cm": 0,
+        "product_height_cm": 0,
+        "product_width_cm": 0
+    })
+
+
+# Nullable in the raw file, so every chunk reads them as float like the
+# whole-file load does
+PRODUCT_MEASURE_COLUMNS = [
+    "product_name_lenght", "product_description_lenght", "product_photos_qty",
+    "product_weight_g", "product_length_cm", "product_height_cm", "product_width_cm",
+]
+
 
 # 5. product_category_name_translation.csv
-df_translation = pd.read_csv(input_dir / "product_category_name_translation.csv")
-df_translation.drop_duplicates(inplace=True)
-df_translation.to_csv(output_csv_dir / "clean_category_translation.csv", index=False)
-df_translation.to_sql("category_translation", conn, if_exists="replace", index=False)
+def clean_category_translation(df: pd.DataFrame) -> pd.DataFrame:
+    return df
+
+
+# === Rollups (rebuilt whenever one of their base tables is reloaded) ===
+ROLLUPS = [
+    Rollup(
+        name="orders_monthly_summary",
+        base_tables=["orders"],
+        group_by=["month", "order_status"],
+        select_sql="""
+            SELECT strftime('%Y-%m', order_purchase_timestamp) AS month, order_status, COUNT(*) AS orders,
+                   COUNT(DISTINCT customer_id) AS customers,
+                   AVG(julianday(order_delivered_customer_date) - julianday(order_purchase_timestamp))
+                       AS avg_delivery_days
+            FROM orders GROUP BY month, order_status""",
+        description="orders, customers and average delivery time per purchase month and order status",
+    ),
+    Rollup(
+        name="category_sales_summary",
+        base_tables=["order_items", "products", "category_translation", "order_reviews"],
+        group_by=["product_category_name"],
+        # Reviews are averaged per order first so multi-item orders don't count twice
+        select_sql="""
+            SELECT p.product_category_name, t.product_category_name_english,
+                   COUNT(*) AS items_sold, COUNT(DISTINCT i.order_id) AS orders,
+                   SUM(i.price) AS revenue, AVG(i.price) AS avg_price, SUM(i.freight_value) AS freight,
+                   AVG(r.review_score) AS avg_review_score
+            FROM order_items i
+            JOIN products p ON p.product_id = i.product_id
+            LEFT JOIN category_translation t ON t.product_category_name = p.product_category_name
+            LEFT JOIN (SELECT order_id, AVG(review_score) AS review_score FROM order_reviews GROUP BY order_id) r
+                   ON r.order_id = i.order_id
+            GROUP BY p.product_category_name""",
+        description="items sold, orders, revenue, average price, freight and average review score "
+                    "per product category (with English name)",
+    ),
+]
+
+
+# === Full-text indexes (rebuilt whenever their table is reloaded) ===
+FTS = [
+    FtsIndex(
+        name="_fts_order_reviews",
+        table="order_reviews",
+        columns=["review_comment_title", "review_comment_message"],
+        show=["review_id", "order_id", "review_score"],
+        description="customer review titles and comments (Portuguese)",
+    ),
+]
+
+
+def _spec(table, input_name, output_name, clean, read_csv_kwargs=None, **layout):
+    return TableSpec(
+        table=table,
+        input_file=input_dir / input_name,
+        output_file=output_dir / output_name,
+        sqlite_db=sqlite_db_path,
+        clean=clean,
+        read_csv_kwargs=read_csv_kwargs or {},
+        rollups=[rollup for rollup in ROLLUPS if table in rollup.base_tables],
+        fts=[index for index in FTS if index.table == table],
+        **layout,
+    )
+
+
+SPECS = [
+    _spec("order_items", "olist_order_items_dataset.csv", "clean_order_items.parquet", clean_order_items,
+          primary_key=["order_id", "order_item_id"],
+          indexes=[["product_id"], ["seller_id"]]),
+    _spec("order_reviews", "olist_order_reviews_dataset.csv", "clean_order_reviews.parquet", clean_order_reviews,
+          read_csv_kwargs={"dtype": {"review_comment_title": str, "review_comment_message": str}},
+          # review_id is not unique in the Olist export
+          indexes=[["order_id"], ["review_id"], ["review_score"]]),
+    _spec("orders", "olist_orders_dataset.csv", "clean_orders.parquet", clean_orders,
+          primary_key=["order_id"],
+          indexes=[["customer_id"], ["order_status"], ["order_purchase_timestamp"]]),
+    _spec("products", "olist_products_dataset.csv", "clean_products.parquet", clean_products,
+          read_csv_kwargs={"dtype": {"product_category_name": str, **{col: float for col in PRODUCT_MEASURE_COLUMNS}}},
+          primary_key=["product_id"],
+          indexes=[["product_category_name"]]),
+    _spec("category_translation", "product_category_name_translation.csv",
+          "clean_category_translation.parquet", clean_category_translation,
+          primary_key=["product_category_name"]),
+]
 
-# Close DB
-conn.close()
 
-print("✅ All ecommerce files cleaned and saved to CSV & SQLite DB.")
+if __name__ == "__main__":
+    args = parse_args("Clean the Olist ecommerce datasets.")
+    # Rollups and FTS indexes are built once, after the last table loads:
+    # category_sales_summary alone reads four of these tables
+    for spec in SPECS:
+        clean_table(spec, chunksize=args.chunksize, load_only=args.load_only, csv=args.csv, derived=False)
+    refresh_rollups(sqlite_db_path, ROLLUPS)
+    refresh_fts(sqlite_db_path, FTS)
+    print("✅ All ecommerce files cleaned and saved to Parquet & SQLite DB.")
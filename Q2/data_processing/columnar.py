@@ -0,0 +1,97 @@
+# data_processing/columnar.py
+#
+# Parquet is the canonical cleaned artifact: the clean_* scripts write one
+# zstd-compressed Parquet file per table, and everything downstream (the
+# SQLite load, the inspect_* scripts, ad-hoc analysis) reads it back with
+# types intact (dates stay timestamps, counts stay integers) instead of
+# re-parsing CSV text. Readers pass `columns=` to decode only what they
+# need; files are opened memory-mapped.
+
+import os
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+COMPRESSION = "zstd"
+# Rows per Parquet row group / per batch handed back by iter_parquet()
+BATCH_SIZE = 65536
+
+
+def _schema(table: pa.Table) -> pa.Schema:
+    """
+    File schema fixed from the first chunk. All-null columns are typed as
+    string (text is what they hold once later chunks fill them in) and the
+    pandas metadata is dropped so later chunks with other indexes still fit.
+    """
+    fields = [
+        pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f
+        for f in table.schema
+    ]
+    return pa.schema(fields)
+
+
+class ParquetChunkWriter:
+    """
+    Writes one Parquet file from one or more DataFrame chunks:
+
+        with ParquetChunkWriter(path) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+
+    The schema comes from the first chunk and later chunks are converted
+    to it. The file is written next to `path` and renamed into place when
+    the block exits cleanly, so readers never see a half-written file.
+    """
+
+    def __init__(self, path, compression: str = COMPRESSION):
+        self.path = Path(path)
+        self.compression = compression
+        self.rows_written = 0
+        self._tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self._writer = None
+        self._schema = None
+
+    def __enter__(self):
+        return self
+
+    def write(self, df: pd.DataFrame):
+        if self._schema is None:
+            self._schema = _schema(pa.Table.from_pandas(df, preserve_index=False))
+            self._writer = pq.ParquetWriter(self._tmp_path, self._schema, compression=self.compression)
+        table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+        self._writer.write_table(table, row_group_size=BATCH_SIZE)
+        self.rows_written += len(df)
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._writer is not None:
+            self._writer.close()
+        if exc_type is None and self._writer is not None:
+            os.replace(self._tmp_path, self.path)
+        elif self._tmp_path.exists():
+            self._tmp_path.unlink()
+        return False
+
+
+def write_parquet(df: pd.DataFrame, path) -> int:
+    with ParquetChunkWriter(path) as writer:
+        writer.write(df)
+    return writer.rows_written
+
+
+def read_parquet(path, columns=None, filters=None) -> pd.DataFrame:
+    """Whole file (or just `columns`, rows matching `filters`) as a DataFrame."""
+    return pq.read_table(path, columns=columns, filters=filters, memory_map=True).to_pandas()
+
+
+def iter_parquet(path, columns=None, batch_size: int = BATCH_SIZE):
+    """The file as DataFrames of at most `batch_size` rows, for loading without holding it all."""
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        yield batch.to_pandas()
+
+
+def parquet_schema(path) -> pa.Schema:
+    """Column names and types from the file footer, without reading any data."""
+    return pq.read_schema(path, memory_map=True)
@@ -0,0 +1,100 @@
+# data_processing/fts.py
+#
+# SQLite FTS5 full-text indexes over the free-text columns of the cleaned
+# tables (product names and descriptions, review text), so keyword lookups
+# are an inverted-index hit ranked by BM25 instead of a LIKE '%...%' scan.
+# Each index is an external-content FTS5 table over its base table (the
+# text is not stored twice) named with a leading underscore, which keeps
+# it and its shadow tables out of the schema the SQL agents see. Indexes
+# are rebuilt whenever their base table is reloaded (load_table() calls
+# refresh_fts()), and every database keeps an `_fts` registry table that
+# the agents' text_search tool reads (rag/db/text_search.py).
+
+import json
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+REGISTRY_TABLE = "_fts"
+# Folds case and accents, so "cafe" matches "café" and "nao" matches "não"
+TOKENIZER = "unicode61 remove_diacritics 2"
+
+
+@dataclass
+class FtsIndex:
+    name: str
+    table: str
+    # Text columns that are indexed
+    columns: list
+    # Columns returned with each hit to identify the row
+    show: list
+    description: str
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _ensure_registry(conn):
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {REGISTRY_TABLE} ("
+        " name TEXT PRIMARY KEY, base_table TEXT NOT NULL, columns TEXT NOT NULL, show TEXT NOT NULL,"
+        " description TEXT NOT NULL, row_count INTEGER NOT NULL, refreshed_at TEXT NOT NULL)"
+    )
+
+
+def build_fts(conn, index: FtsIndex) -> int:
+    """(Re)creates one FTS5 index and its registry row in a single transaction."""
+    conn.execute("BEGIN")
+    try:
+        _ensure_registry(conn)
+        conn.execute(f"DROP TABLE IF EXISTS {_quote(index.name + '_vocab')}")
+        conn.execute(f"DROP TABLE IF EXISTS {_quote(index.name)}")
+        columns = ", ".join(_quote(c) for c in index.columns)
+        conn.execute(
+            f"CREATE VIRTUAL TABLE {_quote(index.name)} USING fts5({columns}, "
+            f"content={_quote(index.table)}, content_rowid='rowid', tokenize='{TOKENIZER}')"
+        )
+        conn.execute(f"INSERT INTO {_quote(index.name)} ({_quote(index.name)}) VALUES ('rebuild')")
+        # Per-term document counts, used to skip terms too common to search on
+        conn.execute(
+            f"CREATE VIRTUAL TABLE {_quote(index.name + '_vocab')} USING fts5vocab({_quote(index.name)}, 'row')"
+        )
+        rows = conn.execute(f"SELECT COUNT(*) FROM {_quote(index.table)}").fetchone()[0]
+        conn.execute(
+            f"INSERT OR REPLACE INTO {REGISTRY_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (index.name, index.table, json.dumps(index.columns), json.dumps(index.show), index.description,
+             rows, time.strftime("%Y-%m-%d %H:%M:%S")),
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    # Merge the b-trees written by 'rebuild' so queries read one segment
+    conn.execute(f"INSERT INTO {_quote(index.name)} ({_quote(index.name)}) VALUES ('optimize')")
+    return rows
+
+
+def refresh_fts(db_path: Path, indexes, changed_table: str = None) -> dict:
+    """
+    Rebuilds the FTS indexes over `changed_table` (all of them if None)
+    whose base table exists. Returns {index name: row count}.
+    """
+    if not indexes:
+        return {}
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        built = {}
+        for index in indexes:
+            if changed_table is not None and changed_table != index.table:
+                continue
+            if index.table not in existing:
+                continue
+            start = time.perf_counter()
+            built[index.name] = build_fts(conn, index)
+            print(f"  fts {index.name}: {built[index.name]} rows in {time.perf_counter() - start:.2f}s")
+        return built
+    finally:
+        conn.close()
@@ -1,6 +1,16 @@
+# Run from the Q2 directory (after clean_amazon):
+#     python -m data_processing.inspect_amazon [--columns rating category] [--raw]
+
 import pandas as pd
 
-df = pd.read_csv("../datasets/amazon/amazon.csv")
+from data_processing.clean_amazon import SPEC
+from data_processing.pipeline import inspect_args, read_cleaned
+
+args = inspect_args("Inspect the cleaned Amazon table.")
+if args.raw:
+    df = pd.read_csv(SPEC.input_file, usecols=args.columns)
+else:
+    df = read_cleaned(SPEC, columns=args.columns)
 
 print("📊 Shape:", df.shape)
 print("\n🧱 Columns:", df.columns.tolist())
@@ -1,9 +1,16 @@
+# Run from the Q2 directory (after clean_bigbasket):
+#     python -m data_processing.inspect_bigbasket [--columns brand sale_price] [--raw]
+
 import pandas as pd
 
-file_path = "../datasets/bigbasket/BigBasket Products.csv"
+from data_processing.clean_bigbasket import SPEC
+from data_processing.pipeline import inspect_args, read_cleaned
 
-# Load CSV
-df = pd.read_csv(file_path)
+args = inspect_args("Inspect the cleaned BigBasket table.")
+if args.raw:
+    df = pd.read_csv(SPEC.input_file, usecols=args.columns)
+else:
+    df = read_cleaned(SPEC, columns=args.columns)
 
 # Basic Info
 print(f"📊 Shape: {df.shape}\n")
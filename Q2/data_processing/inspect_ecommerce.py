@@ -1,22 +1,33 @@
+# Run from the Q2 directory (after clean_ecommerce_data):
+#     python -m data_processing.inspect_ecommerce [--columns order_id price] [--raw]
+# With --columns, tables that don't have all of them are skipped.
+
 import pandas as pd
-from pathlib import Path
 
-BASE_DIR = Path(__file__).resolve().parent.parent  # Q2/
-ecom_path = BASE_DIR / "datasets" / "ecommerce"
+from data_processing.clean_ecommerce_data import SPECS
+from data_processing.columnar import parquet_schema
+from data_processing.pipeline import inspect_args, read_cleaned
 
-files = sorted(ecom_path.glob("*.csv"))
+args = inspect_args("Inspect the cleaned Olist ecommerce tables.")
 
-print(f"🔎 Found {len(files)} files in {ecom_path.resolve()}")
+print(f"🔎 Inspecting {len(SPECS)} tables")
 
-for file in files:
-    print(f"\n📁 Inspecting: {file.name}")
+for spec in SPECS:
+    path = spec.input_file if args.raw else spec.output_file
+    print(f"\n📁 Inspecting: {path.name}")
     try:
-        df = pd.read_csv(file, encoding="utf-8", low_memory=False)
+        if args.raw:
+            df = pd.read_csv(path, encoding="utf-8", low_memory=False, usecols=args.columns)
+        else:
+            if args.columns and not set(args.columns) <= set(parquet_schema(path).names):
+                print("⏭️  Skipped: doesn't have all of", args.columns)
+                continue
+            df = read_cleaned(spec, columns=args.columns)
         print(f"📊 Shape: {df.shape}")
         print(f"🧱 Columns: {df.columns.tolist()}")
         print(df.head(3))
         print("📉 Null values:")
         print(df.isnull().sum())
     except Exception as e:
-        print(f"❌ Error loading {file.name}: {e}")
+        print(f"❌ Error loading {path.name}: {e}")
     print("-" * 60)
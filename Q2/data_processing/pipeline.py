@@ -0,0 +1,159 @@
+# data_processing/pipeline.py
+#
+# Shared plumbing for the clean_* scripts. Each script describes its
+# tables as TableSpecs (input CSV, cleaning function, outputs) and hands
+# them to clean_table(), which cleans into the table's Parquet file
+# (columnar.py, the canonical cleaned artifact) either:
+#   - in memory: read the whole CSV, clean, drop_duplicates, write once
+#   - streaming (--chunksize N): read N rows at a time, clean each chunk,
+#     drop rows already seen (by row hash) and append a row group
+# Streaming keeps peak memory at roughly one chunk plus 8 bytes per
+# unique row, whatever the size of the input. SQLite is then loaded from
+# the Parquet file in batches through sqlite_loader.TableLoader (typed
+# table, one transaction, indexes), and the rollups and full-text indexes
+# that read the table are rebuilt. --load-only reloads SQLite from existing Parquet files
+# without re-cleaning; --csv also exports a CSV copy for spreadsheets.
+
+import argparse
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+from data_processing.columnar import BATCH_SIZE, ParquetChunkWriter, iter_parquet, read_parquet, write_parquet
+from data_processing.fts import refresh_fts
+from data_processing.rollups import refresh_rollups
+from data_processing.sqlite_loader import TableLoader
+
+BASE_DIR = Path(__file__).resolve().parent.parent  # Q2/
+
+
+@dataclass
+class TableSpec:
+    table: str
+    input_file: Path
+    # Cleaned Parquet file; the CSV export, if asked for, goes next to it
+    output_file: Path
+    sqlite_db: Path
+    clean: Callable[[pd.DataFrame], pd.DataFrame]
+    read_csv_kwargs: dict = field(default_factory=dict)
+    # SQLite layout; column types not listed here are derived from dtypes
+    column_types: dict = field(default_factory=dict)
+    primary_key: list = field(default_factory=list)
+    indexes: list = field(default_factory=list)
+    # rollups.Rollup summaries in the same database to refresh after loading
+    rollups: list = field(default_factory=list)
+    # fts.FtsIndex full-text indexes over this table's text columns
+    fts: list = field(default_factory=list)
+
+
+def table_loader(spec: TableSpec) -> TableLoader:
+    return TableLoader(
+        spec.sqlite_db,
+        spec.table,
+        column_types=spec.column_types,
+        primary_key=spec.primary_key,
+        indexes=spec.indexes,
+    )
+
+
+def parse_args(description: str):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--chunksize", type=int, default=None,
+        help="stream the input N rows at a time instead of loading it all into memory",
+    )
+    parser.add_argument(
+        "--load-only", action="store_true",
+        help="skip cleaning and reload SQLite from the existing Parquet files",
+    )
+    parser.add_argument(
+        "--csv", action="store_true",
+        help="also export each cleaned table as CSV next to its Parquet file",
+    )
+    return parser.parse_args()
+
+
+def drop_seen_rows(df: pd.DataFrame, seen: set) -> pd.DataFrame:
+    """
+    Chunk-wise equivalent of drop_duplicates(): keeps rows whose hash has
+    not been seen in this or any earlier chunk, and records the new ones.
+    """
+    hashes = pd.util.hash_pandas_object(df, index=False)
+    keep = ~hashes.duplicated() & ~hashes.isin(seen)
+    seen.update(hashes[keep].tolist())
+    return df[keep.to_numpy()]
+
+
+def _clean_in_memory(spec: TableSpec):
+    df = pd.read_csv(spec.input_file, **spec.read_csv_kwargs)
+    df = spec.clean(df)
+    df = df.drop_duplicates()
+    return write_parquet(df, spec.output_file)
+
+
+def _clean_streaming(spec: TableSpec, chunksize: int):
+    seen = set()
+    with ParquetChunkWriter(spec.output_file) as writer:
+        for chunk in pd.read_csv(spec.input_file, chunksize=chunksize, **spec.read_csv_kwargs):
+            writer.write(drop_seen_rows(spec.clean(chunk), seen))
+    return writer.rows_written
+
+
+def clean_to_parquet(spec: TableSpec, chunksize: int = None, csv: bool = False) -> int:
+    """Cleans one input CSV into the spec's Parquet file; returns the row count."""
+    spec.output_file.parent.mkdir(parents=True, exist_ok=True)
+    if chunksize:
+        rows = _clean_streaming(spec, chunksize)
+    else:
+        rows = _clean_in_memory(spec)
+    if csv:
+        export_csv(spec)
+    return rows
+
+
+def load_table(spec: TableSpec, batch_size: int = BATCH_SIZE, derived: bool = True) -> int:
+    """
+    (Re)loads the SQLite table from the spec's Parquet file and, unless
+    `derived` is False, rebuilds the rollups and full-text indexes that
+    read it. Returns the row count.
+    """
+    spec.sqlite_db.parent.mkdir(parents=True, exist_ok=True)
+    with table_loader(spec) as loader:
+        for batch in iter_parquet(spec.output_file, batch_size=batch_size):
+            loader.write(batch)
+    if derived:
+        refresh_rollups(spec.sqlite_db, spec.rollups, changed_table=spec.table)
+        refresh_fts(spec.sqlite_db, spec.fts, changed_table=spec.table)
+    return loader.rows_written
+
+
+def export_csv(spec: TableSpec) -> Path:
+    path = spec.output_file.with_suffix(".csv")
+    read_parquet(spec.output_file).to_csv(path, index=False)
+    return path
+
+
+def clean_table(spec: TableSpec, chunksize: int = None, load_only: bool = False, csv: bool = False,
+                derived: bool = True) -> int:
+    """
+    Cleans one table into its Parquet file, then loads SQLite from it;
+    returns the row count. With `load_only` the existing Parquet file is
+    loaded as is; `derived` is passed on to load_table().
+    """
+    if not load_only:
+        clean_to_parquet(spec, chunksize=chunksize, csv=csv)
+    return load_table(spec, batch_size=chunksize or BATCH_SIZE, derived=derived)
+
+
+def read_cleaned(spec: TableSpec, columns=None) -> pd.DataFrame:
+    """The cleaned table (only `columns`, if given) from its Parquet file."""
+    return read_parquet(spec.output_file, columns=columns)
+
+
+def inspect_args(description: str):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--columns", nargs="+", default=None, help="only read these columns")
+    parser.add_argument("--raw", action="store_true", help="inspect the raw input CSV instead of the cleaned file")
+    return parser.parse_args()
@@ -0,0 +1,87 @@
+# data_processing/rollups.py
+#
+# Materialised summary tables ("rollups") kept next to the cleaned tables
+# in each SQLite database. A rollup is a GROUP BY over one or more base
+# tables, stored as a real table with a unique index on its group columns,
+# so "average rating by category" becomes an index lookup instead of a
+# scan. Rollups are rebuilt whenever one of their base tables is reloaded
+# (clean_table() calls refresh_rollups()), and every database keeps a
+# `_rollups` registry table that the SQL agents read to discover them
+# (rag/db/rollups.py).
+
+import json
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+REGISTRY_TABLE = "_rollups"
+
+
+@dataclass
+class Rollup:
+    name: str
+    base_tables: list
+    group_by: list
+    # SELECT producing the group_by columns followed by the measures
+    select_sql: str
+    description: str
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _ensure_registry(conn):
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {REGISTRY_TABLE} ("
+        " name TEXT PRIMARY KEY, base_tables TEXT NOT NULL, group_by TEXT NOT NULL,"
+        " description TEXT NOT NULL, row_count INTEGER NOT NULL, refreshed_at TEXT NOT NULL)"
+    )
+
+
+def build_rollup(conn, rollup: Rollup) -> int:
+    """(Re)creates one rollup table and its registry row in a single transaction."""
+    conn.execute("BEGIN")
+    try:
+        _ensure_registry(conn)
+        conn.execute(f"DROP TABLE IF EXISTS {_quote(rollup.name)}")
+        conn.execute(f"CREATE TABLE {_quote(rollup.name)} AS {rollup.select_sql}")
+        columns = ", ".join(_quote(c) for c in rollup.group_by)
+        conn.execute(f"CREATE UNIQUE INDEX {_quote('ux_' + rollup.name)} ON {_quote(rollup.name)} ({columns})")
+        rows = conn.execute(f"SELECT COUNT(*) FROM {_quote(rollup.name)}").fetchone()[0]
+        conn.execute(
+            f"INSERT OR REPLACE INTO {REGISTRY_TABLE} VALUES (?, ?, ?, ?, ?, ?)",
+            (rollup.name, json.dumps(rollup.base_tables), json.dumps(rollup.group_by), rollup.description,
+             rows, time.strftime("%Y-%m-%d %H:%M:%S")),
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute(f"ANALYZE {_quote(rollup.name)}")
+    return rows
+
+
+def refresh_rollups(db_path: Path, rollups, changed_table: str = None) -> dict:
+    """
+    Rebuilds the rollups that read `changed_table` (all of them if None)
+    and whose base tables all exist yet. Returns {rollup name: row count}.
+    """
+    if not rollups:
+        return {}
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        built = {}
+        for rollup in rollups:
+            if changed_table is not None and changed_table not in rollup.base_tables:
+                continue
+            if not set(rollup.base_tables) <= existing:
+                continue
+            start = time.perf_counter()
+            built[rollup.name] = build_rollup(conn, rollup)
+            print(f"  rollup {rollup.name}: {built[rollup.name]} rows in {time.perf_counter() - start:.2f}s")
+        return built
+    finally:
+        conn.close()
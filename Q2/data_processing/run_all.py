@@ -0,0 +1,280 @@
+# data_processing/run_all.py
+#
+# Rebuilds every cleaned dataset in one go, replacing separate runs of the
+# clean_* scripts. Each table becomes a few tasks in a DAG:
+#   clean:<table>   input CSV -> Parquet            (no dependencies)
+#   load:<table>    Parquet -> SQLite table         (after its clean task)
+#   rollup:<name>   summary table in the same DB    (after its base tables load)
+#   fts:<name>      full-text index over a table    (after that table loads)
+# Ready tasks run on a process pool, except that only one task at a time
+# writes to any one SQLite database (SQLite has a single writer anyway).
+# A task is skipped when the content hash of its inputs, its code and its
+# upstream tasks matches the last successful run and its output is still
+# there, so an unchanged rebuild only re-stats files. Hashes are kept in
+# cleaned_data/.run_state.json, and per-task timings are printed at the end.
+#
+# Run from the Q2 directory:
+#     python -m data_processing.run_all [--jobs 8] [--datasets amazon ecommerce]
+#                                       [--chunksize 50000] [--force] [--csv]
+
+import argparse
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from data_processing import columnar, fts, pipeline, rollups, sqlite_loader
+from data_processing.fts import refresh_fts
+from data_processing.pipeline import BASE_DIR, clean_to_parquet, load_table
+from data_processing.rollups import refresh_rollups
+
+DATASETS = {
+    "amazon": "data_processing.clean_amazon",
+    "bigbasket": "data_processing.clean_bigbasket",
+    "ecommerce": "data_processing.clean_ecommerce_data",
+}
+STATE_FILE = BASE_DIR / "cleaned_data" / ".run_state.json"
+
+
+@dataclass
+class Task:
+    name: str
+    # Module-level function and picklable args, run in a worker process
+    fn: Callable
+    args: tuple
+    deps: list = field(default_factory=list)
+    # Files whose content decides whether the task has to run again
+    inputs: list = field(default_factory=list)
+    # Anything else that changes the output (table layout, rollup SQL)
+    params: str = ""
+    # Whether the task's output is still in place (checked before skipping)
+    outputs: Callable[[], bool] = lambda: True
+    # SQLite database the task writes, if any
+    writes: Path = None
+
+
+def dataset_specs(names=None) -> list:
+    specs = []
+    for name in names or DATASETS:
+        module = importlib.import_module(DATASETS[name])
+        specs.extend(getattr(module, "SPECS", None) or [module.SPEC])
+    return specs
+
+
+def _has_table(db_path: Path, table: str) -> bool:
+    if not Path(db_path).exists():
+        return False
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is not None
+    finally:
+        conn.close()
+
+
+def _source_file(obj) -> Path:
+    return Path(inspect.getsourcefile(obj))
+
+
+def build_tasks(specs, chunksize: int = None, csv: bool = False) -> list:
+    """The DAG for `specs`: clean and load tasks per table, one task per rollup and FTS index."""
+    tasks = []
+    shared_code = [_source_file(pipeline), _source_file(columnar)]
+    for spec in specs:
+        tasks.append(Task(
+            name=f"clean:{spec.table}",
+            fn=clean_to_parquet,
+            args=(spec, chunksize, csv),
+            inputs=[spec.input_file, _source_file(spec.clean), *shared_code],
+            params=repr(spec.read_csv_kwargs),
+            outputs=lambda spec=spec: spec.output_file.exists()
+            and (not csv or spec.output_file.with_suffix(".csv").exists()),
+        ))
+        tasks.append(Task(
+            name=f"load:{spec.table}",
+            fn=load_table,
+            args=(spec, chunksize or columnar.BATCH_SIZE, False),
+            deps=[f"clean:{spec.table}"],
+            inputs=[spec.output_file, _source_file(sqlite_loader)],
+            params=repr((spec.column_types, spec.primary_key, spec.indexes)),
+            outputs=lambda spec=spec: _has_table(spec.sqlite_db, spec.table),
+            writes=spec.sqlite_db,
+        ))
+
+    loaded = {spec.table: spec.sqlite_db for spec in specs}
+    seen = set()
+    for spec in specs:
+        for rollup in spec.rollups:
+            if rollup.name in seen or not set(rollup.base_tables) <= set(loaded):
+                continue
+            seen.add(rollup.name)
+            tasks.append(Task(
+                name=f"rollup:{rollup.name}",
+                fn=refresh_rollups,
+                args=(spec.sqlite_db, [rollup]),
+                deps=[f"load:{table}" for table in rollup.base_tables],
+                inputs=[_source_file(rollups)],
+                params=repr(rollup),
+                outputs=lambda spec=spec, rollup=rollup: _has_table(spec.sqlite_db, rollup.name),
+                writes=spec.sqlite_db,
+            ))
+        for index in spec.fts:
+            tasks.append(Task(
+                name=f"fts:{index.name}",
+                fn=refresh_fts,
+                args=(spec.sqlite_db, [index]),
+                deps=[f"load:{spec.table}"],
+                inputs=[_source_file(fts)],
+                params=repr(index),
+                outputs=lambda spec=spec, index=index: _has_table(spec.sqlite_db, index.name),
+                writes=spec.sqlite_db,
+            ))
+    return tasks
+
+
+def _load_state(path: Path) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+    state.setdefault("files", {})
+    state.setdefault("tasks", {})
+    return state
+
+
+def _save_state(path: Path, state: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def file_digest(path: Path, state: dict) -> str:
+    """Content hash of `path`, re-read only when its size or mtime changed."""
+    path = Path(path)
+    if not path.exists():
+        return "missing"
+    stat = path.stat()
+    cached = state["files"].get(str(path))
+    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        return cached[2]
+    with open(path, "rb") as f:
+        digest = hashlib.file_digest(f, "blake2b").hexdigest()[:32]
+    state["files"][str(path)] = [stat.st_size, stat.st_mtime_ns, digest]
+    return digest
+
+
+def fingerprint(task: Task, done: dict, state: dict) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(task.params.encode("utf-8"))
+    for path in task.inputs:
+        h.update(file_digest(path, state).encode("ascii"))
+    for dep in task.deps:
+        h.update(done[dep].encode("ascii"))
+    return h.hexdigest()
+
+
+def _timed_call(fn, args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def run(tasks, jobs: int = None, state_path: Path = STATE_FILE, force: bool = False) -> list:
+    """
+    Runs the DAG and returns [{"task", "status", "seconds"}] in completion
+    order; status is "ran", "skipped", "failed" or "blocked" (a dependency failed).
+    """
+    state = _load_state(state_path)
+    pending = {task.name: task for task in tasks}
+    done, failed, busy_dbs, running, report = {}, set(), set(), {}, []
+
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        while pending or running:
+            scheduled = True
+            while scheduled:
+                scheduled = False
+                for name, task in list(pending.items()):
+                    if any(dep in failed for dep in task.deps):
+                        del pending[name]
+                        failed.add(name)
+                        report.append({"task": name, "status": "blocked", "seconds": 0.0})
+                        scheduled = True
+                        continue
+                    if not all(dep in done for dep in task.deps) or (task.writes and task.writes in busy_dbs):
+                        continue
+                    del pending[name]
+                    fp = fingerprint(task, done, state)
+                    if not force and state["tasks"].get(name) == fp and task.outputs():
+                        done[name] = fp
+                        report.append({"task": name, "status": "skipped", "seconds": 0.0})
+                        # Newly done tasks may unblock others in this same pass
+                        scheduled = True
+                        continue
+                    state["tasks"].pop(name, None)
+                    running[pool.submit(_timed_call, task.fn, task.args)] = (task, fp)
+                    if task.writes:
+                        busy_dbs.add(task.writes)
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                task, fp = running.pop(future)
+                busy_dbs.discard(task.writes)
+                try:
+                    _, seconds = future.result()
+                except Exception as e:
+                    print(f"❌ {task.name} failed: {e}")
+                    failed.add(task.name)
+                    report.append({"task": task.name, "status": "failed", "seconds": 0.0})
+                    continue
+                done[task.name] = fp
+                state["tasks"][task.name] = fp
+                report.append({"task": task.name, "status": "ran", "seconds": round(seconds, 3)})
+            _save_state(state_path, state)
+
+    _save_state(state_path, state)
+    return report
+
+
+def print_report(report: list, wall_seconds: float):
+    width = max([len(r["task"]) for r in report] + [4])
+    print(f"\n{'task':<{width}}  {'status':<8}  seconds")
+    for r in report:
+        print(f"{r['task']:<{width}}  {r['status']:<8}  {r['seconds']:7.2f}")
+    busy = sum(r["seconds"] for r in report)
+    print(f"\nWall time {wall_seconds:.2f}s for {busy:.2f}s of task time ({busy / max(wall_seconds, 1e-9):.1f}x parallel)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean and load every dataset, in parallel where possible.")
+    parser.add_argument("--datasets", nargs="+", choices=list(DATASETS), default=None)
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument(
+        "--chunksize", type=int, default=None,
+        help="stream each input N rows at a time instead of loading it all into memory",
+    )
+    parser.add_argument("--force", action="store_true", help="re-run every task even if its inputs are unchanged")
+    parser.add_argument("--csv", action="store_true", help="also export each cleaned table as CSV")
+    args = parser.parse_args()
+
+    tasks = build_tasks(dataset_specs(args.datasets), chunksize=args.chunksize, csv=args.csv)
+    start = time.perf_counter()
+    report = run(tasks, jobs=args.jobs, force=args.force)
+    print_report(report, time.perf_counter() - start)
+    if any(r["status"] in ("failed", "blocked") for r in report):
+        raise SystemExit(1)
+    print("✅ All datasets cleaned and saved to Parquet & SQLite DB.")
+
+
+if __name__ == "__main__":
+    main()
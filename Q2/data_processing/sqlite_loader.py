@@ -0,0 +1,118 @@
+# data_processing/sqlite_loader.py
+#
+# Bulk loader shared by the clean_* scripts, replacing df.to_sql():
+#   - CREATE TABLE with declared column types and an optional primary key
+#   - executemany() inserts inside one transaction, with
+#     journal_mode=WAL / synchronous=OFF while loading
+#   - indexes on join/filter columns built after the data is in, then ANALYZE
+# The old table is dropped inside the same transaction, so a failed load
+# leaves the previous version in place.
+
+import sqlite3
+
+import pandas as pd
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def sqlite_type(dtype) -> str:
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _rows(df: pd.DataFrame):
+    """DataFrame -> tuples of plain Python values (None for NaN/NaT, text dates)."""
+    df = df.copy()
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].dt.strftime(DATETIME_FORMAT)
+    values = df.astype(object)
+    values = values.where(df.notna(), None)
+    return values.itertuples(index=False, name=None)
+
+
+class TableLoader:
+    """
+    Loads one table from one or more DataFrame chunks:
+
+        with TableLoader(db_path, "orders", primary_key=["order_id"],
+                         indexes=[["customer_id"]]) as loader:
+            for chunk in chunks:
+                loader.write(chunk)
+
+    The table is created from the first chunk's columns (types from
+    `column_types`, else from the dtypes) and indexed when the block exits.
+    """
+
+    def __init__(self, db_path, table: str, column_types: dict = None, primary_key=(), indexes=()):
+        self.db_path = db_path
+        self.table = table
+        self.column_types = column_types or {}
+        self.primary_key = list(primary_key)
+        self.indexes = [list(cols) for cols in indexes]
+        self.rows_written = 0
+        self._conn = None
+        self._columns = None
+
+    def __enter__(self):
+        self._conn = sqlite3.connect(self.db_path, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = OFF")
+        self._conn.execute("PRAGMA cache_size = -262144")  # 256 MB while loading
+        self._conn.execute("BEGIN")
+        self._conn.execute(f"DROP TABLE IF EXISTS {_quote(self.table)}")
+        return self
+
+    def _create_table(self, df: pd.DataFrame):
+        self._columns = list(df.columns)
+        column_defs = [
+            f"{_quote(col)} {self.column_types.get(col, sqlite_type(df[col].dtype))}"
+            for col in self._columns
+        ]
+        if self.primary_key:
+            column_defs.append(f"PRIMARY KEY ({', '.join(_quote(c) for c in self.primary_key)})")
+        self._conn.execute(f"CREATE TABLE {_quote(self.table)} ({', '.join(column_defs)})")
+
+    def write(self, df: pd.DataFrame):
+        if self._columns is None:
+            self._create_table(df)
+        placeholders = ", ".join("?" for _ in self._columns)
+        self._conn.executemany(
+            f"INSERT INTO {_quote(self.table)} VALUES ({placeholders})",
+            _rows(df[self._columns]),
+        )
+        self.rows_written += len(df)
+
+    def _create_indexes(self):
+        for cols in self.indexes:
+            name = _quote(f"idx_{self.table}_{'_'.join(cols)}")
+            self._conn.execute(
+                f"CREATE INDEX {name} ON {_quote(self.table)} ({', '.join(_quote(c) for c in cols)})"
+            )
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is not None:
+                self._conn.execute("ROLLBACK")
+                return False
+            if self._columns is None:
+                # No chunks at all: leave the existing table untouched
+                self._conn.execute("ROLLBACK")
+                return False
+            self._create_indexes()
+            self._conn.execute("COMMIT")
+            self._conn.execute(f"ANALYZE {_quote(self.table)}")
+            # Back to a rollback journal so readers can open the file with
+            # mode=ro without needing write access for the -shm file
+            self._conn.execute("PRAGMA journal_mode = DELETE")
+            return False
+        finally:
+            self._conn.close()
+            self._conn = None
@@ -1,24 +1,91 @@
 # rag/agents/query_agent.py
 
-from langchain_community.utilities.sql_database import SQLDatabase
+import threading
+
 from langchain_community.agent_toolkits.sql.base import create_sql_agent
 from langchain.agents.agent_types import AgentType
 from langchain_openai import ChatOpenAI
 from langchain_community.agent_toolkits import SQLDatabaseToolkit
-from rag.config import DB_PATHS
+from rag.config import AGENT_TIMEOUT_SECONDS, AGENT_VERBOSE, JOIN_PLANNER_ENABLED
+from rag.db.connection_pool import get_engine
+from rag.db.join_planner import get_join_planner, join_path_tool
+from rag.db.query_guard import next_page_tool
+from rag.db.sql_database import CachedSQLDatabase
+from rag.db.text_search import has_text_search, text_search_tool
+from rag.db.versions import get_db_version
 
-llm = ChatOpenAI(model="gpt-4", temperature=0, verbose=True)
+llm = ChatOpenAI(model="gpt-4", temperature=0, verbose=AGENT_VERBOSE)
 
-def get_agent(source: str):
-    print(source)
-    db = SQLDatabase.from_uri(f"sqlite:///{DB_PATHS[source]}")
-    print(db)
+# source -> {"version", "db", "toolkit", "agent"}
+# Built lazily on first use and shared by every later query.
+_registry = {}
+_registry_lock = threading.Lock()
+_source_locks = {}
+
+
+def _source_lock(source: str):
+    with _registry_lock:
+        return _source_locks.setdefault(source, threading.Lock())
+
+
+def _build_entry(source: str, version):
+    print(f"Building SQL agent for '{source}'...")
+    # Schema reflection happens here, once per db version; connections
+    # come from the source's read-only pool and results are memoized
+    db = CachedSQLDatabase(get_engine(source), source=source)
 
     toolkit = SQLDatabaseToolkit(db=db, llm=llm)
+    # Multi-table databases also get a join-path tool over their key graph
+    extra_tools = []
+    if JOIN_PLANNER_ENABLED and get_join_planner(source).edges:
+        extra_tools.append(join_path_tool(source))
+    # Large query results are summarised; this pages through the full rows
+    if db.guard is not None:
+        extra_tools.append(next_page_tool(db))
+    # Keyword lookups over product/review text go to the FTS5 indexes
+    if has_text_search(source):
+        extra_tools.append(text_search_tool(source))
     agent = create_sql_agent(
         llm=llm,
         toolkit=toolkit,
-        verbose=True,
-        agent_type=AgentType.ZERO_SHOT_REACT_DESCRIPTION
+        extra_tools=extra_tools,
+        # Step-by-step console output; rag/tracing.py records the same steps as spans
+        verbose=AGENT_VERBOSE,
+        agent_type=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+        # Lets a timed-out fan-out agent stop itself at the next step
+        max_execution_time=AGENT_TIMEOUT_SECONDS,
     )
-    return agent
+    return {"version": version, "db": db, "toolkit": toolkit, "agent": agent}
+
+
+def get_agent(source: str):
+    """
+    Returns the long-lived SQL agent for `source`, building it on first use
+    and rebuilding it when the underlying .db file changes.
+    """
+    version = get_db_version(source)
+    entry = _registry.get(source)
+    if entry is not None and entry["version"] == version:
+        return entry["agent"]
+
+    # One builder per source; other sources stay available meanwhile
+    with _source_lock(source):
+        entry = _registry.get(source)
+        if entry is None or entry["version"] != version:
+            entry = _build_entry(source, version)
+            _registry[source] = entry
+    return entry["agent"]
+
+
+def get_database(source: str) -> CachedSQLDatabase:
+    """Returns the shared SQLDatabase behind `source`'s agent."""
+    get_agent(source)
+    return _registry[source]["db"]
+
+
+def invalidate(source: str = None):
+    """Drops one cached source (or all of them) so the next query rebuilds it."""
+    with _registry_lock:
+        sources = [source] if source else list(_registry)
+        for name in sources:
+            _registry.pop(name, None)
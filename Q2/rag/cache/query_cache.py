@@ -0,0 +1,111 @@
+# rag/cache/query_cache.py
+
+import re
+import sys
+import threading
+from collections import OrderedDict
+
+from rag.config import SQL_CACHE_MAX_BYTES, SQL_CACHE_MAX_ENTRY_BYTES
+
+_QUOTED = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+_CACHEABLE = re.compile(r"^\s*(select|with|pragma\s+table_info|pragma\s+index_list|explain)\b", re.IGNORECASE)
+_VOLATILE = re.compile(r"\b(random|randomblob|changes|last_insert_rowid)\s*\(|'now'", re.IGNORECASE)
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Collapses whitespace and case outside string literals and drops a
+    trailing semicolon, so trivially different spellings share an entry.
+    """
+    parts = _QUOTED.split(sql.strip().rstrip(";").strip())
+    return "".join(
+        part if i % 2 else " ".join(part.lower().split()) for i, part in enumerate(parts)
+    )
+
+
+def is_cacheable(sql: str) -> bool:
+    """Only single read-only statements with deterministic results are cached."""
+    stripped = sql.strip().rstrip(";")
+    return bool(_CACHEABLE.match(stripped)) and ";" not in stripped and not _VOLATILE.search(stripped)
+
+
+def _size_of(value) -> int:
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    return sys.getsizeof(value)
+
+
+class QueryResultCache:
+    """
+    LRU cache of query results shared by every source, capped by the total
+    size of the cached results rather than the number of entries.
+    Each source's entries are tagged with the database version they were
+    read from and are all dropped once that version changes.
+    """
+
+    def __init__(self, max_bytes: int = SQL_CACHE_MAX_BYTES, max_entry_bytes: int = SQL_CACHE_MAX_ENTRY_BYTES):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries = OrderedDict()  # (source, key) -> (value, size)
+        self._versions = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def _check_version(self, source: str, version):
+        if self._versions.get(source) != version:
+            if source in self._versions:
+                self._drop_source(source)
+            self._versions[source] = version
+
+    def _drop_source(self, source: str):
+        stale = [key for key in self._entries if key[0] == source]
+        for key in stale:
+            _, size = self._entries.pop(key)
+            self._bytes -= size
+        self._stats["invalidations"] += len(stale)
+
+    def get(self, source: str, version, key):
+        with self._lock:
+            self._check_version(source, version)
+            entry = self._entries.get((source, key))
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end((source, key))
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def put(self, source: str, version, key, value):
+        size = _size_of(value)
+        if size > self.max_entry_bytes:
+            return
+        with self._lock:
+            self._check_version(source, version)
+            old = self._entries.pop((source, key), None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[(source, key)] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._stats["evictions"] += 1
+
+    def invalidate(self, source: str = None):
+        with self._lock:
+            if source is None:
+                self._stats["invalidations"] += len(self._entries)
+                self._entries.clear()
+                self._versions.clear()
+                self._bytes = 0
+            else:
+                self._drop_source(source)
+                self._versions.pop(source, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), bytes=self._bytes, max_bytes=self.max_bytes)
+
+
+query_cache = QueryResultCache()
@@ -1,9 +1,17 @@
 # rag/chains/summarization_chain.py
 
+import time
+
 from langchain.prompts import PromptTemplate
+from langchain_core.output_parsers import StrOutputParser
 from langchain_openai import ChatOpenAI
 
-llm = ChatOpenAI(model="gpt-4")
+from rag.config import SUMMARY_MAX_INPUT_CHARS, SUMMARY_MODEL, SUMMARY_SHORT_CIRCUIT, SUMMARY_SKIP_MAX_CHARS
+from rag.tracing import callbacks, span
+
+TRUNCATED = " ...[truncated]"
+
+llm = ChatOpenAI(model=SUMMARY_MODEL)
 
 summary_prompt = PromptTemplate(
     input_variables=["results"],
@@ -16,8 +24,100 @@ Respond in clear and helpful language.
 """
 )
 
-summarizer = summary_prompt | llm
+
+def make_summarizer(model):
+    """prompt -> `model` -> plain text."""
+    return summary_prompt | model | StrOutputParser()
+
+
+summarizer = make_summarizer(llm)
+
+
+def _usable(results: dict) -> dict:
+    return {k: str(v).strip() for k, v in results.items() if str(v).strip() and not str(v).startswith("Error:")}
+
+
+def failed_sources(results: dict) -> list:
+    """Sources that errored, timed out or came back empty."""
+    usable = _usable(results)
+    return [k for k in results if k not in usable]
+
+
+def _partial_note(results: dict) -> str:
+    """One-line note naming the failed sources when only some of them answered."""
+    failed = failed_sources(results)
+    if not failed or len(failed) == len(results):
+        return ""
+    return f"\n\nNote: no answer from {', '.join(failed)}, so this may be incomplete."
+
+
+def _fit(results: dict, budget: int) -> dict:
+    """
+    Trims the answers to `budget` characters in total: answers shorter
+    than an equal share are kept whole and the rest split what they leave,
+    so one long answer can't crowd the others out of the prompt.
+    """
+    fitted, remaining = {}, budget
+    by_length = sorted(results, key=lambda k: len(results[k]))
+    for i, source in enumerate(by_length):
+        share = remaining // (len(by_length) - i)
+        text = results[source]
+        if len(text) > share:
+            text = text[:max(share - len(TRUNCATED), 0)].rstrip() + TRUNCATED
+        fitted[source] = text
+        remaining -= len(text)
+    return {source: fitted[source] for source in results}
+
+
+def _join_results(results: dict) -> str:
+    return "\n\n".join([f"Source: {k}\n{k_res}" for k, k_res in results.items()])
+
+
+def _plan(results: dict):
+    """
+    (answer, None, reason) when the results can be shown without an LLM
+    call, else (None, prompt input, None).
+    """
+    usable = _usable(results)
+    if SUMMARY_SHORT_CIRCUIT:
+        if not usable:
+            errors = "\n".join(f"{k}: {v}" for k, v in results.items())
+            return f"None of the sources could answer this question.\n{errors}", None, "no_results"
+        if len(usable) == 1:
+            return next(iter(usable.values())), None, "single_source"
+        if sum(len(v) for v in usable.values()) <= SUMMARY_SKIP_MAX_CHARS:
+            return "\n\n".join(f"{k}: {v}" for k, v in usable.items()), None, "short_results"
+    fitted = _fit(usable or {k: str(v) for k, v in results.items()}, SUMMARY_MAX_INPUT_CHARS)
+    return None, _join_results(fitted), None
+
 
 def generate_summary(results: dict) -> str:
-    joined = "\n\n".join([f"Source: {k}\n{k_res}" for k, k_res in results.items()])
-    return summarizer.invoke({"results": joined})
+    answer, joined, skipped = _plan(results)
+    with span("summary", sources=len(results)) as s:
+        if answer is None:
+            s.set(input_chars=len(joined))
+            answer = summarizer.invoke({"results": joined}, config={"callbacks": callbacks()})
+        else:
+            s.set(skipped=skipped)
+        return answer + _partial_note(results)
+
+
+def stream_summary(results: dict):
+    """Same summary as generate_summary(), yielded as text pieces while the LLM writes it."""
+    answer, joined, skipped = _plan(results)
+    with span("summary", sources=len(results), streamed=True) as s:
+        if answer is not None:
+            s.set(skipped=skipped)
+            yield answer
+        else:
+            s.set(input_chars=len(joined))
+            start, first_token = time.perf_counter(), True
+            for text in summarizer.stream({"results": joined}, config={"callbacks": callbacks()}):
+                if text:
+                    if first_token:
+                        s.set(first_token_ms=round((time.perf_counter() - start) * 1000, 3))
+                        first_token = False
+                    yield text
+        note = _partial_note(results)
+        if note:
+            yield note
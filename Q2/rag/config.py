@@ -4,4 +4,80 @@ DB_PATHS = {
     "zepto": os.path.abspath("sqlite/zepto.db"),
     "blinkit": os.path.abspath("sqlite/blinkit.db"),
     "amazon": os.path.abspath("sqlite/amazon.db"),
+    "bigbasket": os.path.abspath("sqlite/bigbasket.db"),
+    "ecommerce": os.path.abspath("sqlite/ecommerce.db"),
 }
+
+# Sources asked when a question names none (the product catalogs; ones
+# without a built .db file are skipped)
+DEFAULT_SOURCES = [s for s in os.getenv("RAG_DEFAULT_SOURCES", "amazon,bigbasket,zepto,blinkit").split(",") if s]
+
+# Per-source agents are fanned out on a bounded thread pool
+AGENT_MAX_WORKERS = int(os.getenv("RAG_AGENT_MAX_WORKERS", "4"))
+AGENT_TIMEOUT_SECONDS = float(os.getenv("RAG_AGENT_TIMEOUT_SECONDS", "120"))
+
+# Read-only SQLite connection pool (one per source)
+SQLITE_POOL_SIZE = int(os.getenv("RAG_SQLITE_POOL_SIZE", "5"))
+SQLITE_POOL_TIMEOUT_SECONDS = float(os.getenv("RAG_SQLITE_POOL_TIMEOUT_SECONDS", "10"))
+SQLITE_MMAP_SIZE = int(os.getenv("RAG_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("RAG_SQLITE_CACHE_SIZE_KB", "65536"))
+
+EMBEDDING_MODEL = os.getenv("RAG_EMBEDDING_MODEL", "text-embedding-3-small")
+
+# End-to-end answer cache (exact + semantic tiers, persisted in SQLite)
+ANSWER_CACHE_ENABLED = os.getenv("RAG_ANSWER_CACHE", "1") == "1"
+ANSWER_CACHE_PATH = os.path.abspath(os.getenv("RAG_ANSWER_CACHE_PATH", "cache/answer_cache.db"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("RAG_ANSWER_CACHE_TTL_SECONDS", str(24 * 3600)))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("RAG_ANSWER_CACHE_MAX_ENTRIES", "1000"))
+# Semantic hits also need the same numbers, statuses and direction words
+# (answer_cache.question_slots); other near-miss entities (e.g. two product
+# names) are only kept apart by this threshold, so lower it with care
+ANSWER_CACHE_SIMILARITY = float(os.getenv("RAG_ANSWER_CACHE_SIMILARITY", "0.95"))
+
+# Memoized SQL results / schema info for the agents' SQLDatabase
+SQL_CACHE_MAX_BYTES = int(os.getenv("RAG_SQL_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+SQL_CACHE_MAX_ENTRY_BYTES = int(os.getenv("RAG_SQL_CACHE_MAX_ENTRY_BYTES", str(1024 * 1024)))
+
+# Semantic table selection: each question only sees its top-k tables
+SCHEMA_INDEX_ENABLED = os.getenv("RAG_SCHEMA_INDEX", "1") == "1"
+SCHEMA_INDEX_DIR = os.path.abspath(os.getenv("RAG_SCHEMA_INDEX_DIR", "cache/schema_index"))
+SCHEMA_INDEX_TOP_K = int(os.getenv("RAG_SCHEMA_INDEX_TOP_K", "4"))
+
+# Join-path planner over each database's key graph (tool + per-question hint)
+JOIN_PLANNER_ENABLED = os.getenv("RAG_JOIN_PLANNER", "1") == "1"
+
+# Guard around agent-written SQL: read-only, row limits, full-scan checks
+SQL_GUARD_ENABLED = os.getenv("RAG_SQL_GUARD", "1") == "1"
+SQL_GUARD_MAX_ROWS = int(os.getenv("RAG_SQL_GUARD_MAX_ROWS", "50"))
+SQL_GUARD_SAMPLE_ROWS = int(os.getenv("RAG_SQL_GUARD_SAMPLE_ROWS", "10"))
+# Below the big Olist tables (order_items ~113k rows, payments ~104k,
+# geolocation ~1M): grouping or sorting all of them is left to the rollups.
+# Also caps the rows read to count and sample a large result
+SQL_GUARD_MAX_SCAN_ROWS = int(os.getenv("RAG_SQL_GUARD_MAX_SCAN_ROWS", "100000"))
+
+# Full-text (FTS5, BM25-ranked) search tool over product and review text
+FTS_ENABLED = os.getenv("RAG_FTS", "1") == "1"
+FTS_TOP_K = int(os.getenv("RAG_FTS_TOP_K", "5"))
+
+# Request-level tracing: per-stage spans (LLM calls, tools, SQL, retrieval,
+# summary) appended to a JSONL file, or a SQLite file if the path ends in .db
+TRACE_ENABLED = os.getenv("RAG_TRACE", "0") == "1"
+TRACE_PATH = os.path.abspath(os.getenv("RAG_TRACE_PATH", "cache/traces.jsonl"))
+# LangChain's step-by-step console output; off by default when tracing
+AGENT_VERBOSE = os.getenv("RAG_AGENT_VERBOSE", "0" if TRACE_ENABLED else "1") == "1"
+
+# Fast path: simple questions (order counts by status, top-N by rating or
+# discount, price of a named product) are answered with templated SQL
+# instead of the agents when the intent classifier is confident enough
+ROUTER_ENABLED = os.getenv("RAG_ROUTER", "1") == "1"
+ROUTER_MIN_SCORE = float(os.getenv("RAG_ROUTER_MIN_SCORE", "0.3"))
+ROUTER_DEFAULT_TOP_N = int(os.getenv("RAG_ROUTER_DEFAULT_TOP_N", "5"))
+ROUTER_MAX_TOP_N = int(os.getenv("RAG_ROUTER_MAX_TOP_N", "50"))
+
+# Summary of the per-source answers: skipped when only one source answered
+# or the answers are short enough to show as they are; otherwise each
+# answer is trimmed to its share of the input budget before the LLM call
+SUMMARY_MODEL = os.getenv("RAG_SUMMARY_MODEL", "gpt-4o-mini")
+SUMMARY_SHORT_CIRCUIT = os.getenv("RAG_SUMMARY_SHORT_CIRCUIT", "1") == "1"
+SUMMARY_SKIP_MAX_CHARS = int(os.getenv("RAG_SUMMARY_SKIP_MAX_CHARS", "600"))
+SUMMARY_MAX_INPUT_CHARS = int(os.getenv("RAG_SUMMARY_MAX_INPUT_CHARS", "6000"))
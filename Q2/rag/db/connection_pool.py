@@ -1,11 +1,232 @@
+# rag/db/connection_pool.py
+
+import queue
 import sqlite3
+import threading
+import time
 from contextlib import contextmanager
-from rag.config import DB_PATHS
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from rag.config import (
+    DB_PATHS,
+    SQLITE_POOL_SIZE,
+    SQLITE_POOL_TIMEOUT_SECONDS,
+    SQLITE_MMAP_SIZE,
+    SQLITE_CACHE_SIZE_KB,
+)
+from rag.db.versions import get_db_version
+
+
+class PoolTimeout(TimeoutError):
+    """Raised when no pooled connection frees up in time."""
+
+
+class SQLitePool:
+    """
+    A bounded pool of read-only connections to one source database.
+
+    Connections are opened lazily up to `size`, configured once with the
+    mmap/cache/query_only pragmas and handed out LIFO so the most recently
+    used (warmest) connection is reused first.
+    """
+
+    def __init__(self, source: str, size: int = SQLITE_POOL_SIZE, timeout: float = SQLITE_POOL_TIMEOUT_SECONDS):
+        self.source = source
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._open_count = 0
+        self._version = get_db_version(source)
+        self._generation = 0
+        self._generation_of = {}
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time": 0.0,
+            "timeouts": 0,
+            "opened": 0,
+            "discarded": 0,
+        }
+
+    def _open(self) -> sqlite3.Connection:
+        uri = Path(DB_PATHS[self.source]).as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KB}")
+        conn.execute("PRAGMA query_only = ON")
+        self._generation_of[conn] = self._generation
+        return conn
+
+    def _discard(self, conn: sqlite3.Connection):
+        with self._lock:
+            self._open_count -= 1
+            self._stats["discarded"] += 1
+            self._generation_of.pop(conn, None)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    @staticmethod
+    def _is_healthy(conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _check_version(self):
+        # A rebuilt .db file invalidates every idle connection to the old one
+        version = get_db_version(self.source)
+        if version == self._version:
+            return
+        with self._lock:
+            self._version = version
+            self._generation += 1
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+    def checkout(self, timeout: float = None) -> sqlite3.Connection:
+        """Takes a connection out of the pool, waiting up to `timeout` seconds."""
+        self._check_version()
+        timeout = self.timeout if timeout is None else timeout
+
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = None
+                with self._lock:
+                    can_open = self._open_count < self.size
+                    if can_open:
+                        self._open_count += 1
+                if can_open:
+                    try:
+                        conn = self._open()
+                    except Exception:
+                        with self._lock:
+                            self._open_count -= 1
+                        raise
+                    with self._lock:
+                        self._stats["opened"] += 1
+                else:
+                    start = time.perf_counter()
+                    try:
+                        conn = self._idle.get(timeout=timeout)
+                    except queue.Empty:
+                        with self._lock:
+                            self._stats["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"No connection to '{self.source}' became available within {timeout:g}s"
+                        )
+                    finally:
+                        with self._lock:
+                            self._stats["waits"] += 1
+                            self._stats["wait_time"] += time.perf_counter() - start
+
+            if self._is_healthy(conn):
+                with self._lock:
+                    self._stats["checkouts"] += 1
+                return conn
+            self._discard(conn)
+
+    def release(self, conn: sqlite3.Connection):
+        """Returns a connection to the pool, dropping it if it's broken or stale."""
+        if self._generation_of.get(conn) != self._generation:
+            self._discard(conn)
+            return
+        try:
+            conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, open=self._open_count, idle=self._idle.qsize(), size=self.size)
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+class _PooledConnection:
+    """
+    DB-API proxy handed to SQLAlchemy: behaves like the underlying sqlite3
+    connection, except close() gives it back to the pool.
+    """
+
+    def __init__(self, pool: SQLitePool, conn: sqlite3.Connection):
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_conn", conn)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def close(self):
+        conn = self._conn
+        if conn is not None:
+            object.__setattr__(self, "_conn", None)
+            self._pool.release(conn)
+
+
+_pools = {}
+_engines = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(source: str) -> SQLitePool:
+    pool = _pools.get(source)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(source)
+            if pool is None:
+                pool = _pools[source] = SQLitePool(source)
+    return pool
+
+
+def get_engine(source: str):
+    """
+    A SQLAlchemy engine whose connections come from the source's pool, so
+    SQLDatabase/agents share the same warm read-only connections.
+    """
+    engine = _engines.get(source)
+    if engine is None:
+        pool = get_pool(source)
+        with _pools_lock:
+            engine = _engines.get(source)
+            if engine is None:
+                engine = _engines[source] = create_engine(
+                    "sqlite://",
+                    creator=lambda: _PooledConnection(pool, pool.checkout()),
+                    poolclass=NullPool,
+                )
+    return engine
+
+
+def pool_stats() -> dict:
+    return {source: pool.stats() for source, pool in _pools.items()}
+
 
 @contextmanager
-def get_connection(source: str):
+def get_connection(source: str, timeout: float = None):
+    pool = get_pool(source)
+    conn = pool.checkout(timeout)
     try:
-        conn = sqlite3.connect(DB_PATHS[source])
         yield conn
     finally:
-        conn.close()
+        pool.release(conn)
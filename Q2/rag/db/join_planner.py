@@ -0,0 +1,263 @@
+# rag/db/join_planner.py
+
+import heapq
+import math
+import threading
+
+from rag.config import JOIN_PLANNER_ENABLED
+from rag.db.connection_pool import get_connection
+from rag.db.versions import get_db_version
+
+# Inferred (undeclared) keys must match at least this share of sampled values
+MIN_KEY_OVERLAP = 0.5
+KEY_SAMPLE_SIZE = 200
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def read_table_facts(conn) -> dict:
+    """
+    {table: {"rows", "columns", "keys", "indexed", "foreign_keys"}} where
+    "keys" are single-column primary/unique keys, "indexed" the columns
+    that lead an index and "foreign_keys" [(column, ref_table, ref_column)].
+    """
+    tables = [
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' "
+            "AND name NOT LIKE '\\_%' ESCAPE '\\' ORDER BY name"
+        )
+    ]
+    # Row counts from ANALYZE when the loader ran it, else counted
+    stat_rows = {}
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+        for table, stat in conn.execute("SELECT tbl, stat FROM sqlite_stat1"):
+            if stat:
+                stat_rows[table] = max(stat_rows.get(table, 0), int(stat.split()[0]))
+
+    facts = {}
+    for table in tables:
+        info = conn.execute(f"PRAGMA table_info({_quote(table)})").fetchall()
+        columns = [row[1] for row in info]
+        pk = [row[1] for row in sorted(info, key=lambda r: r[5]) if row[5]]
+        keys = set(pk) if len(pk) == 1 else set()
+        indexed = {pk[0]} if pk else set()
+        for _, index_name, unique, *_ in conn.execute(f"PRAGMA index_list({_quote(table)})"):
+            index_columns = [row[2] for row in conn.execute(f"PRAGMA index_info({_quote(index_name)})")]
+            if index_columns:
+                indexed.add(index_columns[0])
+                if unique and len(index_columns) == 1:
+                    keys.add(index_columns[0])
+        foreign_keys = [
+            (row[3], row[2], row[4]) for row in conn.execute(f"PRAGMA foreign_key_list({_quote(table)})")
+        ]
+        rows = stat_rows.get(table)
+        if rows is None:
+            rows = conn.execute(f"SELECT COUNT(*) FROM {_quote(table)}").fetchone()[0]
+        facts[table] = {
+            "rows": rows, "columns": columns, "keys": keys, "indexed": indexed, "foreign_keys": foreign_keys,
+        }
+    return facts
+
+
+def _overlap(conn, table, column, ref_table, ref_column) -> float:
+    """Share of sampled non-null `table.column` values that exist in `ref_table.ref_column`."""
+    sample = (
+        f"SELECT {_quote(column)} AS v FROM {_quote(table)} "
+        f"WHERE {_quote(column)} IS NOT NULL LIMIT {KEY_SAMPLE_SIZE}"
+    )
+    total, found = conn.execute(
+        f"SELECT COUNT(*), SUM(v IN (SELECT {_quote(ref_column)} FROM {_quote(ref_table)})) FROM ({sample})"
+    ).fetchone()
+    return (found or 0) / total if total else 0.0
+
+
+class JoinPlanner:
+    """
+    Foreign-key graph of one database and the cheapest way to join a set
+    of its tables.
+
+    Edges come from declared foreign keys, or are inferred when two tables
+    share a column name, one side of which is a single-column key, and
+    sampled values actually match. Each edge is weighted by the size of the
+    tables involved and whether the join column is indexed, so paths prefer
+    small, indexed lookups over wide scans.
+    """
+
+    def __init__(self, facts: dict, edges: list):
+        self.facts = facts
+        self.edges = edges
+        self.graph = {table: [] for table in facts}
+        for edge in edges:
+            self.graph[edge["child"]].append((edge["parent"], edge))
+            self.graph[edge["parent"]].append((edge["child"], edge))
+
+    @classmethod
+    def from_connection(cls, conn) -> "JoinPlanner":
+        facts = read_table_facts(conn)
+        edges, seen = [], set()
+
+        def add(child, column, parent, ref_column):
+            if (child, column, parent, ref_column) in seen:
+                return
+            seen.add((child, column, parent, ref_column))
+            edges.append({
+                "child": child, "column": column, "parent": parent, "ref_column": ref_column,
+                "weight": cls._weight(facts, child, column, parent, ref_column),
+            })
+
+        for table, info in facts.items():
+            for column, ref_table, ref_column in info["foreign_keys"]:
+                if ref_table in facts:
+                    add(table, column, ref_table, ref_column or column)
+
+        for parent, parent_info in facts.items():
+            for key in parent_info["keys"]:
+                for child, child_info in facts.items():
+                    if child == parent or key not in child_info["columns"]:
+                        continue
+                    # A key of both tables (1:1) only needs one direction
+                    if key in child_info["keys"] and child < parent:
+                        continue
+                    if _overlap(conn, child, key, parent, key) >= MIN_KEY_OVERLAP:
+                        add(child, key, parent, key)
+        return cls(facts, edges)
+
+    @staticmethod
+    def _weight(facts, child, column, parent, ref_column) -> float:
+        rows = facts[child]["rows"] + facts[parent]["rows"]
+        indexed = column in facts[child]["indexed"] or ref_column in facts[parent]["indexed"]
+        return math.log10(rows + 10) * (1.0 if indexed else 3.0)
+
+    def _shortest_from(self, tree: set):
+        """Dijkstra from every table already in the tree at once."""
+        dist = {table: 0.0 for table in tree}
+        via = {}
+        heap = [(0.0, table) for table in tree]
+        while heap:
+            d, table = heapq.heappop(heap)
+            if d > dist.get(table, math.inf):
+                continue
+            for neighbour, edge in self.graph[table]:
+                nd = d + edge["weight"]
+                if nd < dist.get(neighbour, math.inf):
+                    dist[neighbour] = nd
+                    via[neighbour] = (table, edge)
+                    heapq.heappush(heap, (nd, neighbour))
+        return dist, via
+
+    def _linked(self, tables):
+        """Known tables in the given order, those with no join keys at all last."""
+        known = [t for t in dict.fromkeys(tables) if t in self.graph]
+        return [t for t in known if self.graph[t]] + [t for t in known if not self.graph[t]]
+
+    def plan(self, tables):
+        """
+        Edges joining `tables` (plus any bridge tables needed), in join
+        order, as [(joined_table, edge)]. Grown greedily from the first
+        table: each step attaches the cheapest-to-reach remaining table.
+        Tables that can't be reached are left out.
+        """
+        wanted = self._linked(tables)
+        if len(wanted) < 2:
+            return []
+        tree, steps = {wanted[0]}, []
+        remaining = set(wanted[1:])
+        while remaining:
+            dist, via = self._shortest_from(tree)
+            reachable = [t for t in remaining if t in dist]
+            if not reachable:
+                break
+            target = min(reachable, key=lambda t: (dist[t], t))
+            path = []
+            node = target
+            while node not in tree:
+                previous, edge = via[node]
+                path.append((node, edge))
+                node = previous
+            for node, edge in reversed(path):
+                tree.add(node)
+                steps.append((node, edge))
+            remaining -= tree
+        return steps
+
+    def describe(self, tables) -> str:
+        """Human/LLM-readable join path for `tables`, or a note if there is none."""
+        tables = self._linked(tables)
+        steps = self.plan(tables)
+        if not steps:
+            return "No join path found between: " + ", ".join(tables)
+
+        joined = {tables[0]}
+        lines = [f"FROM {tables[0]}"]
+        notes = []
+        for table, edge in steps:
+            other = edge["parent"] if table == edge["child"] else edge["child"]
+            lines.append(
+                f"JOIN {table} ON {edge['child']}.{edge['column']} = {edge['parent']}.{edge['ref_column']}"
+            )
+            # Joining towards the child side multiplies rows (one parent, many children)
+            if table == edge["child"] and edge["column"] not in self.facts[table]["keys"]:
+                notes.append(
+                    f"each {other} row can match many {table} rows; aggregate {table} first "
+                    f"if you are counting or averaging {other} values"
+                )
+            joined.add(table)
+        unreachable = [t for t in tables if t not in joined]
+        if unreachable:
+            notes.append("no join key links " + ", ".join(unreachable) + " to the other tables")
+        return "\n".join(lines + [f"-- {note}" for note in notes])
+
+
+_planners = {}
+_planners_lock = threading.Lock()
+
+
+def get_join_planner(source: str) -> JoinPlanner:
+    """Shared planner for `source`, rebuilt when its .db file changes."""
+    version = get_db_version(source)
+    with _planners_lock:
+        entry = _planners.get(source)
+        if entry is None or entry[0] != version:
+            with get_connection(source) as conn:
+                entry = (version, JoinPlanner.from_connection(conn))
+            _planners[source] = entry
+        return entry[1]
+
+
+def join_path_tool(source: str):
+    """LangChain tool that lets a SQL agent ask for the join path between tables."""
+    from langchain.tools import Tool
+
+    def run(tables: str) -> str:
+        names = [name.strip().strip("'\"`") for name in tables.replace("\n", ",").split(",") if name.strip()]
+        return get_join_planner(source).describe(names)
+
+    return Tool(
+        name="sql_db_join_path",
+        func=run,
+        description=(
+            "Input is a comma-separated list of tables you need to combine in one query. "
+            "Output is the JOIN ... ON ... path between them using the database's keys, "
+            "including any bridge tables. Use this instead of guessing join columns."
+        ),
+    )
+
+
+def join_hint(source: str, tables) -> str:
+    """
+    Join path between the tables picked for a question, to append to the
+    agent's input; empty when fewer than two of them are linked.
+    """
+    if not JOIN_PLANNER_ENABLED or not tables or len(tables) < 2:
+        return ""
+    try:
+        planner = get_join_planner(source)
+        linked = [t for t in tables if planner.graph.get(t)]
+        if not planner.plan(linked):
+            return ""
+        return "Join path between the relevant tables:\n" + planner.describe(linked)
+    except Exception as e:
+        print(f"Join planner unavailable for '{source}': {e}")
+        return ""
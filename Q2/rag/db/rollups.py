@@ -0,0 +1,61 @@
+# rag/db/rollups.py
+
+import json
+import threading
+
+from rag.db.connection_pool import get_connection
+from rag.db.versions import get_db_version
+
+# Written by data_processing/rollups.py into each database
+REGISTRY_TABLE = "_rollups"
+
+_rollups = {}
+_rollups_lock = threading.Lock()
+
+
+def get_rollups(source: str) -> list:
+    """
+    Summary tables registered in `source`'s database, as dicts with name,
+    base_tables, group_by, description and row_count. Re-read whenever the
+    .db file changes; empty if the database has no rollups.
+    """
+    version = get_db_version(source)
+    with _rollups_lock:
+        entry = _rollups.get(source)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+    with get_connection(source) as conn:
+        has_registry = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (REGISTRY_TABLE,)
+        ).fetchone()
+        rows = conn.execute(
+            f"SELECT name, base_tables, group_by, description, row_count FROM {REGISTRY_TABLE} ORDER BY name"
+        ).fetchall() if has_registry else []
+    rollups = [
+        {"name": name, "base_tables": json.loads(base), "group_by": json.loads(group_by),
+         "description": description, "row_count": row_count}
+        for name, base, group_by, description, row_count in rows
+    ]
+    with _rollups_lock:
+        _rollups[source] = (version, rollups)
+    return rollups
+
+
+def relevant_rollups(source: str, tables=None) -> list:
+    """Rollups built from any of `tables` (all of them when tables is None)."""
+    rollups = get_rollups(source)
+    if tables is None:
+        return rollups
+    tables = set(tables)
+    return [r for r in rollups if tables & set(r["base_tables"]) or r["name"] in tables]
+
+
+def rollup_hint(rollups) -> str:
+    """Agent-facing note pointing at summary tables that can replace a GROUP BY scan."""
+    if not rollups:
+        return ""
+    lines = ["Precomputed summary tables (one row per group, indexed on the group columns); "
+             "query these instead of aggregating the base tables when they cover the question:"]
+    for r in rollups:
+        lines.append(f"- {r['name']} (grouped by {', '.join(r['group_by'])}): {r['description']}")
+    return "\n".join(lines)
@@ -0,0 +1,186 @@
+# rag/db/schema_index.py
+
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+from rag.config import SCHEMA_INDEX_DIR, SCHEMA_INDEX_ENABLED, SCHEMA_INDEX_TOP_K
+from rag.db.connection_pool import get_connection
+from rag.db.versions import get_db_version
+from rag.tracing import span
+
+# Distinct example values listed for each text column
+SAMPLE_VALUES = 5
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _words(name: str) -> str:
+    return name.replace("_", " ")
+
+
+def describe_schema(conn) -> dict:
+    """
+    Reads every table's columns, row count and a few example values for
+    text columns. Returns {table: {"rows", "columns": [{"name", "type", "examples"}]}}.
+    """
+    tables = [
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' "
+            "AND name NOT LIKE '\\_%' ESCAPE '\\' ORDER BY name"
+        )
+    ]
+    schema = {}
+    for table in tables:
+        columns = []
+        for _, name, col_type, _, _, _ in conn.execute(f"PRAGMA table_info({_quote(table)})"):
+            examples = []
+            if "CHAR" in (col_type or "").upper() or "TEXT" in (col_type or "").upper():
+                examples = [
+                    str(row[0])[:40] for row in conn.execute(
+                        f"SELECT DISTINCT {_quote(name)} FROM {_quote(table)} "
+                        f"WHERE {_quote(name)} IS NOT NULL LIMIT {SAMPLE_VALUES}"
+                    )
+                ]
+            columns.append({"name": name, "type": col_type or "", "examples": examples})
+        rows = conn.execute(f"SELECT COUNT(*) FROM {_quote(table)}").fetchone()[0]
+        schema[table] = {"rows": rows, "columns": columns}
+    return schema
+
+
+def table_documents(schema: dict):
+    """
+    One text per table plus one per column, each paired with its table.
+    These are what gets embedded and matched against the question.
+    """
+    docs = []
+    for table, info in schema.items():
+        column_names = ", ".join(_words(c["name"]) for c in info["columns"])
+        docs.append((table, f"table {_words(table)} ({info['rows']} rows) with columns: {column_names}"))
+        for column in info["columns"]:
+            text = f"{_words(table)} {_words(column['name'])} ({column['type']})"
+            if column["examples"]:
+                text += ", e.g. " + ", ".join(column["examples"])
+            docs.append((table, text))
+    return docs
+
+
+class SchemaIndex:
+    """
+    Per-source index of table and column descriptions and their embeddings,
+    used to show the SQL agent only the tables a question needs.
+
+    Descriptions and vectors are computed once per database version and
+    kept in SCHEMA_INDEX_DIR/<source>.json, so restarts don't re-embed.
+    """
+
+    def __init__(self, source: str, embeddings=None, index_dir: str = SCHEMA_INDEX_DIR):
+        self.source = source
+        self.path = os.path.join(index_dir, f"{source}.json")
+        self._embeddings = embeddings
+        self._lock = threading.Lock()
+        self._data = None
+
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            from rag.utils.embeddings import get_embeddings
+            self._embeddings = get_embeddings()
+        return self._embeddings
+
+    def _load(self):
+        version = list(get_db_version(self.source))
+        if self._data is not None and self._data["version"] == version:
+            return self._data
+        with self._lock:
+            if self._data is not None and self._data["version"] == version:
+                return self._data
+            data = None
+            if os.path.exists(self.path):
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") != version:
+                    data = None
+            if data is None:
+                data = self._build(version)
+            data["matrix"] = np.asarray(data["vectors"], dtype=np.float32) if data["vectors"] else None
+            self._data = data
+        return self._data
+
+    def _build(self, version):
+        print(f"Building schema index for '{self.source}'...")
+        with get_connection(self.source) as conn:
+            schema = describe_schema(conn)
+        docs = table_documents(schema)
+        data = {"version": version, "schema": schema, "doc_tables": [t for t, _ in docs], "vectors": []}
+        # Small databases are always shown whole, so they never need vectors
+        if len(schema) > SCHEMA_INDEX_TOP_K:
+            vectors = np.asarray(self.embeddings.embed_documents([text for _, text in docs]), dtype=np.float32)
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            data["vectors"] = vectors.tolist()
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+        return data
+
+    def tables(self):
+        return list(self._load()["schema"])
+
+    def select_tables(self, question: str, k: int = SCHEMA_INDEX_TOP_K):
+        """
+        The `k` tables most relevant to `question`, best first. A table
+        whose name appears in the question is always included; a database
+        with at most `k` tables is returned whole.
+        """
+        data = self._load()
+        tables = list(data["schema"])
+        if len(tables) <= k or data["matrix"] is None:
+            return tables
+
+        query = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        # A table scores as well as its best-matching description
+        best = {}
+        for table, score in zip(data["doc_tables"], data["matrix"] @ query):
+            best[table] = max(best.get(table, -1.0), float(score))
+
+        text = question.lower()
+        named = [t for t in tables if re.search(rf"\b{re.escape(_words(t).lower())}s?\b", text)]
+        ranked = sorted(best, key=best.get, reverse=True)
+        return (named + [t for t in ranked if t not in named])[:max(k, len(named))]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_schema_index(source: str) -> SchemaIndex:
+    with _indexes_lock:
+        if source not in _indexes:
+            _indexes[source] = SchemaIndex(source)
+        return _indexes[source]
+
+
+def select_tables(source: str, question: str):
+    """
+    Tables to show the agent for `question`, or None for "all of them"
+    (selection disabled, or the index couldn't be built).
+    """
+    if not SCHEMA_INDEX_ENABLED:
+        return None
+    with span("schema_select", source=source) as s:
+        try:
+            tables = get_schema_index(source).select_tables(question)
+        except Exception as e:
+            print(f"Schema index unavailable for '{source}', using full schema: {e}")
+            return None
+        s.set(tables=tables)
+        return tables
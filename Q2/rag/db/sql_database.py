@@ -0,0 +1,124 @@
+# rag/db/sql_database.py
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from langchain_community.utilities.sql_database import SQLDatabase, truncate_word
+
+from rag.cache.query_cache import query_cache, normalize_sql, is_cacheable
+from rag.config import SQL_GUARD_ENABLED
+from rag.db.join_planner import get_join_planner
+from rag.db.query_guard import QueryGuard, QueryRejected, check_read_only
+from rag.db.versions import get_db_version
+from rag.tracing import span
+
+
+class CachedSQLDatabase(SQLDatabase):
+    """
+    SQLDatabase whose read queries and table-info lookups are memoized in
+    the shared query cache, keyed by source and normalized SQL text.
+    Every lookup re-checks the .db file version, so a rebuilt table is
+    never served from the cache.
+
+    scoped_tables() narrows the tables the agent sees (table listing and
+    default table info) for the current question only; the database
+    object itself stays shared between questions and threads.
+
+    With `guard` on, string queries go through a QueryGuard: read-only
+    statements only, row limits, full-scan checks and summarised large
+    results (see rag/db/query_guard.py).
+    """
+
+    def __init__(self, engine, source: str, cache=query_cache, guard: bool = SQL_GUARD_ENABLED, **kwargs):
+        self.source = source
+        self.cache = cache
+        self._scope = ContextVar(f"table_scope_{source}", default=None)
+        super().__init__(engine, **kwargs)
+        self.guard = QueryGuard(self._execute, self._table_stats, self._format_rows) if guard else None
+
+    def _table_stats(self):
+        facts = get_join_planner(self.source).facts
+        return {table: (info["rows"], sorted(info["indexed"])) for table, info in facts.items()}
+
+    def _format_rows(self, rows, include_columns=False) -> str:
+        # Same rendering as SQLDatabase.run
+        rows = [
+            {column: truncate_word(value, length=self._max_string_length) for column, value in row.items()}
+            for row in rows
+        ]
+        if not include_columns:
+            rows = [tuple(row.values()) for row in rows]
+        return str(rows) if rows else ""
+
+    @contextmanager
+    def scoped_tables(self, tables):
+        """Within this block, only `tables` are listed to the agent (None = all)."""
+        token = self._scope.set(tuple(tables) if tables else None)
+        try:
+            yield self
+        finally:
+            self._scope.reset(token)
+
+    def get_usable_table_names(self):
+        # Tables starting with "_" (e.g. the _rollups registry) are internal
+        names = [name for name in super().get_usable_table_names() if not name.startswith("_")]
+        scope = self._scope.get()
+        if scope is None:
+            return names
+        # Keep the relevance order from the schema index
+        return [name for name in scope if name in names]
+
+    def _cached(self, key, compute):
+        version = get_db_version(self.source)
+        result = self.cache.get(self.source, version, key)
+        if result is None:
+            result = compute()
+            self.cache.put(self.source, version, key, result)
+        return result
+
+    def _execute(self, command, fetch="all", *, parameters=None, execution_options=None):
+        # Every statement that reaches SQLite (cache hits never get here)
+        with span("sql", source=self.source, sql=command) as s:
+            result = super()._execute(command, fetch, parameters=parameters, execution_options=execution_options)
+            if isinstance(result, list):
+                s.set(rows=len(result))
+            return result
+
+    def run(self, command, fetch="all", include_columns=False, *, parameters=None, execution_options=None):
+        if self.guard is not None and isinstance(command, str) and fetch != "cursor":
+            command = check_read_only(command)
+            if fetch == "all" and not parameters and not execution_options:
+                guarded = lambda: self.guard.run(command, include_columns)
+                if not is_cacheable(command):
+                    return guarded()
+                return self.guard.revive(
+                    command, self._cached(("guarded", normalize_sql(command), include_columns), guarded)
+                )
+        if fetch == "cursor" or execution_options or not isinstance(command, str) or not is_cacheable(command):
+            return super().run(
+                command, fetch, include_columns, parameters=parameters, execution_options=execution_options
+            )
+        key = ("run", normalize_sql(command), fetch, include_columns, repr(sorted((parameters or {}).items())))
+        return self._cached(
+            key, lambda: super(CachedSQLDatabase, self).run(command, fetch, include_columns, parameters=parameters)
+        )
+
+    def run_no_throw(self, command, fetch="all", include_columns=False, *, parameters=None,
+                     execution_options=None):
+        try:
+            return super().run_no_throw(
+                command, fetch, include_columns, parameters=parameters, execution_options=execution_options
+            )
+        except QueryRejected as e:
+            return f"Error: {e}"
+
+    def get_table_info(self, table_names=None):
+        if table_names is None and self._scope.get() is not None:
+            table_names = self.get_usable_table_names()
+        key = ("table_info", tuple(sorted(table_names)) if table_names else None)
+
+        def compute():
+            # Tables outside the scope can still be described when asked for by name
+            with self.scoped_tables(None):
+                return super(CachedSQLDatabase, self).get_table_info(table_names)
+        return self._cached(key, compute)
@@ -0,0 +1,168 @@
+# rag/db/text_search.py
+
+import json
+import re
+import sqlite3
+import threading
+import unicodedata
+
+from rag.config import FTS_ENABLED, FTS_TOP_K
+from rag.db.connection_pool import get_connection
+from rag.db.versions import get_db_version
+from rag.tracing import span
+
+# Written by data_processing/fts.py into each database
+REGISTRY_TABLE = "_fts"
+SNIPPET_TOKENS = 16
+# Terms in more than this share of an index's rows are too common to search on
+MAX_TERM_SHARE = 0.2
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def get_fts_indexes(source: str) -> list:
+    """
+    Full-text indexes registered in `source`'s database, as dicts with name,
+    base_table, columns, show and description. Re-read whenever the .db
+    file changes; empty if the database has none.
+    """
+    version = get_db_version(source)
+    with _indexes_lock:
+        entry = _indexes.get(source)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+    with get_connection(source) as conn:
+        has_registry = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (REGISTRY_TABLE,)
+        ).fetchone()
+        rows = conn.execute(
+            f"SELECT name, base_table, columns, show, description FROM {REGISTRY_TABLE} ORDER BY name"
+        ).fetchall() if has_registry else []
+    indexes = [
+        {"name": name, "base_table": base_table, "columns": json.loads(columns), "show": json.loads(show),
+         "description": description}
+        for name, base_table, columns, show, description in rows
+    ]
+    with _indexes_lock:
+        _indexes[source] = (version, indexes)
+    return indexes
+
+
+def search_terms(text: str) -> list:
+    """Distinct lower-case, accent-free words of `text`, as the FTS5 tokenizer sees them."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return list(dict.fromkeys(w for w in re.findall(r"\w+", text) if len(w) > 1 or w.isdigit()))
+
+
+def selective_terms(conn, index: dict, terms: list) -> list:
+    """
+    The terms worth matching in `index`, rarest first: those that occur at
+    all and in at most MAX_TERM_SHARE of its rows (only the rarest if every
+    term is that common). Words like "what" or "product" would otherwise
+    turn an any-word search into ranking most of the table.
+    """
+    vocab = _quote(index["name"] + "_vocab")
+    try:
+        # One lookup per term: fts5vocab only uses its term index for "="
+        doc_counts = {
+            t: row[0] for t in terms
+            for row in conn.execute(f"SELECT doc FROM {vocab} WHERE term = ?", (t,))
+        }
+    except sqlite3.OperationalError:
+        # Index built before vocab tables existed
+        return terms
+    total = conn.execute(f"SELECT MAX(rowid) FROM {_quote(index['base_table'])}").fetchone()[0] or 0
+    present = sorted((t for t in terms if doc_counts.get(t)), key=doc_counts.get)
+    return [t for t in present if doc_counts[t] <= MAX_TERM_SHARE * total] or present[:1]
+
+
+def match_expression(terms, any_term: bool = False) -> str:
+    """
+    FTS5 MATCH expression: every term quoted (so punctuation and FTS
+    operators are taken literally), all of them required, or any of them
+    with `any_term`.
+    """
+    return (" OR " if any_term else " ").join(f'"{t}"' for t in terms)
+
+
+def search(source: str, text: str, k: int = FTS_TOP_K) -> list:
+    """
+    Best BM25 matches for `text` across `source`'s full-text indexes, as
+    dicts with table, row (the index's `show` columns), snippet and score
+    (lower is better). Each index contributes rows matching every
+    selective term, or if there are none, rows matching any of them;
+    all-term matches rank first.
+    """
+    with span("text_search", source=source, query=text) as s:
+        terms = search_terms(text)
+        if not terms:
+            return []
+        hits = []
+        with get_connection(source) as conn:
+            for index in get_fts_indexes(source):
+                fts, table = _quote(index["name"]), _quote(index["base_table"])
+                columns = ", ".join(f"b.{_quote(c)}" for c in index["show"])
+                selective = selective_terms(conn, index, terms)
+                found = False
+                for any_term in (False, True):
+                    if not selective or found:
+                        break
+                    rows = conn.execute(
+                        # `rank` is bm25() by default; ORDER BY rank + LIMIT is FTS5's fast path for top-k
+                        f"SELECT {columns}, snippet({fts}, -1, '[', ']', '…', {SNIPPET_TOKENS}), {fts}.rank "
+                        f"FROM {fts} JOIN {table} b ON b.rowid = {fts}.rowid "
+                        f"WHERE {fts} MATCH ? ORDER BY {fts}.rank LIMIT ?",
+                        (match_expression(selective, any_term), k),
+                    ).fetchall()
+                    found = bool(rows)
+                    for *values, snippet, score in rows:
+                        hits.append({
+                            "table": index["base_table"], "row": dict(zip(index["show"], values)),
+                            "snippet": snippet, "score": score, "all_terms": not any_term,
+                        })
+        hits.sort(key=lambda h: (not h["all_terms"], h["score"]))
+        s.set(hits=min(len(hits), k))
+        return hits[:k]
+
+
+def format_hits(hits) -> str:
+    if not hits:
+        return "No matching text found."
+    lines = []
+    for hit in hits:
+        row = ", ".join(f"{column}={value}" for column, value in hit["row"].items())
+        lines.append(f"[{hit['table']}] {row}\n    {hit['snippet']}")
+    return "\n".join(lines)
+
+
+def text_search_tool(source: str):
+    """LangChain tool for keyword search over `source`'s indexed text columns."""
+    from langchain.tools import Tool
+
+    covered = "; ".join(index["description"] for index in get_fts_indexes(source))
+    return Tool(
+        name="text_search",
+        func=lambda text: format_hits(search(source, text)),
+        description=(
+            f"Keyword search over {covered}. Input is a few search words (no SQL). Output is the best "
+            f"matching rows, ranked by relevance, with their key columns and the matching text. "
+            f"Use this instead of LIKE '%...%' queries to find rows by what their text says, then "
+            f"query those rows with SQL if you need more columns."
+        ),
+    )
+
+
+def has_text_search(source: str) -> bool:
+    if not FTS_ENABLED:
+        return False
+    try:
+        return bool(get_fts_indexes(source))
+    except Exception as e:
+        print(f"Text search unavailable for '{source}': {e}")
+        return False
@@ -0,0 +1,14 @@
+# rag/db/versions.py
+
+import os
+from rag.config import DB_PATHS
+
+
+def get_db_version(source: str):
+    """
+    Returns a cheap fingerprint of a source's .db file (mtime + size).
+    Anything built from the database should be rebuilt when it changes,
+    e.g. after a data_processing script rewrites a table.
+    """
+    stat = os.stat(DB_PATHS[source])
+    return (stat.st_mtime_ns, stat.st_size)
@@ -1,22 +1,174 @@
 # rag/main.py
 
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from contextvars import copy_context
+
 from rag.utils.query_parser import detect_sources
-from rag.agents.query_agent import get_agent
-from rag.chains.summarization_chain import generate_summary
+from rag.agents.query_agent import get_agent, get_database
+from rag.db.schema_index import select_tables
+from rag.db.join_planner import join_hint
+from rag.db.rollups import relevant_rollups, rollup_hint
+from rag.chains.summarization_chain import failed_sources, generate_summary, stream_summary
+from rag.cache.answer_cache import get_answer_cache
+from rag.config import AGENT_MAX_WORKERS, AGENT_TIMEOUT_SECONDS, ANSWER_CACHE_ENABLED, ROUTER_ENABLED
+from rag import router, tracing
 
-def process_user_query(query: str):
-    sources = detect_sources(query)
-    results = {}
+# Shared pool so concurrent questions can't spawn unbounded agent threads
+_executor = ThreadPoolExecutor(max_workers=AGENT_MAX_WORKERS, thread_name_prefix="rag-agent")
+
+
+def _submit(source: str, query: str):
+    # Run in a copy of the caller's context so the agent's spans join its trace
+    return _executor.submit(copy_context().run, run_source_agent, source, query)
 
+
+def run_source_agent(source: str, query: str) -> str:
+    with tracing.span("agent", source=source) as s:
+        agent = get_agent(source)
+        # Only the tables relevant to this question are listed to the agent,
+        # along with the join path between them and any summary tables that
+        # already aggregate them
+        tables = select_tables(source, query)
+        rollups = relevant_rollups(source, tables)
+        if tables is not None:
+            tables = list(tables) + [r["name"] for r in rollups if r["name"] not in tables]
+        hints = [hint for hint in (rollup_hint(rollups), join_hint(source, tables)) if hint]
+        with get_database(source).scoped_tables(tables):
+            answer = agent.run("\n\n".join([query] + hints), callbacks=tracing.callbacks())
+        s.set(answer_chars=len(answer))
+        return answer
+
+
+def run_agents_sequentially(sources, query: str) -> dict:
+    results = {}
     for source in sources:
         try:
-            agent = get_agent(source)
-            answer = agent.run(query)
-            results[source] = answer
+            results[source] = run_source_agent(source, query)
+        except Exception as e:
+            results[source] = f"Error: {str(e)}"
+    return results
+
+
+def run_agents_concurrently(sources, query: str, timeout: float = AGENT_TIMEOUT_SECONDS) -> dict:
+    """
+    Runs every per-source agent at the same time and waits for all of them,
+    so the wall-clock cost is the slowest source instead of the sum.
+    Sources that don't finish within `timeout` seconds are cancelled and
+    reported as errors, the same way a failing agent is.
+    """
+    futures = {source: _submit(source, query) for source in sources}
+    wait(futures.values(), timeout=timeout)
+
+    results = {}
+    for source, future in futures.items():
+        if not future.done():
+            # Queued agents are dropped; a running one can't be interrupted,
+            # but its answer is ignored and the agent's own
+            # max_execution_time stops it at the next step.
+            future.cancel()
+            results[source] = f"Error: timed out after {timeout:g}s"
+            continue
+        try:
+            results[source] = future.result()
         except Exception as e:
             results[source] = f"Error: {str(e)}"
+    return results
+
+
+def process_user_query(query: str, concurrent: bool = True, timeout: float = AGENT_TIMEOUT_SECONDS,
+                       use_cache: bool = ANSWER_CACHE_ENABLED) -> str:
+    with tracing.trace("request", query=query) as t:
+        sources = detect_sources(query)
+        t.set(sources=sources)
+
+        if use_cache:
+            cached = get_answer_cache().get(query, sources)
+            if cached is not None:
+                t.set(answer_cache_hit=True)
+                return cached
+
+        # Simple questions are answered straight from templated SQL
+        fast = router.answer(query, sources) if ROUTER_ENABLED else None
+        if fast is not None:
+            answer = "\n\n".join(fast.values())
+            if use_cache:
+                get_answer_cache().put(query, sources, answer)
+            return answer
+
+        if concurrent and len(sources) > 1:
+            results = run_agents_concurrently(sources, query, timeout=timeout)
+        else:
+            results = run_agents_sequentially(sources, query)
+
+        answer = generate_summary(results)
+
+        # Only cache complete answers: a partial one (a source failed or timed
+        # out) would outlive the outage for the whole TTL
+        if use_cache and not failed_sources(results):
+            get_answer_cache().put(query, sources, answer)
+        return answer
+
+def stream_user_query(query: str, timeout: float = AGENT_TIMEOUT_SECONDS,
+                      use_cache: bool = ANSWER_CACHE_ENABLED):
+    """
+    Streaming version of process_user_query(), with the same event shapes
+    as the support agent's stream_answer() in Q1:
+      {"type": "tool_start", "name": source, "input": query}
+      {"type": "tool_end", "name": source, "output": result}   (as each source finishes)
+      {"type": "token", "text": ...}                          (pieces of the summary)
+    """
+    with tracing.trace("request", query=query, streamed=True) as t:
+        sources = detect_sources(query)
+        t.set(sources=sources)
+
+        if use_cache:
+            cached = get_answer_cache().get(query, sources)
+            if cached is not None:
+                t.set(answer_cache_hit=True)
+                yield {"type": "token", "text": cached}
+                return
+
+        fast = router.answer(query, sources) if ROUTER_ENABLED else None
+        if fast is not None:
+            for source, result in fast.items():
+                yield {"type": "tool_start", "name": source, "input": query}
+                yield {"type": "tool_end", "name": source, "output": result}
+            answer = "\n\n".join(fast.values())
+            yield {"type": "token", "text": answer}
+            if use_cache:
+                get_answer_cache().put(query, sources, answer)
+            return
+
+        futures = {}
+        for source in sources:
+            futures[_submit(source, query)] = source
+            yield {"type": "tool_start", "name": source, "input": query}
+
+        results = {}
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                source = futures[future]
+                try:
+                    results[source] = future.result()
+                except Exception as e:
+                    results[source] = f"Error: {str(e)}"
+                yield {"type": "tool_end", "name": source, "output": results[source]}
+        except TimeoutError:
+            for future, source in futures.items():
+                if source not in results:
+                    future.cancel()
+                    results[source] = f"Error: timed out after {timeout:g}s"
+                    yield {"type": "tool_end", "name": source, "output": results[source]}
+
+        # Summarise in the order the sources were asked for, like process_user_query
+        results = {source: results[source] for source in sources}
+        pieces = []
+        for text in stream_summary(results):
+            pieces.append(text)
+            yield {"type": "token", "text": text}
 
-    return generate_summary(results)
+        if use_cache and not failed_sources(results):
+            get_answer_cache().put(query, sources, "".join(pieces))
 
 if __name__ == "__main__":
     question = input("Ask your question: ")
@@ -0,0 +1,373 @@
+# rag/router.py
+#
+# Fast path for simple questions. A local nearest-centroid classifier
+# (hashed word features, no model download or API call) picks the intent;
+# rules then fill the template's slots from the question and reject it if
+# it says anything the template can't express ("top rated headphones" is
+# not "top rated products"). Matched questions are answered with one
+# parameterized query per source on the read-only pool, with no LLM call;
+# everything else goes to the agents as before.
+#
+# Intents:
+#   status_count   orders per status, or of one status       (ecommerce)
+#   top_rated      top N products by rating                 (amazon, bigbasket)
+#   top_discount   top N products by discount               (amazon, bigbasket)
+#   price_lookup   price of a named product                 (amazon, bigbasket)
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from rag.config import ROUTER_DEFAULT_TOP_N, ROUTER_MAX_TOP_N, ROUTER_MIN_SCORE
+from rag.db.connection_pool import get_connection
+from rag.db.text_search import get_fts_indexes, match_expression, search_terms
+from rag.db.versions import get_db_version
+from rag.tracing import span
+from rag.utils.query_parser import available_sources, detect_sources
+
+INTENT_EXAMPLES = {
+    "status_count": [
+        "how many orders are delivered", "how many orders were canceled", "number of orders by status",
+        "count orders per status", "how many orders are still processing", "orders by order status",
+        "how many shipped orders are there", "order status breakdown",
+    ],
+    "top_rated": [
+        "top rated products", "top 10 products by rating", "highest rated products", "best rated items",
+        "which products have the best ratings", "show the 5 highest rated products", "best reviewed products",
+        "products with the highest rating",
+    ],
+    "top_discount": [
+        "biggest discounts", "top 10 most discounted products", "which products have the highest discount",
+        "best deals", "products with the largest discount percentage", "most discounted items",
+        "show the 5 biggest discounts", "highest discount products",
+    ],
+    "price_lookup": [
+        "what is the price of fortune sunflower oil", "how much does the boat airdopes cost",
+        "price of tata salt", "how much is the redmi 9a", "what does the mi power bank cost",
+        "cost of amul butter", "what's the price for the samsung galaxy m33",
+    ],
+    "other": [
+        "compare average prices per category", "which sellers have the most late deliveries",
+        "what is the average review score per product category", "average price of tea brands",
+        "which categories have the most products", "recommend a good phone under 20000",
+        "how many products are in each category", "monthly revenue trend", "what do reviews say about battery life",
+        "which brands sell the most snacks", "show products similar to earphones",
+        "total freight value per seller state", "what is the cheapest tea with a rating above 4",
+    ],
+}
+
+# Words a top-N / status question may use besides its slots; anything else
+# means the question is narrower than the template
+INTENT_WORDS = {
+    "status_count": "how many much number count counts of orders order by per status statuses are were is "
+                    "there still in breakdown the total with",
+    "top_rated": "top best highest rated rating ratings rate reviewed review reviews products product items "
+                 "item which what are is the with have has show list me give find most by on from in of "
+                 "stars star",
+    "top_discount": "top biggest highest largest most best discount discounts discounted deals deal offers "
+                    "offer products product items item which what are is the with have has show list me "
+                    "give find by on from in of percentage percent off sale",
+}
+# Words that only name a source ("on amazon", "big basket", "olist")
+SOURCE_WORDS = {"zepto", "blinkit", "amazon", "bigbasket", "ecommerce", "big", "basket", "blink", "grofers",
+                "olist", "e", "commerce"}
+# Words stripped from a price lookup's product name
+FILLER_WORDS = {"the", "a", "an", "on", "in", "at", "from", "for", "please", "now", "today", "currently"}
+
+# Per-source templates: SQL with "?" slots, and a title for the answer
+TEMPLATES = {
+    "amazon": {
+        "top_rated": ("Top {n} amazon products by rating",
+                      # product_id repeats (one row per review): keep each product's first row
+                      "SELECT product_name, rating, rating_count, discounted_price FROM ("
+                      "SELECT *, ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY rating_count DESC) AS _n "
+                      "FROM amazon_products WHERE rating IS NOT NULL) "
+                      "WHERE _n = 1 ORDER BY rating DESC, rating_count DESC LIMIT ?"),
+        "top_discount": ("Top {n} amazon products by discount",
+                         "SELECT product_name, discount_percentage, discounted_price, actual_price FROM ("
+                         "SELECT *, ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY rating_count DESC) AS _n "
+                         "FROM amazon_products WHERE discount_percentage IS NOT NULL) "
+                         "WHERE _n = 1 ORDER BY discount_percentage DESC, rating_count DESC LIMIT ?"),
+        "price_lookup": ("amazon prices for '{name}'", ("amazon_products", "product_name", "product_id"),
+                         "discounted_price, actual_price"),
+    },
+    "bigbasket": {
+        "top_rated": ("Top {n} bigbasket products by rating",
+                      "SELECT product, brand, rating, sale_price FROM bigbasket_products "
+                      "WHERE rating IS NOT NULL ORDER BY rating DESC, sale_price LIMIT ?"),
+        "top_discount": ("Top {n} bigbasket products by discount",
+                         "SELECT product, brand, ROUND(100.0 * (market_price - sale_price) / market_price, 1) "
+                         "AS discount_percentage, sale_price, market_price FROM bigbasket_products "
+                         "WHERE market_price > 0 ORDER BY discount_percentage DESC LIMIT ?"),
+        "price_lookup": ("bigbasket prices for '{name}'", ("bigbasket_products", "product", None),
+                         "brand, sale_price, market_price"),
+    },
+    "ecommerce": {
+        "status_count": ("Orders by status",
+                         "SELECT order_status, COUNT(*) AS orders FROM orders GROUP BY order_status "
+                         "ORDER BY orders DESC"),
+        "status_count_one": ("Orders with status '{status}'",
+                             "SELECT order_status, COUNT(*) AS orders FROM orders WHERE order_status = ? "
+                             "GROUP BY order_status"),
+    },
+}
+# Rows returned for a price lookup
+PRICE_LOOKUP_ROWS = 5
+FEATURE_SIZE = 2048
+
+
+def _words(text: str) -> list:
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def _features(text: str) -> np.ndarray:
+    """
+    Hashed bag of unigrams and bigrams, L2-normalized. Source names and
+    numbers are slots, not intent, so they are left out.
+    """
+    words = [w for w in _words(text) if w not in SOURCE_WORDS and not w.isdigit()]
+    vector = np.zeros(FEATURE_SIZE, dtype=np.float32)
+    for token in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+        digest = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+        vector[digest % FEATURE_SIZE] += 1.0
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+class IntentClassifier:
+    """
+    Nearest-centroid classifier: each intent is the mean feature vector of
+    its example questions; a question gets the intent with the highest
+    cosine similarity.
+    """
+
+    def __init__(self, examples: dict = INTENT_EXAMPLES):
+        self.intents = list(examples)
+        centroids = np.stack([np.mean([_features(e) for e in examples[i]], axis=0) for i in self.intents])
+        self.centroids = centroids / np.linalg.norm(centroids, axis=1, keepdims=True)
+
+    def classify(self, text: str):
+        """(intent, score) of the best-matching intent."""
+        scores = self.centroids @ _features(text)
+        best = int(np.argmax(scores))
+        return self.intents[best], float(scores[best])
+
+
+@dataclass
+class Route:
+    source: str
+    intent: str
+    title: str
+    sql: str
+    params: tuple
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_classifier() -> IntentClassifier:
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = IntentClassifier()
+    return _classifier
+
+
+_TOP_N = re.compile(r"\b(?:top|best|highest|biggest|largest|most)\s+(\d{1,3})\b|\b(\d{1,3})\s+(?:top|best|"
+                    r"highest|biggest|largest|most)\b")
+
+
+def _top_n_digits(query: str):
+    """The row count the query asks for ("top 10", "5 best"), as written, or None."""
+    match = _TOP_N.search(query)
+    return next(g for g in match.groups() if g) if match else None
+
+
+def _top_n(query: str) -> int:
+    digits = _top_n_digits(query)
+    n = int(digits) if digits else ROUTER_DEFAULT_TOP_N
+    return max(1, min(n, ROUTER_MAX_TOP_N))
+
+
+def _only_words(query: str, intent: str, extra=(), numbers=()) -> bool:
+    """
+    True if every word of `query` is one the intent's template answers; a
+    number is allowed only if it is one of `numbers` ("in 2017" or "4
+    stars" is a filter the template can't apply).
+    """
+    allowed = set(INTENT_WORDS[intent].split()) | SOURCE_WORDS | set(extra) | set(numbers)
+    return all(w in allowed for w in _words(query))
+
+
+_statuses = {}
+_statuses_lock = threading.Lock()
+
+
+def order_statuses(source: str = "ecommerce") -> list:
+    """Distinct order_status values, re-read whenever the .db file changes."""
+    version = get_db_version(source)
+    with _statuses_lock:
+        entry = _statuses.get(source)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+    with get_connection(source) as conn:
+        statuses = [row[0] for row in conn.execute("SELECT DISTINCT order_status FROM orders") if row[0]]
+    with _statuses_lock:
+        _statuses[source] = (version, statuses)
+    return statuses
+
+
+def _status_route(query: str, source: str):
+    # Olist spells it "canceled"
+    query = query.replace("cancelled", "canceled")
+    words = set(_words(query))
+    status = next((s for s in order_statuses(source) if s.lower() in words), None)
+    if not _only_words(query, "status_count", extra=_words(status or "")):
+        return None
+    if status is None:
+        title, sql = TEMPLATES[source]["status_count"]
+        return Route(source, "status_count", title, sql, ())
+    title, sql = TEMPLATES[source]["status_count_one"]
+    return Route(source, "status_count", title.format(status=status), sql, (status,))
+
+
+def _product_name(query: str):
+    query = query.lower().strip().rstrip("?.! ")
+    for pattern in (
+        r"(?:price|cost|mrp|rate) (?:of|for) (?P<name>.+)",
+        r"how much (?:is|are|does|do) (?P<name>.+?)(?: cost| costs| sell for)?$",
+        r"what (?:does|do) (?P<name>.+?) cost$",
+    ):
+        match = re.search(pattern, query)
+        if match:
+            words = [w for w in _words(match.group("name")) if w not in FILLER_WORDS and w not in SOURCE_WORDS]
+            return " ".join(words) or None
+    return None
+
+
+def _price_route(source: str, name: str):
+    title, (table, column, key), columns = TEMPLATES[source]["price_lookup"]
+    shown = [column] + [c.strip() for c in columns.split(",")]
+    selected = shown + ([key] if key else [])
+    terms = search_terms(name)
+    index = next((i for i in get_fts_indexes(source) if i["base_table"] == table and column in i["columns"]), None)
+    if index is not None and terms:
+        fts = '"' + index["name"] + '"'
+        # Column filter: only the product name has to contain every term
+        matches = (f"SELECT {', '.join('b.' + c for c in selected)}, {fts}.rank AS _rank "
+                   f"FROM {fts} JOIN {table} b ON b.rowid = {fts}.rowid WHERE {fts} MATCH ? ORDER BY {fts}.rank")
+        pattern = f"{column} : ({match_expression(terms)})"
+    else:
+        matches = f"SELECT {', '.join(selected)}, 0 AS _rank FROM {table} WHERE {column} LIKE ? ESCAPE '\\'"
+        escaped = re.sub(r"([%_\\])", r"\\\1", name)
+        pattern = f"%{escaped}%"
+    if key is None:
+        sql = f"SELECT {', '.join(shown)} FROM ({matches} LIMIT ?)"
+        return Route(source, "price_lookup", title.format(name=name), sql, (pattern, PRICE_LOOKUP_ROWS))
+    # The key repeats (a row per review): one row per product, best match first
+    sql = (f"SELECT {', '.join(shown)} FROM ({matches} LIMIT ?) "
+           f"GROUP BY {key} ORDER BY MIN(_rank) LIMIT ?")
+    return Route(source, "price_lookup", title.format(name=name), sql,
+                 (pattern, PRICE_LOOKUP_ROWS * 20, PRICE_LOOKUP_ROWS))
+
+
+def route(query: str, sources=None):
+    """
+    Routes for answering `query` on the fast path, one per source in
+    `sources` (default: detect_sources), or None if the agents should
+    answer it. Routes are returned only when the classifier is confident,
+    the rules can fill the template, and every source is built and has the
+    template, so a fast answer never covers fewer sources than the agents
+    would have.
+    """
+    intent, score = get_classifier().classify(query)
+    if intent == "other" or score < ROUTER_MIN_SCORE:
+        return None
+    candidates = list(sources or detect_sources(query))
+    if (not candidates or available_sources(candidates) != candidates
+            or any(intent not in TEMPLATES.get(s, {}) for s in candidates)):
+        return None
+
+    lowered = query.lower()
+    if intent == "status_count":
+        routes = [_status_route(lowered, s) for s in candidates]
+    elif intent == "price_lookup":
+        name = _product_name(lowered)
+        routes = [_price_route(s, name) for s in candidates] if name else [None]
+    else:
+        digits = _top_n_digits(lowered)
+        if not _only_words(lowered, intent, numbers=[digits] if digits else ()):
+            return None
+        n = _top_n(lowered)
+        routes = [Route(s, intent, TEMPLATES[s][intent][0].format(n=n), TEMPLATES[s][intent][1], (n,))
+                  for s in candidates]
+    return routes if all(routes) else None
+
+
+def format_rows(title: str, columns, rows) -> str:
+    lines = [f"{title}:"]
+    for i, row in enumerate(rows, 1):
+        lines.append(f"{i}. " + ", ".join(f"{c}: {v}" for c, v in zip(columns, row)))
+    return "\n".join(lines)
+
+
+def execute(r: Route):
+    """The answer text for one route, or None if the query found nothing."""
+    with get_connection(r.source) as conn:
+        cursor = conn.execute(r.sql, r.params)
+        rows = cursor.fetchall()
+        columns = [d[0] for d in cursor.description]
+    if not rows:
+        return None
+    return format_rows(r.title, columns, rows)
+
+
+_stats = {"questions": 0, "fast_path": 0, "fast_path_seconds": 0.0, "misses_after_match": 0}
+_stats_lock = threading.Lock()
+
+
+def answer(query: str, sources=None):
+    """
+    {source: answer text} when the whole question can be answered on the
+    fast path, else None.
+    """
+    start = time.perf_counter()
+    with span("router") as s:
+        routes, results = None, None
+        try:
+            routes = route(query, sources)
+            if routes is not None:
+                results = {r.source: execute(r) for r in routes}
+        except sqlite3.Error as e:
+            # A database that doesn't match the templates; the agents can cope
+            print(f"Router: fast path failed, using the agents ({e})")
+        if results is not None and not all(results.values()):
+            # e.g. no product by that name; the agents may still find it
+            results = None
+        s.set(intent=routes[0].intent if routes else None, fast_path=results is not None)
+    with _stats_lock:
+        _stats["questions"] += 1
+        if results is not None:
+            _stats["fast_path"] += 1
+            _stats["fast_path_seconds"] += time.perf_counter() - start
+        elif routes is not None:
+            _stats["misses_after_match"] += 1
+    return results
+
+
+def stats() -> dict:
+    with _stats_lock:
+        fast = _stats["fast_path"]
+        return {
+            "questions": _stats["questions"], "fast_path": fast,
+            "fast_path_share": round(fast / _stats["questions"], 3) if _stats["questions"] else 0.0,
+            "fast_path_mean_ms": round(_stats["fast_path_seconds"] / fast * 1000, 3) if fast else 0.0,
+            "misses_after_match": _stats["misses_after_match"],
+        }
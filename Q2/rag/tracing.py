@@ -0,0 +1,414 @@
+# rag/tracing.py
+#
+# Request-level tracing. Every question becomes a trace of nested spans:
+#
+#   request -> agent (per source) -> llm / tool -> sql
+#           -> summary -> llm
+#
+# plus schema_select and text_search spans for retrieval. Spans carry their
+# duration and attributes (model and token counts, tool name and input, SQL
+# text and row count, ...) and are written to a local sink when they end:
+# a JSONL file, or a SQLite file when the path ends in .db/.sqlite.
+#
+# With tracing off (the default, RAG_TRACE=1 turns it on) span() returns a
+# shared no-op object and callbacks() returns None, so instrumented code
+# pays one function call per stage.
+#
+# Latency breakdown per stage (p50/p95/p99) from a trace file:
+#     python -m rag.tracing --path cache/traces.jsonl
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from rag.config import TRACE_ENABLED, TRACE_PATH
+
+# Longest text attribute (SQL, tool input, ...) kept on a span
+MAX_TEXT_CHARS = 2000
+
+_enabled = TRACE_ENABLED
+_path = TRACE_PATH
+_trace_id = ContextVar("rag_trace_id", default=None)
+_span_id = ContextVar("rag_span_id", default=None)
+
+
+def _new_id() -> str:
+    return os.urandom(8).hex()
+
+
+def _clip(attrs: dict) -> dict:
+    return {
+        key: value[:MAX_TEXT_CHARS] + "..." if isinstance(value, str) and len(value) > MAX_TEXT_CHARS else value
+        for key, value in attrs.items()
+    }
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    """
+    One timed stage. Entering it makes it the parent of spans opened in
+    the same context (and in contexts copied from it, e.g. pool threads
+    started with contextvars.copy_context().run); leaving it writes the
+    record to the sink.
+    """
+
+    __slots__ = ("name", "attrs", "trace_id", "span_id", "parent_id", "start", "_t0", "_tokens", "_root")
+
+    def __init__(self, name: str, attrs: dict, root: bool = False):
+        self.name = name
+        self.attrs = _clip(attrs)
+        self._root = root
+
+    def __enter__(self):
+        trace_id = None if self._root else _trace_id.get()
+        self._root = trace_id is None
+        self.trace_id = trace_id or _new_id()
+        self.parent_id = None if self._root else _span_id.get()
+        self.span_id = _new_id()
+        self._tokens = (_trace_id.set(self.trace_id), _span_id.set(self.span_id))
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration_ms = (time.perf_counter() - self._t0) * 1000
+        for var, token in zip((_trace_id, _span_id), self._tokens):
+            try:
+                var.reset(token)
+            except ValueError:
+                # Ended from a different context (callback-driven spans)
+                var.set(None if token.old_value is token.MISSING else token.old_value)
+        record = {
+            "trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+            "name": self.name, "start": round(self.start, 6), "duration_ms": round(duration_ms, 3),
+            "attrs": self.attrs, "error": f"{exc_type.__name__}: {exc}" if exc_type else None,
+        }
+        sink = get_sink()
+        sink.write(record)
+        if self._root:
+            sink.flush()
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(_clip(attrs))
+
+
+def span(name: str, **attrs):
+    """Context manager timing one stage; a no-op while tracing is off."""
+    if not _enabled:
+        return _NOOP
+    return Span(name, attrs)
+
+
+def trace(name: str = "request", **attrs):
+    """Like span(), but always starts a new trace (one per user question)."""
+    if not _enabled:
+        return _NOOP
+    return Span(name, attrs, root=True)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def enable(path: str = None):
+    """Turns tracing on at runtime, optionally writing to another file."""
+    global _enabled, _path, _sink
+    with _sink_lock:
+        if path is not None and os.path.abspath(path) != _path:
+            if _sink is not None:
+                _sink.close()
+                _sink = None
+            _path = os.path.abspath(path)
+        _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+    flush()
+
+
+# --- Sinks ---
+
+class JsonlSink:
+    """Appends one JSON object per span."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, record: dict):
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class SqliteSink:
+    """Spans as rows of a `spans` table; committed when a trace ends."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS spans (trace_id TEXT, span_id TEXT PRIMARY KEY, parent_id TEXT, "
+            "name TEXT, start REAL, duration_ms REAL, attrs TEXT, error TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS spans_trace ON spans (trace_id)")
+        self._lock = threading.Lock()
+
+    def write(self, record: dict):
+        row = (record["trace_id"], record["span_id"], record["parent_id"], record["name"], record["start"],
+               record["duration_ms"], json.dumps(record["attrs"], default=str), record["error"])
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO spans VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row)
+
+    def flush(self):
+        with self._lock:
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+
+def _is_sqlite(path: str) -> bool:
+    return path.endswith((".db", ".sqlite"))
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_sink():
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                _sink = SqliteSink(_path) if _is_sqlite(_path) else JsonlSink(_path)
+    return _sink
+
+
+def flush():
+    if _sink is not None:
+        _sink.flush()
+
+
+def close():
+    """Flushes and closes the sink; the next span opens it again."""
+    global _sink
+    with _sink_lock:
+        if _sink is not None:
+            _sink.close()
+            _sink = None
+
+
+def read_spans(path: str = None):
+    """All span records in a trace file, oldest first."""
+    path = path or _path
+    if _is_sqlite(path):
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            for row in conn.execute("SELECT * FROM spans ORDER BY start"):
+                yield {"trace_id": row[0], "span_id": row[1], "parent_id": row[2], "name": row[3],
+                       "start": row[4], "duration_ms": row[5], "attrs": json.loads(row[6]), "error": row[7]}
+        finally:
+            conn.close()
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+# --- LangChain callbacks ---
+
+def _token_usage(response) -> dict:
+    usage = dict((response.llm_output or {}).get("token_usage") or {})
+    if usage:
+        return usage
+    # Streaming chat models report usage on the message instead
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if metadata:
+                return {"prompt_tokens": metadata.get("input_tokens"),
+                        "completion_tokens": metadata.get("output_tokens"),
+                        "total_tokens": metadata.get("total_tokens")}
+    return {}
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    Turns LangChain's LLM, tool and retriever events into spans, nested
+    under whichever span is current when the run starts (spans keyed by
+    LangChain's run_id, since start and end arrive as separate calls).
+    """
+
+    def __init__(self):
+        self._open = {}
+
+    def _start(self, run_id, name: str, attrs: dict):
+        self._open[run_id] = Span(name, attrs).__enter__()
+
+    def _end(self, run_id, error: BaseException = None, **attrs):
+        opened = self._open.pop(run_id, None)
+        if opened is None:
+            return
+        opened.set(**attrs)
+        opened.__exit__(type(error) if error else None, error, None)
+
+    @staticmethod
+    def _model(serialized, kwargs) -> str:
+        params = kwargs.get("invocation_params") or {}
+        return params.get("model_name") or params.get("model") or (serialized or {}).get("name", "")
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, "llm", {"model": self._model(serialized, kwargs)})
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, "llm", {"model": self._model(serialized, kwargs)})
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end(run_id, **_token_usage(response))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._start(run_id, "tool", {"tool": (serialized or {}).get("name", ""), "input": input_str})
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id, output_chars=len(str(output)))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_retriever_start(self, serialized, query, *, run_id, **kwargs):
+        self._start(run_id, "retrieval", {"query": query})
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id, documents=len(documents))
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+
+_handler = TracingCallbackHandler()
+
+
+def callbacks():
+    """Callbacks to pass to LangChain runs: the tracing handler, or None when off."""
+    return [_handler] if _enabled else None
+
+
+# --- Reporting ---
+
+def percentile(sorted_values, q: float) -> float:
+    """Linear-interpolated percentile (q in 0..100) of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+
+def stage_name(record: dict) -> str:
+    attrs = record.get("attrs") or {}
+    if record["name"] == "tool" and attrs.get("tool"):
+        return f"tool:{attrs['tool']}"
+    if record["name"] == "agent" and attrs.get("source"):
+        return f"agent:{attrs['source']}"
+    return record["name"]
+
+
+def latency_report(records) -> dict:
+    """
+    {stage: {"count", "errors", "p50_ms", "p95_ms", "p99_ms", "total_ms"}}
+    plus token totals for the llm stage, over a list of span records.
+    """
+    durations, errors, tokens = {}, {}, {"prompt_tokens": 0, "completion_tokens": 0}
+    for record in records:
+        stage = stage_name(record)
+        durations.setdefault(stage, []).append(record["duration_ms"])
+        errors[stage] = errors.get(stage, 0) + (record.get("error") is not None)
+        if record["name"] == "llm":
+            for key in tokens:
+                tokens[key] += (record.get("attrs") or {}).get(key) or 0
+    report = {}
+    for stage, values in sorted(durations.items()):
+        values.sort()
+        report[stage] = {
+            "count": len(values), "errors": errors[stage],
+            "p50_ms": round(percentile(values, 50), 2), "p95_ms": round(percentile(values, 95), 2),
+            "p99_ms": round(percentile(values, 99), 2), "total_ms": round(sum(values), 2),
+        }
+    if "llm" in report:
+        report["llm"].update(tokens)
+    return report
+
+
+def print_report(report: dict):
+    print(f"{'stage':<32} {'count':>7} {'errors':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'total s':>9}")
+    for stage, row in report.items():
+        print(f"{stage:<32} {row['count']:>7} {row['errors']:>7} {row['p50_ms']:>10.1f} {row['p95_ms']:>10.1f} "
+              f"{row['p99_ms']:>10.1f} {row['total_ms'] / 1000:>9.2f}")
+    if "llm" in report:
+        print(f"LLM tokens: {report['llm']['prompt_tokens']:,} prompt, "
+              f"{report['llm']['completion_tokens']:,} completion")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency breakdown per stage from a trace file.")
+    parser.add_argument("--path", default=TRACE_PATH)
+    parser.add_argument("--last", type=int, default=None, help="Only the last N requests")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    records = list(read_spans(args.path))
+    if args.last:
+        roots = [r for r in records if r["parent_id"] is None]
+        keep = {r["trace_id"] for r in roots[-args.last:]}
+        records = [r for r in records if r["trace_id"] in keep]
+    report = latency_report(records)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+# rag/utils/embeddings.py
+
+import threading
+
+from rag.config import EMBEDDING_MODEL
+
+_embeddings = None
+_lock = threading.Lock()
+
+
+def get_embeddings():
+    """Shared embedding model, created on first use."""
+    global _embeddings
+    if _embeddings is None:
+        with _lock:
+            if _embeddings is None:
+                from langchain_openai import OpenAIEmbeddings
+                _embeddings = OpenAIEmbeddings(model=EMBEDDING_MODEL)
+    return _embeddings
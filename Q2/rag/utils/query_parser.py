@@ -1,10 +1,43 @@
-def detect_sources(query: str):
+# rag/utils/query_parser.py
+
+import os
+import re
+
+from rag.config import DB_PATHS, DEFAULT_SOURCES
+
+# Other ways a question names a source (its DB_PATHS key always counts);
+# order and delivery questions belong to the Olist ecommerce database
+SOURCE_ALIASES = {
+    "bigbasket": ["big basket"],
+    "blinkit": ["blink it", "grofers"],
+    "ecommerce": ["e-commerce", "olist", "orders", "order status", "sellers", "deliveries", "delivered",
+                  "freight", "payments"],
+}
+
+_patterns = {}
+
+
+def _pattern(source: str):
+    if source not in _patterns:
+        names = [source] + SOURCE_ALIASES.get(source, [])
+        _patterns[source] = re.compile(r"\b(?:" + "|".join(re.escape(n) for n in names) + r")\b")
+    return _patterns[source]
+
+
+def mentioned_sources(query: str) -> list:
+    """Sources the question names explicitly, in DB_PATHS order."""
     query = query.lower()
-    sources = []
-    if "amazon" in query:
-        sources.append("amazon")
-    if "bigbasket" in query or "big basket" in query:
-        sources.append("bigbasket")
+    return [source for source in DB_PATHS if _pattern(source).search(query)]
+
+
+def available_sources(sources=None) -> list:
+    """`sources` (default: every DB_PATHS entry) whose .db file exists."""
+    return [s for s in (sources or DB_PATHS) if s in DB_PATHS and os.path.exists(DB_PATHS[s])]
+
+
+def detect_sources(query: str):
+    sources = mentioned_sources(query)
     if not sources:
-        sources = ["amazon", "bigbasket"]
-    return sources
\ No newline at end of file
+        defaults = [s for s in DEFAULT_SOURCES if s in DB_PATHS]
+        sources = available_sources(defaults) or defaults
+    return sources